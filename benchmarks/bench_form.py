@@ -0,0 +1,203 @@
+# benchmarks/bench_form.py
+"""Benchmark offline del automatizador contra una réplica local del formulario
+
+Uso:
+    python benchmarks/bench_form.py --iterations 5 --output bench_results.json
+    python benchmarks/bench_form.py --compare bench_results_anterior.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from replica_server import ReplicaServer  # noqa: E402
+from form_automation_github import build_automator  # noqa: E402
+from form_proc_stats import driver_root_pid, tree_usage  # noqa: E402
+
+IDENTITY = {'email': 'bench@example.com', 'nombre': 'José Pérez', 'dni': '30111222'}
+
+# Modos de arranque de Chrome a comparar (variables de entorno de form_chrome)
+CHROME_MODES = {
+    'default': {},
+    'lean': {'FORM_CHROME_LEAN': '1'},
+    'warm': {'FORM_CHROME_LEAN': '1', 'FORM_CHROME_PROFILE_DIR': '{work_dir}/chrome-profile'},
+}
+
+
+class RssSampler(threading.Thread):
+    """Mide el pico de RSS del árbol de procesos de Chrome mientras corre el envío"""
+
+    def __init__(self, automator, interval=0.2):
+        super().__init__(name='rss-sampler', daemon=True)
+        self.automator = automator
+        self.interval = interval
+        self.peak_rss = 0
+        self.stopped = threading.Event()
+
+    def driver(self):
+        # En modo auto, el driver del respaldo Selenium si ya arrancó
+        return getattr(self.automator, 'driver', None)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            pid = driver_root_pid(self.driver()) if self.driver() else None
+            if pid:
+                self.peak_rss = max(self.peak_rss, tree_usage(pid)[0])
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano (suficiente para pocas muestras)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 4)
+
+
+def run_once(engine, form_url):
+    """Un envío completo; devuelve tiempos por paso, RSS pico y timeouts"""
+    automator = build_automator(engine, form_url, **IDENTITY)
+    sampler = RssSampler(automator)
+    sampler.start()
+    start = time.monotonic()
+    try:
+        success = automator.fill_form_step_by_step()
+    finally:
+        sampler.stop()
+    total = time.monotonic() - start
+
+    events = automator.trace.events if automator.trace else []
+    first_field = next((e['t'] for e in events if e['kind'] == 'strategy' and e['outcome'] == 'hit'), None)
+    return {
+        'success': bool(success),
+        'total_s': total,
+        'steps': {e['name']: e['duration_s'] for e in events if e['kind'] == 'step'},
+        'first_field_s': first_field,
+        'peak_rss_mb': sampler.peak_rss / 2**20 if sampler.peak_rss else None,
+        'strategy_timeouts': sum(1 for e in events if e['kind'] == 'strategy' and e['outcome'] != 'hit'),
+        'wait_timeouts': sum(1 for e in events if e['kind'] == 'wait' and e['outcome'] == 'timeout'),
+    }
+
+
+def summarize(samples):
+    summary = {
+        'runs': len(samples),
+        'success_rate': round(sum(s['success'] for s in samples) / len(samples), 3),
+        'total_p50_s': percentile([s['total_s'] for s in samples], 50),
+        'total_p95_s': percentile([s['total_s'] for s in samples], 95),
+        'first_field_p50_s': percentile([s['first_field_s'] for s in samples if s['first_field_s'] is not None], 50),
+        'peak_rss_mb_p50': percentile([s['peak_rss_mb'] for s in samples if s['peak_rss_mb']], 50),
+        'peak_rss_mb_max': percentile([s['peak_rss_mb'] for s in samples if s['peak_rss_mb']], 100),
+        'strategy_timeouts': sum(s['strategy_timeouts'] for s in samples),
+        'wait_timeouts': sum(s['wait_timeouts'] for s in samples),
+        'steps': {},
+    }
+    step_names = []
+    for s in samples:
+        step_names.extend(name for name in s['steps'] if name not in step_names)
+    for name in step_names:
+        values = [s['steps'][name] for s in samples if name in s['steps']]
+        summary['steps'][name] = {'p50_s': percentile(values, 50), 'p95_s': percentile(values, 95)}
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def has_load_data(server, variant):
+    with open(os.path.join(server.httpd.replica_dir, variant, 'section1.html'), encoding='utf-8') as f:
+        return 'FB_PUBLIC_LOAD_DATA_' in f.read()
+
+
+def print_table(results, previous=None):
+    previous = (previous or {}).get('results', {})
+    print(f"\n{'caso':<26} {'ok':>5} {'p50':>8} {'p95':>8} {'1er campo':>10} {'RSS MB':>8} {'timeouts':>9} {'vs anterior':>12}")
+    for name, r in results.items():
+        delta = ''
+        before = previous.get(name, {}).get('total_p50_s')
+        if before and r['total_p50_s']:
+            delta = f"{(r['total_p50_s'] - before) / before * 100:+.1f}%"
+        rss = f"{r['peak_rss_mb_max']:.0f}" if r['peak_rss_mb_max'] else '-'
+        first = f"{r['first_field_p50_s']:.2f}s" if r['first_field_p50_s'] is not None else '-'
+        print(f"{name:<26} {r['success_rate']:>5.0%} {r['total_p50_s']:>7.2f}s {r['total_p95_s']:>7.2f}s "
+              f"{first:>10} {rss:>8} {r['strategy_timeouts'] + r['wait_timeouts']:>9} {delta:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline contra la réplica local del formulario")
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--variants', help="Variantes separadas por coma (por defecto todas)")
+    parser.add_argument('--engines', default='selenium,http', help="Motores separados por coma")
+    parser.add_argument('--output', default='bench_results.json', help="Archivo JSON de resultados")
+    parser.add_argument('--compare', help="Resultados anteriores para comparar")
+    parser.add_argument('--chrome-modes', default='default',
+                        help=f"Modos de Chrome separados por coma ({', '.join(CHROME_MODES)})")
+    parser.add_argument('--locator-cache', action='store_true', help="Usar la caché de localizadores (por defecto desactivada)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    trace_dir = tempfile.mkdtemp(prefix='form_bench_')
+    os.environ['FORM_TRACE_DIR'] = trace_dir
+    if args.locator_cache:
+        os.environ['FORM_LOCATOR_CACHE'] = os.path.join(trace_dir, 'locators.json')
+    else:
+        os.environ['FORM_LOCATOR_CACHE'] = 'off'
+
+    results = {}
+    with ReplicaServer() as server:
+        variants = args.variants.split(',') if args.variants else server.variants()
+        for engine in args.engines.split(','):
+            # Los modos de Chrome no cambian nada en el motor HTTP
+            modes = args.chrome_modes.split(',') if engine != 'http' else ['default']
+            for mode in modes:
+                for key in ('FORM_CHROME_LEAN', 'FORM_CHROME_PROFILE_DIR'):
+                    os.environ.pop(key, None)
+                for key, value in CHROME_MODES[mode].items():
+                    os.environ[key] = value.format(work_dir=trace_dir)
+                for variant in variants:
+                    if engine == 'http' and not has_load_data(server, variant):
+                        continue  # Sin FB_PUBLIC_LOAD_DATA_ el motor HTTP no aplica
+                    name = f"{engine}/{variant}" if mode == 'default' else f"{engine}+{mode}/{variant}"
+                    print(f"⏱️ {name}: {args.iterations} envíos...", flush=True)
+                    samples = [run_once(engine, server.form_url(variant)) for _ in range(args.iterations)]
+                    results[name] = summarize(samples)
+
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'iterations': args.iterations,
+        'traces': trace_dir,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_table(results, previous)
+    print(f"\n📄 Resultados: {args.output} (trazas en {trace_dir})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/bench_startup.py
+"""Mide el arranque del punto de entrada: imports y caminos que no necesitan navegador
+
+Uso:
+    python benchmarks/bench_startup.py --runs 10 --output startup.json
+    python benchmarks/bench_startup.py --compare startup.json --max-import-ms 150
+
+Sale con código 1 si el import de form_automation_github carga selenium o requests,
+si supera --max-import-ms o si algún tiempo empeora más de --tolerance respecto de
+--compare.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_MODULE = 'form_automation_github'
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'startup_results.json')  # En .gitignore
+# Módulos pesados que el punto de entrada solo debe importar al elegir su motor
+HEAVY_MODULES = ('selenium', 'requests', 'urllib3')
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$')
+
+# Caminos que tienen que resolverse sin navegador (argumentos de python, con el entorno limpio)
+PATHS = {
+    'interpreter': ['-c', 'pass'],
+    'import': ['-c', f'import {ENTRY_MODULE}'],
+    'config_error': [f'{ENTRY_MODULE}.py'],  # Sin FORM_URL/EMAIL/NOMBRE/DNI: tiene que fallar enseguida
+    'http_ready': ['-c', f'from {ENTRY_MODULE} import build_automator; '
+                         'build_automator("http", "http://127.0.0.1/form", "bench@example.com", "Bench", "1")'],
+}
+
+
+def clean_env():
+    """Entorno sin los datos del formulario ni la configuración FORM_* del que corre el benchmark"""
+    return {key: value for key, value in os.environ.items()
+            if not key.startswith('FORM_') and key not in ('EMAIL', 'NOMBRE', 'DNI')}
+
+
+def import_profile():
+    """Tiempos de -X importtime: {módulo: (propio_us, acumulado_us, nivel)} en orden de carga"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + PATHS['import'], cwd=ROOT,
+                          env=clean_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {ENTRY_MODULE}: {proc.stderr.strip().splitlines()[-1:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def time_path(name, runs):
+    """Mediana del tiempo de pared de un camino (proceso nuevo en cada corrida)"""
+    samples = []
+    outcome = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable] + PATHS[name], cwd=ROOT, env=clean_env(),
+                              capture_output=True, text=True)
+        samples.append(time.perf_counter() - start)
+        outcome = proc
+    if name == 'config_error':
+        ok = outcome.returncode == 1 and 'Faltan estas variables de entorno' in outcome.stdout + outcome.stderr
+    else:
+        ok = outcome.returncode == 0
+    error = None if ok else (outcome.stderr.strip().splitlines() or outcome.stdout.strip().splitlines() or ['?'])[-1]
+    return {'p50_ms': round(statistics.median(samples) * 1000, 1),
+            'max_ms': round(max(samples) * 1000, 1), 'ok': ok, 'error': error}
+
+
+def heavy_imports(modules):
+    return sorted({name.split('.')[0] for name in modules if name.split('.')[0] in HEAVY_MODULES})
+
+
+def compare(report, previous, tolerance):
+    """Tiempos que empeoraron más de tolerance (fracción) respecto del reporte anterior"""
+    problems = []
+    before = previous.get('import', {}).get('cumulative_ms')
+    after = report['import']['cumulative_ms']
+    if before and after > before * (1 + tolerance):
+        problems.append(f"import {ENTRY_MODULE}: {before:.1f} → {after:.1f} ms")
+    for name, result in report['paths'].items():
+        before = previous.get('paths', {}).get(name, {}).get('p50_ms')
+        if name != 'interpreter' and before and result['p50_ms'] > before * (1 + tolerance):
+            problems.append(f"{name}: {before:.1f} → {result['p50_ms']:.1f} ms")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del punto de entrada (python -X importtime)")
+    parser.add_argument('--runs', type=int, default=5, help="Corridas por camino (se reporta la mediana)")
+    parser.add_argument('--top', type=int, default=10, help="Cantidad de módulos más lentos a mostrar")
+    parser.add_argument('--max-import-ms', type=float, help="Falla si el import del punto de entrada tarda más")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Archivo JSON de resultados")
+    parser.add_argument('--compare', help="Resultados anteriores para comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Empeoramiento admitido contra --compare (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    modules = import_profile()
+    entry = modules.get(ENTRY_MODULE, (0, 0, 0))
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    paths = {}
+    for name in PATHS:
+        if name == 'http_ready' and not importlib.util.find_spec('requests'):
+            continue  # Sin requests instalado el motor HTTP no se puede medir
+        print(f"⏱️ {name}: {args.runs} corridas...", flush=True)
+        paths[name] = time_path(name, args.runs)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'import': {
+            'cumulative_ms': round(entry[1] / 1000, 1),
+            'modules': len(modules),
+            'heavy': heavy_imports(modules),
+            'slowest': [{'module': name, 'self_ms': round(s / 1000, 2), 'cumulative_ms': round(c / 1000, 2)}
+                        for name, (s, c, _) in slowest],
+        },
+        'paths': paths,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📦 import {ENTRY_MODULE}: {report['import']['cumulative_ms']:.1f} ms acumulados, {len(modules)} módulos")
+    for row in report['import']['slowest']:
+        print(f"  {row['module']:<40} {row['self_ms']:>8.2f} ms propios {row['cumulative_ms']:>9.2f} ms acumulados")
+    print(f"\n{'camino':<14} {'p50':>9} {'máx':>9}")
+    for name, result in paths.items():
+        icon = '✅' if result['ok'] else '❌'
+        print(f"{icon} {name:<12} {result['p50_ms']:>7.1f}ms {result['max_ms']:>7.1f}ms{'  ' + result['error'] if result['error'] else ''}")
+
+    problems = [f"{name}: {result['error']}" for name, result in paths.items() if not result['ok']]
+    if report['import']['heavy']:
+        problems.append(f"import {ENTRY_MODULE} carga {', '.join(report['import']['heavy'])}")
+    if args.max_import_ms and report['import']['cumulative_ms'] > args.max_import_ms:
+        problems.append(f"import {ENTRY_MODULE}: {report['import']['cumulative_ms']:.1f} ms > {args.max_import_ms:.1f} ms")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            problems.extend(compare(report, json.load(f), args.tolerance))
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print(f"\n📄 Resultados: {args.output}")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
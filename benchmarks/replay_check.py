@@ -0,0 +1,263 @@
+# benchmarks/replay_check.py
+"""Reproduce bundles grabados (--record) y la réplica local sin red ni secretos
+
+Uso:
+    python benchmarks/replay_check.py                          # variantes de form_replica
+    python benchmarks/replay_check.py bundles/firma --lookups cascade,race
+    python benchmarks/replay_check.py bundles/firma --sweep    # cada estrategia por separado
+    python benchmarks/replay_check.py --serve bundles/firma    # solo servir el bundle
+
+Sale con código 1 si algún caso falla, si la estrategia ganadora no es la que se
+grabó o si en el barrido ninguna estrategia encuentra un campo.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from replica_server import REPLICA_DIR, ReplicaHandler, ReplicaServer  # noqa: E402
+from form_automation_github import LOOKUP_MODES, build_automator  # noqa: E402
+from form_fixture import BUNDLE_VARIANT, load_manifest  # noqa: E402
+from form_flow import DEFAULT_FLOW_PATH, compile_flow, read_spec  # noqa: E402
+
+REPLICA_IDENTITY = {'email': 'replay@example.com', 'nombre': 'José Pérez', 'dni': '30111222'}
+SWEEP_TIMEOUT = 1
+NO_MATCH_LOCATOR = ['css', '#replay-sin-coincidencia']
+
+# La reproducción no espera como una persona ni guarda estado entre casos
+REPLAY_ENV = {
+    'FORM_PACING': 'off',
+    'FORM_CAPTURE': 'none',
+    'FORM_LOCATOR_CACHE': 'off',
+    'FORM_CHROME_LEAN': '1',
+}
+CLEARED_ENV = ('FORM_RECORD', 'FORM_CHROME_PROFILE_DIR', 'FORM_JOB_DB', 'FORM_FLOW')
+
+
+class BundleHandler(ReplicaHandler):
+    """Como ReplicaHandler, pero con cualquier cantidad de secciones (sectionN)"""
+
+    def do_GET(self):
+        variant, page = self.route()
+        if page and page.startswith('section') and page[len('section'):].isdigit():
+            self.send_file(os.path.join(self.server.replica_dir, variant, f"{page}.html"))
+        else:
+            super().do_GET()
+
+
+class ReplayCase:
+    """Un formulario servido localmente: un bundle grabado o una variante de la réplica"""
+
+    def __init__(self, name, server, variant, identity, manifest=None):
+        self.name = name
+        self.server = server
+        self.variant = variant
+        self.identity = identity
+        self.manifest = manifest or {}
+
+    @property
+    def form_url(self):
+        return self.server.form_url(self.variant)
+
+    @property
+    def has_load_data(self):
+        with open(os.path.join(self.server.httpd.replica_dir, self.variant, 'section1.html'), encoding='utf-8') as f:
+            return 'FB_PUBLIC_LOAD_DATA_' in f.read()
+
+
+def run_case(case, engine, lookup, flow_path=None):
+    """Un envío completo contra el servidor local; devuelve el resultado y las estrategias ganadoras"""
+    os.environ['FORM_LOOKUP'] = lookup
+    if flow_path or case.manifest.get('flow'):
+        os.environ['FORM_FLOW'] = flow_path or case.manifest['flow']
+    else:
+        os.environ.pop('FORM_FLOW', None)
+    before = len(case.server.submissions)
+    automator = build_automator(engine, case.form_url, **case.identity)
+    start = time.monotonic()
+    success = automator.fill_form_step_by_step()
+    trace = getattr(automator, 'trace', None)  # En modo auto, la del motor que terminó
+    events = trace.events if trace else []
+    submissions = case.server.submissions[before:]
+    submitted_values = [value for s in submissions for values in s['fields'].values() for value in values]
+    return {
+        'success': bool(success),
+        'error': getattr(automator, 'last_error', None),
+        'duration_s': round(time.monotonic() - start, 2),
+        'hits': {e['name']: e['index'] - 1 for e in events if e['kind'] == 'strategy' and e['outcome'] == 'hit'},
+        'submitted': bool(submissions),
+        'dni_submitted': case.identity['dni'] in submitted_values,
+    }
+
+
+def check_result(case, result):
+    """Problemas de un caso: envío fallido, datos que no llegaron o estrategia distinta a la grabada"""
+    problems = []
+    if not result['success']:
+        problems.append(result['error'] or 'el envío falló')
+    if not result['submitted']:
+        problems.append('el servidor no recibió el envío')
+    elif not result['dni_submitted']:
+        problems.append('el DNI no llegó en el envío')
+    for field, expected in case.manifest.get('strategies', {}).items():
+        got = result['hits'].get(field)
+        if got is not None and got != expected['index']:
+            problems.append(f"{field}: ganó la estrategia {got + 1}, se grabó la {expected['index'] + 1}")
+    return problems
+
+
+def sweep_specs(spec):
+    """Specs derivados del flujo: cada estrategia de cada campo y botón sola, y el fallback forzado
+
+    Devuelve (item, índice o 'fallback', selector, spec).
+    """
+    flow = compile_flow(spec)
+    items = []
+    for s_index, section in enumerate(flow.sections):
+        for f_index, field in enumerate(section.fields):
+            items.append((('sections', s_index, 'fields', f_index), field))
+        items.append((('sections', s_index, 'advance'), section.advance))
+
+    for path, item in items:
+        variants = [(index, [by, selector]) for index, (by, selector) in enumerate(item.strategies)]
+        if getattr(item, 'fallback', None):
+            variants.append(('fallback', NO_MATCH_LOCATOR))
+        for index, locator in variants:
+            derived = json.loads(json.dumps(spec))
+            target = derived
+            for key in path:
+                target = target[key]
+            target['locators'] = [locator]
+            target['timeout'] = SWEEP_TIMEOUT
+            yield item, index, locator[1], derived
+
+
+def run_sweep(case, engine, work_dir):
+    """Prueba cada estrategia por separado (y los fallbacks) contra el formulario del caso"""
+    spec = read_spec(case.manifest.get('flow') or DEFAULT_FLOW_PATH)
+    rows = []
+    for n, (item, index, selector, derived) in enumerate(sweep_specs(spec)):
+        flow_path = os.path.join(work_dir, f"sweep_{n:03d}.json")
+        with open(flow_path, 'w', encoding='utf-8') as f:
+            json.dump(derived, f, ensure_ascii=False)
+        result = run_case(case, engine, 'cascade', flow_path)
+        if index == 'fallback':
+            outcome = 'ok' if result['success'] else 'falla'
+        else:
+            outcome = 'encuentra' if result['hits'].get(item.cache_key) == 0 else 'no encuentra'
+        rows.append({'item': item.cache_key, 'strategy': index, 'selector': selector,
+                     'outcome': outcome, 'duration_s': result['duration_s']})
+    return rows
+
+
+def sweep_problems(rows):
+    problems = []
+    for item in dict.fromkeys(row['item'] for row in rows):
+        item_rows = [row for row in rows if row['item'] == item]
+        if not any(row['outcome'] == 'encuentra' for row in item_rows if row['strategy'] != 'fallback'):
+            problems.append(f"{item}: ninguna estrategia lo encuentra")
+        if any(row['outcome'] == 'falla' for row in item_rows if row['strategy'] == 'fallback'):
+            problems.append(f"{item}: el fallback no completa el envío")
+    return problems
+
+
+def print_sweep(name, rows):
+    print(f"\n🧪 Barrido de estrategias: {name}")
+    for row in rows:
+        label = 'fallback' if row['strategy'] == 'fallback' else f"{row['strategy'] + 1:>8}"
+        icon = '✅' if row['outcome'] in ('encuentra', 'ok') else '·'
+        print(f"  {icon} {row['item']:<12} {label} {row['outcome']:<13} {row['duration_s']:>5.1f}s  {row['selector'][:70]}")
+
+
+def serve(bundle):
+    manifest = load_manifest(bundle)
+    with ReplicaServer(replica_dir=bundle, handler=BundleHandler) as server:
+        print(f"🎞️ Sirviendo {bundle} en {server.form_url(BUNDLE_VARIANT)} (grabado {manifest['recorded_at']}); Ctrl+C para salir")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce bundles grabados y la réplica local del formulario")
+    parser.add_argument('bundles', nargs='*', help="Carpetas grabadas con --record (por defecto solo la réplica)")
+    parser.add_argument('--replica', action='store_true', help="Incluir las variantes de form_replica junto a los bundles")
+    parser.add_argument('--engines', default='selenium', help="Motores separados por coma (http solo donde hay FB_PUBLIC_LOAD_DATA_)")
+    parser.add_argument('--lookups', default=','.join(LOOKUP_MODES), help="Modos de búsqueda separados por coma")
+    parser.add_argument('--sweep', action='store_true', help="Probar además cada estrategia y fallback por separado")
+    parser.add_argument('--serve', metavar='BUNDLE', help="Solo servir un bundle para probarlo a mano")
+    parser.add_argument('--output', help="Archivo JSON con los resultados")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    if args.serve:
+        serve(args.serve)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='form_replay_')
+    os.environ['FORM_TRACE_DIR'] = work_dir
+    for key in CLEARED_ENV:
+        os.environ.pop(key, None)
+    os.environ.update(REPLAY_ENV)
+
+    servers = []
+    cases = []
+    try:
+        for bundle in args.bundles:
+            manifest = load_manifest(bundle)
+            server = ReplicaServer(replica_dir=bundle, handler=BundleHandler).__enter__()
+            servers.append(server)
+            cases.append(ReplayCase(os.path.basename(os.path.normpath(bundle)), server, BUNDLE_VARIANT,
+                                    manifest['identity'], manifest))
+        if args.replica or not args.bundles:
+            server = ReplicaServer(replica_dir=REPLICA_DIR, handler=BundleHandler).__enter__()
+            servers.append(server)
+            cases.extend(ReplayCase(f"replica/{variant}", server, variant, REPLICA_IDENTITY)
+                         for variant in server.variants())
+
+        results = []
+        failures = 0
+        for case in cases:
+            for engine in args.engines.split(','):
+                if engine == 'http' and not case.has_load_data:
+                    continue  # Sin FB_PUBLIC_LOAD_DATA_ el motor HTTP no aplica
+                # El modo de búsqueda solo cambia algo en los motores con navegador
+                for lookup in (args.lookups.split(',') if engine != 'http' else ['cascade']):
+                    result = run_case(case, engine, lookup)
+                    problems = check_result(case, result)
+                    failures += bool(problems)
+                    results.append(dict(result, case=case.name, engine=engine, lookup=lookup, problems=problems))
+                    icon = '✅' if not problems else '❌'
+                    print(f"{icon} {case.name:<24} {engine:<9} {lookup:<8} {result['duration_s']:>5.1f}s"
+                          f"{'  ' + '; '.join(problems) if problems else ''}", flush=True)
+            if args.sweep:
+                rows = run_sweep(case, 'selenium', work_dir)
+                print_sweep(case.name, rows)
+                problems = sweep_problems(rows)
+                for problem in problems:
+                    print(f"❌ {case.name}: {problem}")
+                failures += len(problems)
+                results.append({'case': case.name, 'sweep': rows, 'problems': problems})
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"\n{'✅' if not failures else '❌'} {len(results)} casos, {failures} con problemas (trazas en {work_dir})")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
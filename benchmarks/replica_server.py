@@ -0,0 +1,105 @@
+# benchmarks/replica_server.py
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+REPLICA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'form_replica')
+
+# Ruta dentro de cada variante -> archivo servido
+PAGES = {
+    'viewform': 'section1.html',
+    'section2': 'section2.html',
+}
+
+
+class ReplicaHandler(BaseHTTPRequestHandler):
+    """Sirve /<variante>/viewform, /<variante>/section2 y /<variante>/formResponse
+
+    Un POST con continue (el 'Siguiente' de la variante multisection) responde la
+    sección 2 en /formResponse, como Google; el resto es un envío.
+    """
+
+    def log_message(self, format, *args):
+        pass  # Sin ruido en la salida del benchmark
+
+    def send_file(self, path, status=200):
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            self.send_error(404)
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self):
+        parts = [p for p in urlsplit(self.path).path.split('/') if p]
+        if len(parts) != 2:
+            return None, None
+        return parts[0], parts[1]
+
+    def do_GET(self):
+        variant, page = self.route()
+        if page == 'formResponse':
+            self.send_file(os.path.join(self.server.replica_dir, 'confirmation.html'))
+        elif page in PAGES:
+            self.send_file(os.path.join(self.server.replica_dir, variant, PAGES[page]))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        variant, page = self.route()
+        if page != 'formResponse':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        fields = parse_qs(self.rfile.read(length).decode('utf-8'))
+        if 'continue' in fields:
+            self.send_file(os.path.join(self.server.replica_dir, variant, PAGES['section2']))
+            return
+        time.sleep(self.server.submit_delay)  # Google no responde el envío al instante
+        with self.server.lock:
+            self.server.submissions.append({'variant': variant, 'fields': fields})
+        self.send_file(os.path.join(self.server.replica_dir, 'confirmation.html'))
+
+
+class ReplicaServer:
+    """Servidor HTTP local de la réplica del formulario, en un hilo aparte"""
+
+    def __init__(self, replica_dir=REPLICA_DIR, host='127.0.0.1', port=0, handler=ReplicaHandler, submit_delay=0):
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.replica_dir = replica_dir
+        self.httpd.submit_delay = submit_delay
+        self.httpd.submissions = []
+        self.httpd.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def submissions(self):
+        return self.httpd.submissions
+
+    def form_url(self, variant):
+        return f"{self.base_url}/{variant}/viewform"
+
+    def variants(self):
+        return sorted(d for d in os.listdir(self.httpd.replica_dir)
+                      if os.path.isdir(os.path.join(self.httpd.replica_dir, d)))
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='replica-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,525 @@
+# form_async_engine.py
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+from form_batch import DEFAULT_REPORT_PATH, BatchRunner
+from form_chrome import ChromeArguments, ChromeLaunchProfile
+from form_locators import (
+    CONFIRMATION_STATE_SCRIPT,
+    NAVIGATED_STATE_SCRIPT,
+    DNI_STRATEGIES,
+    DROPDOWN_STRATEGIES,
+    EMAIL_STRATEGIES,
+    NEXT_STRATEGIES,
+    SUBMIT_STRATEGIES,
+)
+from form_option_index import OPTION_INDEXES, OPTIONS_SCRIPT, SELECT_OPTION_SCRIPT
+from form_roster import missing_fields
+from form_trace import RunTrace
+from form_verification import CONFIRMATION_SELECTORS, ERROR_SELECTORS, VERIFY_SUBMISSION_SCRIPT, classify
+
+# Clave W3C para referencias a elementos
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+LAST_TEXT_INPUT_SCRIPT = """
+const inputs = Array.from(document.querySelectorAll('input[type="text"]'));
+return inputs.length ? inputs[inputs.length - 1] : null;
+"""
+
+
+class AsyncWebDriverError(Exception):
+    """Error devuelto por chromedriver"""
+
+    def __init__(self, error, message=''):
+        super().__init__(f"{error}: {message}")
+        self.error = error
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def decode_chunked(body):
+    decoded = b''
+    while body:
+        size_line, _, body = body.partition(b'\r\n')
+        size = int(size_line.split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        decoded += body[:size]
+        body = body[size + 2:]
+    return decoded
+
+
+class AsyncChromeDriver:
+    """Cliente WebDriver W3C mínimo sobre asyncio, sin dependencias extra
+
+    Lanza su propio chromedriver y le habla HTTP con asyncio.open_connection,
+    así ninguna espera bloquea el event loop.
+    """
+
+    def __init__(self, chromedriver=None, host='127.0.0.1', command_timeout=30):
+        self.chromedriver = chromedriver or os.environ.get('CHROMEDRIVER', 'chromedriver')
+        self.host = host
+        self.command_timeout = command_timeout
+        self.port = None
+        self.process = None
+        self.session_id = None
+        self.slot = None
+
+    async def start(self, capabilities, startup_timeout=20):
+        self.port = free_port()
+        self.process = await asyncio.create_subprocess_exec(
+            self.chromedriver, f"--port={self.port}",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                status = await self.http('GET', '/status')
+                if status.get('value', {}).get('ready'):
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                await self.quit()
+                raise AsyncWebDriverError('timeout', f"chromedriver no respondió en {startup_timeout}s")
+            await asyncio.sleep(0.05)
+        response = await self.http('POST', '/session', {'capabilities': {'alwaysMatch': capabilities}})
+        self.session_id = response['value']['sessionId']
+
+    async def http(self, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = (
+                f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode('ascii') + body)
+            await writer.drain()
+            raw = await asyncio.wait_for(reader.read(), self.command_timeout)
+        finally:
+            writer.close()
+        head, _, content = raw.partition(b'\r\n\r\n')
+        if b'transfer-encoding: chunked' in head.lower():
+            content = decode_chunked(content)
+        data = json.loads(content or b'{}')
+        value = data.get('value')
+        if isinstance(value, dict) and value.get('error'):
+            raise AsyncWebDriverError(value['error'], value.get('message', ''))
+        return data
+
+    async def command(self, method, path, payload=None):
+        response = await self.http(method, f"/session/{self.session_id}{path}", payload)
+        return response.get('value')
+
+    @staticmethod
+    def ref(element):
+        return {ELEMENT_KEY: element}
+
+    async def get(self, url):
+        await self.command('POST', '/url', {'url': url})
+
+    async def execute(self, script, *args):
+        return await self.command('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def execute_cdp(self, cmd, params):
+        return await self.command('POST', '/goog/cdp/execute', {'cmd': cmd, 'params': params})
+
+    async def find_element(self, using, value):
+        """Primer elemento que coincide o None (sin espera implícita)"""
+        elements = await self.command('POST', '/elements', {'using': using, 'value': value})
+        return elements[0][ELEMENT_KEY] if elements else None
+
+    async def is_clickable(self, element):
+        try:
+            return (await self.command('GET', f"/element/{element}/displayed")
+                    and await self.command('GET', f"/element/{element}/enabled"))
+        except AsyncWebDriverError:
+            return False
+
+    async def is_stale(self, element):
+        try:
+            return not await self.execute("return arguments[0].isConnected;", self.ref(element))
+        except AsyncWebDriverError as e:
+            return 'stale' in e.error
+
+    async def tag_name(self, element):
+        return (await self.command('GET', f"/element/{element}/name") or '').lower()
+
+    async def type_text(self, element, text):
+        await self.command('POST', f"/element/{element}/clear", {})
+        await self.command('POST', f"/element/{element}/value", {'text': text})
+
+    async def click(self, element):
+        await self.execute("arguments[0].click();", self.ref(element))
+
+    async def is_alive(self):
+        try:
+            return await self.execute("return 1;") == 1
+        except (OSError, AsyncWebDriverError, asyncio.TimeoutError):
+            return False
+
+    async def quit(self):
+        if self.session_id:
+            try:
+                await self.http('DELETE', f"/session/{self.session_id}")
+            except (OSError, AsyncWebDriverError, asyncio.TimeoutError, ValueError):
+                pass
+            self.session_id = None
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        self.process = None
+
+
+async def start_chrome(slot=None):
+    """Lanza un Chrome con las mismas opciones que el motor Selenium"""
+    profile = ChromeLaunchProfile.from_env()
+    chrome_options = ChromeArguments()
+    profile.apply(chrome_options, slot)
+    capabilities = chrome_options.to_capabilities()
+    capabilities['timeouts'] = {'implicit': 0, 'pageLoad': 30000, 'script': 30000}
+
+    driver = AsyncChromeDriver()
+    driver.slot = slot
+    await driver.start(capabilities)
+    await driver.execute("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    if profile.blocked_urls:
+        await driver.execute_cdp('Network.enable', {})
+        await driver.execute_cdp('Network.setBlockedURLs', {'urls': profile.blocked_urls})
+    logging.info(f"✅ Chrome asyncio listo ({slot or 'default'})")
+    return driver
+
+
+class AsyncFormFlow:
+    """Los pasos de fill_form_step_by_step con esperas que no bloquean el event loop"""
+
+    def __init__(self, driver, form_url, email, nombre, dni, trace=None, poll=0.1):
+        self.driver = driver
+        self.form_url = form_url
+        self.email = email
+        self.nombre = nombre
+        self.dni = dni
+        self.trace = trace or RunTrace()
+        self.poll = poll
+        self.last_error = None
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False  # El error depende de los datos (no conviene reintentar)
+
+    async def wait_until(self, probe, timeout):
+        """Repite probe() hasta que devuelva algo distinto de None/False"""
+        deadline = time.monotonic() + timeout
+        while True:
+            result = await probe()
+            if result:
+                return result
+            if time.monotonic() > deadline:
+                return None
+            await asyncio.sleep(self.poll)
+
+    async def find_clickable(self, field, strategies, timeout):
+        """Prueba todas las estrategias en cada vuelta con un único deadline"""
+        start = time.monotonic()
+
+        async def probe():
+            for index, (using, value) in enumerate(strategies):
+                element = await self.driver.find_element(using, value)
+                if element and await self.driver.is_clickable(element):
+                    return element, index
+            return None
+
+        found = await self.wait_until(probe, timeout)
+        self.trace.event('strategy', field, step=self.trace.current_step and self.trace.current_step[0],
+                         index=found[1] + 1 if found else None, outcome='hit' if found else 'miss',
+                         duration_s=round(time.monotonic() - start, 4))
+        return found[0] if found else None
+
+    async def submit_state(self, submit_button):
+        """Estado después del click en 'Enviar' (ver CONFIRMATION_STATE_SCRIPT)"""
+        try:
+            return await self.driver.execute(CONFIRMATION_STATE_SCRIPT, self.driver.ref(submit_button))
+        except AsyncWebDriverError as e:
+            if 'stale' not in e.error:
+                raise
+            return await self.driver.execute(NAVIGATED_STATE_SCRIPT)
+
+    async def document_ready(self, timeout=15):
+        return await self.wait_until(
+            lambda: self.driver.execute("return document.readyState === 'complete';"), timeout)
+
+    def fail(self, message):
+        logging.error(f"❌ {message}")
+        self.last_error = message
+        self.trace.end_step('failed', error=message)
+        return False
+
+    async def run(self):
+        self.trace.begin_step('carga')
+        await self.driver.get(self.form_url)
+        await self.document_ready()
+
+        self.trace.begin_step('email')
+        email_field = await self.find_clickable('email', EMAIL_STRATEGIES, 8)
+        if not email_field:
+            return self.fail("No se pudo encontrar el campo de email")
+        await self.driver.type_text(email_field, self.email)
+
+        self.trace.begin_step('siguiente')
+        next_button = await self.find_clickable('next', NEXT_STRATEGIES, 5)
+        if not next_button:
+            return self.fail("No se encontró el botón 'Siguiente'")
+        await self.driver.click(next_button)
+        await self.wait_until(lambda: self.driver.is_stale(next_button), 15)
+        await self.document_ready()
+
+        self.trace.begin_step('nombre')
+        dropdown = await self.find_clickable('dropdown', DROPDOWN_STRATEGIES, 8)
+        if not dropdown:
+            return self.fail("No se encontró el dropdown de nombres")
+        if await self.driver.tag_name(dropdown) != 'select':
+            await self.driver.click(dropdown)
+        options = await self.wait_until(lambda: self.driver.execute(OPTIONS_SCRIPT, self.driver.ref(dropdown)), 10)
+        if not options:
+            return self.fail("No se pudieron leer las opciones del dropdown")
+        match = OPTION_INDEXES.build(f"{self.form_url}#nombre", options).resolve(self.nombre)  # Misma clave que Selenium
+        self.trace.event('option', match.reason, wanted=self.nombre, option=match.option,
+                         candidates=match.candidates, suggestions=match.suggestions)
+        if match.option is None:
+            self.permanent = True
+            return self.fail(f"No se pudo elegir el nombre en el dropdown: {match.describe()}")
+        state = await self.driver.execute(SELECT_OPTION_SCRIPT, self.driver.ref(dropdown), match.option)
+        if state != 'ok':
+            return self.fail(f"No se encontró la opción '{match.option}' en el dropdown")
+
+        self.trace.begin_step('dni')
+        dni_field = await self.find_clickable('dni', DNI_STRATEGIES, 8)
+        if not dni_field:
+            last_input = await self.driver.execute(LAST_TEXT_INPUT_SCRIPT)
+            dni_field = last_input[ELEMENT_KEY] if last_input else None
+        if not dni_field:
+            return self.fail("No se pudo encontrar el campo de DNI")
+        await self.driver.type_text(dni_field, self.dni)
+
+        self.trace.begin_step('enviar')
+        submit_button = await self.find_clickable('submit', SUBMIT_STRATEGIES, 8)
+        if not submit_button:
+            return self.fail("No se encontró el botón 'Enviar'")
+        # Se marca antes del click: si el comando se corta a mitad de camino no se reenvía
+        self.submitted = True
+        self.trace.event('submit', 'click')
+        await self.driver.click(submit_button)
+        state = await self.wait_until(lambda: self.submit_state(submit_button), 15)
+        evidence = await self.driver.execute(VERIFY_SUBMISSION_SCRIPT, CONFIRMATION_SELECTORS, ERROR_SELECTORS) or {}
+        verification = classify(dict(evidence, page=state))
+        self.verification = verification
+        self.trace.event('verify', verification.state, reason=verification.reason, evidence=verification.evidence)
+        if verification.state == 'rejected':
+            self.submitted = False  # Google no registró la respuesta: se puede reintentar
+            self.permanent = verification.permanent
+            return self.fail(f"Google rechazó el envío: {verification.describe()}")
+        if not verification.confirmed:
+            return self.fail(f"No se pudo confirmar el envío: {verification.describe()}")
+        self.confirmed = True
+        logging.info(f"🎉 ¡FORMULARIO ENVIADO! ({self.nombre}, {verification.reason})")
+        return True
+
+
+class FormRateLimiter:
+    """Espaciado mínimo entre envíos al mismo formulario (evita el throttling de Google)"""
+
+    def __init__(self, per_minute=None):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_slot = {}
+        self.lock = asyncio.Lock()
+
+    async def wait(self, form_url):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(form_url, now))
+            self.next_slot[form_url] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def submit_once(driver, form_url, email, nombre, dni, prefix='', listener=None):
+    """Un envío sobre un driver ya iniciado; devuelve (éxito, flujo)
+
+    El flujo trae last_error, submitted, confirmed, verification y la traza.
+    """
+    trace = RunTrace.start(f"{prefix}async_")
+    trace.listener = listener
+    flow = AsyncFormFlow(driver, form_url, email, nombre, dni, trace)
+    try:
+        success = await flow.run()
+    except Exception as e:
+        logging.error(f"💥 ERROR CRÍTICO durante la automatización: {e}")
+        success = flow.fail(f"Error crítico: {type(e).__name__}: {e}")
+    trace.finish('ok' if success else 'failed', error=flow.last_error)
+    return success, flow
+
+
+class AsyncBatchRunner(BatchRunner):
+    """Modo batch sobre un único event loop
+
+    workers es la cantidad de Chromes abiertos; concurrency limita los envíos
+    simultáneos (como mucho uno por Chrome, cada envío usa el navegador entero)
+    y rate_per_minute espacia los envíos al mismo formulario.
+    """
+
+    def __init__(self, form_url, rows, workers=2, report_path=DEFAULT_REPORT_PATH,
+                 concurrency=None, rate_per_minute=None):
+        if concurrency and concurrency > workers:
+            raise ValueError(f"--concurrency ({concurrency}) no puede superar a --workers ({workers}): "
+                             "cada envío simultáneo necesita su propio navegador")
+        super().__init__(form_url, rows, workers=workers, report_path=report_path, engine='async')
+        self.concurrency = concurrency or self.workers
+        self.rate_per_minute = rate_per_minute
+
+    def run(self):
+        return asyncio.run(self.run_async())
+
+    async def run_row_async(self, driver, row):
+        result = self.new_result(row, driver.slot)
+        start = time.monotonic()
+        success, flow = await submit_once(driver, self.form_url, row['email'], row['nombre'], row['dni'],
+                                          prefix=f"row{row['row']:04d}_")
+        result['status'] = 'ok' if success else 'failed'
+        result['error'] = flow.last_error
+        result['verification'] = flow.verification.state if flow.verification else None
+        result['duration_s'] = round(time.monotonic() - start, 2)
+        return result
+
+    async def run_async(self):
+        logging.info(f"🤖 === MODO BATCH ASYNC: {len(self.rows)} filas, {self.workers} navegadores, "
+                     f"{self.concurrency} envíos simultáneos ===")
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        rate_limiter = FormRateLimiter(self.rate_per_minute)
+        pool = asyncio.Queue()
+        drivers = []
+
+        async def process(row):
+            missing = missing_fields(row)
+            if missing:
+                result = self.new_result(row, None)
+                result['status'] = 'invalid'
+                result['error'] = f"Faltan campos: {', '.join(missing)}"
+                self.record(result)
+                return
+            async with semaphore:
+                await rate_limiter.wait(self.form_url)
+                driver = await pool.get()
+                if isinstance(driver, str):
+                    # El navegador de este lugar se cayó: lo reinicia la fila que lo toma
+                    try:
+                        driver = await restart(driver)
+                    except Exception as e:
+                        result = self.new_result(row, driver)
+                        result['error'] = f"No se pudo reiniciar el navegador: {type(e).__name__}: {e}"
+                        logging.error(f"💥 [{driver}] Fila {row['row']}: {result['error']}")
+                        self.record(result)
+                        pool.put_nowait(driver)  # La próxima fila lo vuelve a intentar
+                        return
+                try:
+                    self.record(await self.run_row_async(driver, row))
+                finally:
+                    if not await driver.is_alive():
+                        logging.warning(f"♻️ [{driver.slot}] Navegador no responde, se reinicia")
+                        await driver.quit()
+                        drivers.remove(driver)
+                        driver = driver.slot
+                    pool.put_nowait(driver)
+
+        async def restart(slot):
+            driver = await start_chrome(slot)
+            drivers.append(driver)
+            return driver
+
+        try:
+            started = await asyncio.gather(*(start_chrome(f"worker-{i}") for i in range(1, self.workers + 1)),
+                                           return_exceptions=True)
+            drivers.extend(driver for driver in started if not isinstance(driver, BaseException))
+            errors = [error for error in started if isinstance(error, BaseException)]
+            if errors:
+                raise errors[0]  # El finally cierra los Chromes que sí arrancaron
+            for driver in drivers:
+                pool.put_nowait(driver)
+            await asyncio.gather(*(process(row) for row in self.rows))
+        finally:
+            await asyncio.gather(*(driver.quit() for driver in drivers))
+
+        self.results.sort(key=lambda r: r['row'])
+        self.write_report(time.monotonic() - start)
+        return self.results
+
+
+class AsyncFormAutomator:
+    """Envío individual con el motor asyncio (misma interfaz que GitHubFormAutomator)"""
+
+    def __init__(self, form_url, email, nombre, dni):
+        self.form_url = form_url
+        self.email = email
+        self.nombre = nombre
+        self.dni = dni
+        self.screenshot_prefix = ''
+        self.chrome_slot = None
+        self.last_error = None
+        self.trace = None
+        self.trace_listener = None
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False
+
+    def set_identity(self, email, nombre, dni, row=None):
+        self.email = email
+        self.nombre = nombre
+        self.dni = dni
+        self.last_error = None
+
+    def is_driver_alive(self):
+        return True
+
+    def close(self):
+        pass
+
+    async def fill_async(self):
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False
+        driver = await start_chrome(self.chrome_slot)
+        try:
+            success, flow = await submit_once(driver, self.form_url, self.email, self.nombre,
+                                              self.dni, self.screenshot_prefix, self.trace_listener)
+            self.last_error = flow.last_error
+            self.trace = flow.trace
+            self.submitted = flow.submitted
+            self.confirmed = flow.confirmed
+            self.verification = flow.verification
+            self.permanent = flow.permanent
+            return success
+        finally:
+            await driver.quit()
+
+    def fill_form_step_by_step(self, keep_browser=False):
+        # Cada llamada usa su propio event loop, así que el navegador no se reutiliza
+        return asyncio.run(self.fill_async())
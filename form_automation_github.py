@@ -1,488 +1,318 @@
 # form_automation_github.py
+import argparse
 import os
-import time
 import logging
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.keys import Keys # Importar Keys para simular teclas
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+# Solo módulos livianos: cada motor (selenium, requests, asyncio) se importa al elegirlo
+from form_capture import CAPTURE_POLICIES
+from form_config import BROWSER_ENGINES, ENGINES, LOOKUP_MODES, lookup_mode_from_env, resolve_identity
+from form_locator_cache import LocatorCache
+from form_resources import ResourceGovernor
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class GitHubFormAutomator:
-    def __init__(self):
-        # Obtener datos desde variables de entorno (GitHub Secrets)
-        self.form_url = os.environ.get('FORM_URL')
-        self.email = os.environ.get('EMAIL')
-        self.nombre = os.environ.get('NOMBRE')
-        self.dni = os.environ.get('DNI')
-        
-        # Verificar que todas las variables estén configuradas
-        if not all([self.form_url, self.email, self.nombre, self.dni]):
-            missing = []
-            if not self.form_url: missing.append('FORM_URL')
-            if not self.email: missing.append('EMAIL')
-            if not self.nombre: missing.append('NOMBRE')
-            if not self.dni: missing.append('DNI')
-            raise ValueError(f"Faltan estas variables de entorno: {', '.join(missing)}")
-        
-        self.driver = None
-        logging.info(f"✅ Configuración cargada - Email: {self.email}, Nombre: {self.nombre}")
-        
-    def setup_chrome_driver(self):
-        """Configura Chrome para GitHub Actions"""
-        chrome_options = Options()
-        
-        # Opciones necesarias para GitHub Actions
-        chrome_options.add_argument("--headless")  # Sin interfaz gráfica
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        
-        # Opciones anti-detección
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Inicializar driver
-        service = Service()  # ChromeDriver se instala automáticamente
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Configurar timeouts
-        self.driver.implicitly_wait(10)
-        self.driver.set_page_load_timeout(30)
-        
-        # Ocultar propiedades de webdriver
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        logging.info("✅ Chrome configurado correctamente")
-        
-    def take_screenshot(self, name):
-        """Toma screenshot para debugging"""
-        try:
-            filename = f"/tmp/form_{name}.png"
-            self.driver.save_screenshot(filename)
-            logging.info(f"📸 Screenshot guardado: {filename}")
-        except Exception as e:
-            logging.error(f"❌ Error al tomar screenshot: {e}")
-            
-    def wait_and_find_element(self, by, value, timeout=15, screenshot_name=None):
-        """Busca un elemento con timeout y manejo de errores"""
-        try:
-            logging.info(f"🔍 Buscando elemento: {value}")
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((by, value))
-            )
-            logging.info(f"✅ Elemento encontrado: {value}")
-            return element
-        except Exception as e:
-            logging.error(f"❌ No se encontró elemento {value}: {e}")
-            if screenshot_name:
-                self.take_screenshot(f"error_{screenshot_name}")
-            return None
-            
-    def type_like_human(self, element, text, delay=0.1):
-        """Escribe texto simulando comportamiento humano"""
-        element.clear()
-        time.sleep(0.5)
-        
-        for char in text:
-            element.send_keys(char)
-            time.sleep(delay + (hash(char) % 50) / 1000)  # Variación aleatoria
-            
-        logging.info(f"✍️ Texto ingresado: {text}")
-        
-    def fill_form_step_by_step(self):
-        """Llena el formulario paso a paso con logging detallado"""
-        try:
-            logging.info("🚀 === INICIANDO AUTOMATIZACIÓN ===")
-            logging.info(f"🌐 URL del formulario: {self.form_url}")
-            
-            # Configurar navegador
-            self.setup_chrome_driver()
-            
-            # Ir al formulario
-            logging.info("📄 Navegando al formulario...")
-            self.driver.get(self.form_url)
-            time.sleep(5)  # Esperar carga inicial
-            
-            # Screenshot inicial
-            self.take_screenshot("01_inicial")
-            logging.info("✅ Formulario cargado")
-            
-            # === SECCIÓN 1: EMAIL ===
-            logging.info("\n📧 === PASO 1: LLENAR EMAIL ===")
-            
-            # Buscar campo de email con múltiples estrategias
-            email_field = None
-            email_strategies = [
-                (By.CSS_SELECTOR, 'input[type="email"]'),
-                (By.CSS_SELECTOR, 'input[aria-label*="email" i]'),
-                (By.CSS_SELECTOR, 'input[aria-label*="correo" i]'),
-                (By.CSS_SELECTOR, 'input[name*="email" i]'),
-                (By.XPATH, '//input[contains(@aria-label, "email") or contains(@aria-label, "correo") or contains(@aria-label, "Email") or contains(@aria-label, "Correo")]'),
-                (By.XPATH, '//input[@type="text" or @type="email"][1]'),  # Primer campo de texto
-            ]
-            
-            for i, (by, selector) in enumerate(email_strategies, 1):
-                try:
-                    logging.info(f"🔍 Estrategia {i}: {selector}")
-                    email_field = WebDriverWait(self.driver, 8).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    logging.info(f"✅ Campo email encontrado con estrategia {i}")
-                    break
-                except:
-                    logging.info(f"❌ Estrategia {i} falló")
-                    continue
-            
-            if not email_field:
-                logging.error("❌ No se pudo encontrar el campo de email")
-                self.take_screenshot("error_no_email_field")
-                return False
-            
-            # Llenar email
-            logging.info(f"✍️ Llenando email: {self.email}")
-            self.type_like_human(email_field, self.email)
-            time.sleep(2)
-            
-            self.take_screenshot("02_email_filled")
-            
-            # Buscar botón "Siguiente"
-            logging.info("🔍 Buscando botón 'Siguiente'...")
-            next_button = None
-            next_strategies = [
-                (By.XPATH, '//span[contains(text(), "Siguiente")]/../..'),
-                (By.XPATH, '//span[contains(text(), "Next")]/../..'),
-                (By.XPATH, '//div[@role="button" and contains(., "Siguiente")]'),
-                (By.XPATH, '//button[contains(., "Siguiente")]'),
-                (By.XPATH, '//*[contains(text(), "Siguiente")]/ancestor::*[@role="button" or @type="button" or contains(@class, "button")]'),
-            ]
-            
-            for i, (by, selector) in enumerate(next_strategies, 1):
-                try:
-                    logging.info(f"🔍 Estrategia botón {i}: buscando 'Siguiente'")
-                    next_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    logging.info(f"✅ Botón 'Siguiente' encontrado con estrategia {i}")
-                    break
-                except:
-                    logging.info(f"❌ Estrategia botón {i} falló")
-                    continue
-            
-            if not next_button:
-                logging.error("❌ No se encontró el botón 'Siguiente'")
-                self.take_screenshot("error_no_next_button")
-                return False
-            
-            # Click en "Siguiente"
-            logging.info("👆 Haciendo click en 'Siguiente'...")
-            self.driver.execute_script("arguments[0].click();", next_button)
-            time.sleep(4)  # Esperar carga de siguiente sección
-            
-            self.take_screenshot("03_after_next")
-            logging.info("✅ Primera sección completada")
-            
-            # === SECCIÓN 2: NOMBRE Y DNI ===
-            logging.info("\n👤 === PASO 2: SELECCIONAR NOMBRE ===")
-            
-            # Buscar dropdown de nombres
-            dropdown = None
-            dropdown_strategies = [
-                (By.CSS_SELECTOR, 'select'),
-                (By.CSS_SELECTOR, 'div[role="listbox"]'),
-                (By.CSS_SELECTOR, 'div[role="combobox"]'),
-                (By.CSS_SELECTOR, 'div[aria-haspopup="listbox"]'),
-                (By.XPATH, '//div[contains(@class, "dropdown") or contains(@class, "select")]'),
-            ]
-            
-            for i, (by, selector) in enumerate(dropdown_strategies, 1):
-                try:
-                    logging.info(f"🔍 Estrategia dropdown {i}: {selector}")
-                    dropdown = WebDriverWait(self.driver, 8).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    logging.info(f"✅ Dropdown encontrado con estrategia {i}")
-                    break
-                except:
-                    logging.info(f"❌ Estrategia dropdown {i} falló")
-                    continue
-            
-            if not dropdown:
-                logging.error("❌ No se encontró el dropdown de nombres")
-                self.take_screenshot("error_no_dropdown")
-                return False
-            
-            # Seleccionar nombre del dropdown
-            logging.info(f"👆 Seleccionando nombre: {self.nombre}")
-            
-            if dropdown.tag_name.lower() == 'select':
-                # Dropdown HTML estándar
-                try:
-                    select = Select(dropdown)
-                    select.select_by_visible_text(self.nombre)
-                    logging.info("✅ Nombre seleccionado en dropdown estándar")
-                except Exception as e:
-                    logging.error(f"❌ Error al seleccionar en dropdown estándar: {e}")
-                    return False
-            else:
-                # Dropdown personalizado de Google Forms
-                try:
-                    # Abrir dropdown
-                    self.driver.execute_script("arguments[0].click();", dropdown)
-                    time.sleep(2) # Espera inicial para que el dropdown se abra
-
-                    self.take_screenshot("04_dropdown_opened")
-                    
-                    option_found = False
-                    
-                    # Estrategia principal: Encontrar el campo de texto de búsqueda dentro del dropdown
-                    # y luego la opción exacta.
-                    try:
-                        # Buscar el input o div que actúa como campo de texto de búsqueda dentro del dropdown.
-                        # Este XPath intenta ser genérico para inputs de texto dentro de un listbox/combobox.
-                        # También considera divs con role="combobox" que son contenteditable.
-                        search_input_field = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, 
-                                '//div[@role="listbox"]//input[@type="text"] | '
-                                '//div[@role="listbox"]//div[@role="combobox" and @aria-expanded="true"] | '
-                                '//div[@role="listbox"]//div[@data-initial-value] | ' # Otro patrón común en GForms
-                                '//input[@type="text" and @aria-label="Your answer"]' # Patrón común para campos de texto
-                            ))
-                        )
-                        
-                        logging.info(f"🔍 Campo de búsqueda del dropdown encontrado. Tipo de elemento: {search_input_field.tag_name}. Intentando enviar teclas: '{self.nombre.strip()}'")
-                        
-                        # Limpiar el campo antes de escribir (si es un input)
-                        if search_input_field.tag_name.lower() == 'input':
-                            search_input_field.clear()
-                        
-                        # Enviar el nombre
-                        self.type_like_human(search_input_field, self.nombre.strip())
-                        time.sleep(1) # Pequeña espera para que las sugerencias se filtren/aparezcan
-                        
-                        # Ahora, buscar y hacer clic en la opción que coincide exactamente
-                        # Usamos un XPath que busca el div[role="option"] que contiene el span con el texto exacto
-                        # Esto es más robusto que solo buscar el span directamente.
-                        exact_option_xpath = f'//div[@role="option"]//span[normalize-space(text())="{self.nombre.strip()}"]/ancestor::div[@role="option"][1]'
-                        
-                        logging.info(f"🔍 Buscando opción exacta por texto después de filtrar: {exact_option_xpath}")
-                        exact_option_element = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, exact_option_xpath))
-                        )
-                        
-                        self.driver.execute_script("arguments[0].click();", exact_option_element)
-                        logging.info(f"✅ Opción '{self.nombre}' seleccionada exitosamente después de enviar teclas y hacer clic en la sugerencia.")
-                        option_found = True
-
-                    except (TimeoutException, NoSuchElementException) as e:
-                        logging.warning(f"⚠️ Falló la estrategia principal (enviar teclas y clic en sugerencia). Error: {type(e).__name__}: {e}")
-                        
-                    if not option_found:
-                        # Fallback a la estrategia de data-value si la estrategia principal falla
-                        try:
-                            logging.info(f"🔍 Fallback: Intentando seleccionar por data-value: '{self.nombre.strip()}'")
-                            option_element = WebDriverWait(self.driver, 10).until(
-                                EC.element_to_be_clickable((By.XPATH, f'//div[@role="option" and @data-value="{self.nombre.strip()}"]'))
-                            )
-                            self.driver.execute_script("arguments[0].click();", option_element)
-                            logging.info(f"✅ Fallback: Opción '{self.nombre}' seleccionada usando data-value.")
-                            option_found = True
-                        except (TimeoutException, NoSuchElementException) as e:
-                            logging.info(f"❌ Fallback: No se encontró la opción por data-value ('{self.nombre.strip()}'). Error: {type(e).__name__}: {e}")
-                            
-                            # Último fallback a la búsqueda por texto visible (con normalización)
-                            target_name_normalized_for_text = self.nombre.strip().lower() 
-                            
-                            WebDriverWait(self.driver, 10).until(
-                                EC.visibility_of_element_located((By.XPATH, '//div[@role="option"]'))
-                            )
-                            
-                            possible_options_spans = self.driver.find_elements(By.XPATH, 
-                                '//div[@role="option"]//span'
-                            )
-                            
-                            logging.info(f"🔍 Fallback: Encontradas {len(possible_options_spans)} posibles spans de opciones para búsqueda por texto.")
-
-                            for option_span in possible_options_spans:
-                                try:
-                                    option_text = option_span.text.strip()
-                                    option_text_normalized = option_text.lower()
-
-                                    logging.info(f"   Fallback: Comparando opción extraída: '{option_text_normalized}' con '{target_name_normalized_for_text}'")
-                                    
-                                    if option_text_normalized == target_name_normalized_for_text:
-                                        parent_div = option_span.find_element(By.XPATH, './ancestor::div[@role="option"][1]')
-                                        WebDriverWait(self.driver, 5).until(
-                                            EC.visibility_of(parent_div)
-                                        )
-                                        WebDriverWait(self.driver, 5).until(
-                                            EC.element_to_be_clickable(parent_div)
-                                        )
-                                        self.driver.execute_script("arguments[0].click();", parent_div)
-                                        logging.info(f"✅ Fallback: Opción '{self.nombre}' seleccionada usando texto visible.")
-                                        option_found = True
-                                        break
-                                except Exception as e:
-                                    logging.warning(f"⚠️ Fallback: Error al procesar una opción o no cliqueable (búsqueda por texto): {e}")
-                                    continue
-                    
-                    if not option_found:
-                        logging.error(f"❌ No se encontró la opción '{self.nombre}' en el dropdown después de revisar todas las posibles opciones.")
-                        self.take_screenshot("error_option_not_found")
-                        return False
-                        
-                except Exception as e:
-                    logging.error(f"❌ Error al manejar dropdown personalizado: {e}")
-                    self.take_screenshot("error_dropdown_handling")
-                    return False
-            
-            time.sleep(2)
-            self.take_screenshot("05_name_selected")
-            
-            # === PASO 3: DNI ===
-            logging.info("\n🆔 === PASO 3: LLENAR DNI ===")
-            
-            # Buscar campo de DNI
-            dni_field = None
-            dni_strategies = [
-                (By.CSS_SELECTOR, 'input[aria-label*="dni" i]'),
-                (By.CSS_SELECTOR, 'input[aria-label*="DNI"]'),
-                (By.CSS_SELECTOR, 'input[aria-label*="documento" i]'),
-                (By.CSS_SELECTOR, 'input[name*="dni" i]'),
-                (By.CSS_SELECTOR, 'input[name*="document" i]'),
-                (By.XPATH, '//input[contains(@aria-label, "dni") or contains(@aria-label, "DNI") or contains(@aria-label, "documento") or contains(@aria-label, "Documento")]'),
-            ]
-            
-            for i, (by, selector) in enumerate(dni_strategies, 1):
-                try:
-                    logging.info(f"🔍 Estrategia DNI {i}: {selector}")
-                    dni_field = WebDriverWait(self.driver, 8).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    logging.info(f"✅ Campo DNI encontrado con estrategia {i}")
-                    break
-                except:
-                    logging.info(f"❌ Estrategia DNI {i} falló")
-                    continue
-            
-            # Si no encuentra campo específico, usar último campo de texto
-            if not dni_field:
-                try:
-                    logging.info("🔍 Buscando último campo de texto como DNI...")
-                    text_fields = self.driver.find_elements(By.CSS_SELECTOR, 'input[type="text"]')
-                    if text_fields:
-                        dni_field = text_fields[-1]
-                        logging.info("✅ Usando último campo de texto como campo DNI")
-                    else:
-                        # Buscar cualquier input visible
-                        inputs = self.driver.find_elements(By.CSS_SELECTOR, 'input')
-                        visible_inputs = [inp for inp in inputs if inp.is_displayed()]
-                        if visible_inputs:
-                            dni_field = visible_inputs[-1]
-                            logging.info("✅ Usando último input visible como campo DNI")
-                except Exception as e:
-                    logging.error(f"❌ Error buscando campo DNI alternativo: {e}")
-            
-            if not dni_field:
-                logging.error("❌ No se pudo encontrar el campo de DNI")
-                self.take_screenshot("error_no_dni_field")
-                return False
-            
-            # Llenar DNI
-            logging.info(f"✍️ Llenando DNI: {self.dni}")
-            self.type_like_human(dni_field, self.dni)
-            time.sleep(2)
-            
-            self.take_screenshot("06_dni_filled")
-            
-            # === PASO 4: ENVIAR ===
-            logging.info("\n📤 === PASO 4: ENVIAR FORMULARIO ===")
-            
-            # Buscar botón "Enviar"
-            submit_button = None
-            submit_strategies = [
-                (By.XPATH, '//span[contains(text(), "Enviar")]/../..'),
-                (By.XPATH, '//span[contains(text(), "Submit")]/../..'),
-                (By.XPATH, '//div[@role="button" and contains(., "Enviar")]'),
-                (By.XPATH, '//button[contains(., "Enviar")]'),
-                (By.XPATH, '//input[@type="submit"]'),
-                (By.XPATH, '//*[contains(text(), "Enviar")]/ancestor::*[@role="button" or @type="button" or contains(@class, "button")]'),
-            ]
-            
-            for i, (by, selector) in enumerate(submit_strategies, 1):
-                try:
-                    logging.info(f"🔍 Estrategia enviar {i}: buscando 'Enviar'")
-                    submit_button = WebDriverWait(self.driver, 8).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    logging.info(f"✅ Botón 'Enviar' encontrado con estrategia {i}")
-                    break
-                except:
-                    logging.info(f"❌ Estrategia enviar {i} falló")
-                    continue
-            
-            if not submit_button:
-                logging.error("❌ No se encontró el botón 'Enviar'")
-                self.take_screenshot("error_no_submit_button")
-                return False
-            
-            # Click en "Enviar"
-            logging.info("👆 Haciendo click en 'Enviar'...")
-            self.driver.execute_script("arguments[0].click();", submit_button)
-            time.sleep(5)  # Esperar confirmación
-            
-            # Verificar envío exitoso
-            try:
-                # Buscar mensaje de confirmación
-                success_indicators = [
-                    "respuesta se ha registrado",
-                    "response has been recorded",
-                    "gracias",
-                    "thank you",
-                    "enviado",
-                    "submitted"
-                ]
-                
-                page_text = self.driver.page_source.lower()
-                success = any(indicator in page_text for indicator in success_indicators)
-                
-                if success:
-                    logging.info("🎉 ¡FORMULARIO ENVIADO EXITOSAMENTE!")
-                    return True
-                else:
-                    logging.warning("⚠️ No se detectó mensaje de confirmación, pero el envío puede haber sido exitoso")
-                    return True  # Asumir éxito si no hay errores
-                    
-            except Exception as e:
-                logging.error(f"❌ Error verificando envío: {e}")
-                return True  # Asumir éxito si llegamos hasta aquí
-                
-        except Exception as e:
-            logging.error(f"💥 ERROR CRÍTICO durante la automatización: {e}")
-            self.take_screenshot("error_critical")
+def selenium_automator_class():
+    """GitHubFormAutomator, importando selenium recién cuando hace falta"""
+    from form_selenium_engine import GitHubFormAutomator
+
+    return GitHubFormAutomator
+
+def __getattr__(name):
+    # GitHubFormAutomator sigue importándose desde acá sin cargar selenium al arrancar
+    if name == 'GitHubFormAutomator':
+        return selenium_automator_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class FallbackAutomator:
+    """Intenta el envío directo por HTTP y recurre a Selenium si no puede completarlo
+
+    El automatizador Selenium (y el import de selenium) se crea recién cuando
+    el motor HTTP no alcanza o el flujo necesita navegador.
+    """
+
+    def __init__(self, form_url=None, email=None, nombre=None, dni=None):
+        self.form_url, email, nombre, dni = resolve_identity(form_url, email, nombre, dni)
+        lookup_mode_from_env()  # Valida FORM_LOOKUP antes de necesitar Selenium
+        from form_http_engine import GoogleFormHttpAutomator
+
+        self.identity = (email, nombre, dni, None)
+        self.http = GoogleFormHttpAutomator(self.form_url, email, nombre, dni)
+        self._selenium = None
+        self.screenshot_prefix = ''
+        self.chrome_slot = None
+        self.governor = None  # ResourceGovernor del batch: se le pide lugar antes de abrir Chrome
+        self.last_error = None
+        self.trace = None  # Traza del motor que terminó el último envío
+        self.trace_listener = None
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False
+
+    @property
+    def selenium(self):
+        if self._selenium is None:
+            email, nombre, dni, row = self.identity
+            self._selenium = selenium_automator_class()(self.form_url, email, nombre, dni)
+            self._selenium.set_identity(email, nombre, dni, row)
+        return self._selenium
+
+    @property
+    def driver(self):
+        return self._selenium.driver if self._selenium else None
+
+    def set_identity(self, email, nombre, dni, row=None):
+        self.identity = (email, nombre, dni, row)
+        self.http.set_identity(email, nombre, dni, row)
+        if self._selenium:
+            self._selenium.set_identity(email, nombre, dni, row)
+        self.last_error = None
+
+    def is_driver_alive(self):
+        return not self.driver or self._selenium.is_driver_alive()
+
+    def close(self):
+        self.http.close()
+        if self._selenium:
+            self._selenium.close()
+
+    def fill_form_step_by_step(self, keep_browser=False):
+        self.http.trace_listener = self.trace_listener
+        if os.environ.get('FORM_FLOW'):
+            # El motor HTTP solo conoce el formulario de firma; un flujo propio va por Selenium
+            return self.run_selenium(keep_browser)
+        success = self.http.fill_form_step_by_step(keep_browser=True)
+        self.trace = self.http.trace
+        self.submitted = self.http.submitted
+        self.confirmed = self.http.confirmed
+        self.verification = self.http.verification
+        self.permanent = False  # Un error del motor HTTP no es definitivo: Selenium todavía puede completarlo
+        if success:
+            if not keep_browser:
+                self.close()
+            return True
+        if self.http.submitted:
+            # El POST pudo haberse registrado: no arriesgar un envío doble
+            self.last_error = self.http.last_error
+            self.permanent = self.http.permanent
+            if not keep_browser:
+                self.close()
             return False
+        logging.warning(f"↩️ Motor HTTP no disponible ({self.http.last_error}), usando Selenium")
+        return self.run_selenium(keep_browser)
+
+    def run_selenium(self, keep_browser):
+        if self.governor and not self.driver:
+            self.governor.admit(self.chrome_slot)
+        self.selenium.screenshot_prefix = self.screenshot_prefix
+        self.selenium.chrome_slot = self.chrome_slot
+        self.selenium.trace_listener = self.trace_listener
+        success = self.selenium.fill_form_step_by_step(keep_browser=keep_browser)
+        self.trace = self.selenium.trace
+        self.submitted = self.selenium.submitted
+        self.confirmed = self.selenium.confirmed
+        self.verification = self.selenium.verification
+        self.last_error = self.selenium.last_error
+        self.permanent = self.selenium.permanent
+        if not keep_browser:
+            self.http.close()
+        return success
+
+def build_automator(engine='selenium', form_url=None, email=None, nombre=None, dni=None):
+    """Crea el automatizador del motor elegido (auto = HTTP con Selenium de respaldo)
+
+    Los datos se validan antes de importar el motor, así un error de
+    configuración no paga el import de selenium.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconocido: {engine} (opciones: {', '.join(ENGINES)})")
+    if engine == 'auto':
+        return FallbackAutomator(form_url, email, nombre, dni)
+    config = resolve_identity(form_url, email, nombre, dni)
+    if engine == 'selenium':
+        lookup_mode_from_env()
+        return selenium_automator_class()(*config)
+    if engine == 'http':
+        from form_http_engine import GoogleFormHttpAutomator
+
+        return GoogleFormHttpAutomator(*config)
+    from form_async_engine import AsyncFormAutomator
+
+    return AsyncFormAutomator(*config)
+
+def parse_args(argv=None):
+    """Argumentos de línea de comandos (sin argumentos: una persona desde el entorno)"""
+    parser = argparse.ArgumentParser(description="Automatización de firma en Google Forms")
+    parser.add_argument('--engine', choices=ENGINES, default=os.environ.get('FORM_ENGINE', 'auto'),
+                        help="Motor de envío: http directo, selenium, async (asyncio), o auto (http con selenium de respaldo)")
+    parser.add_argument('--pacing', choices=('off', 'fast', 'human'),
+                        help="Ritmo de escritura y pausas entre pasos (por defecto FORM_PACING u off)")
+    parser.add_argument('--capture', choices=CAPTURE_POLICIES,
+                        help="Capturas de depuración: none, on-error (por defecto) o always")
+    parser.add_argument('--lean', action='store_true',
+                        help="Chrome liviano: bloquea imágenes, fuentes, media y analytics")
+    parser.add_argument('--lookup', choices=LOOKUP_MODES,
+                        help="Búsqueda de campos: cascade (una espera por estrategia), js (todas en una llamada) o race (todas con un único plazo)")
+    parser.add_argument('--flow', help="Spec JSON/YAML del flujo del formulario (por defecto FORM_FLOW o flows/default_flow.json)")
+    parser.add_argument('--record', help="Graba la ejecución en un bundle (carpeta) para reproducirla sin red con benchmarks/replay_check.py")
+    parser.add_argument('--clear-locator-cache', action='store_true',
+                        help="Borra la caché de localizadores antes de ejecutar")
+    parser.add_argument('--roster', help="Archivo CSV/JSONL con columnas email, nombre, dni (modo batch)")
+    parser.add_argument('--workers', type=workers_count, default=workers_count(os.environ.get('FORM_BATCH_WORKERS', '2')),
+                        help="Cantidad de navegadores en paralelo para el modo batch, o auto (según la memoria y CPU del host)")
+    parser.add_argument('--governor', action='store_true',
+                        help="Límites de memoria/procesos de Chrome y admisión de sesiones según la memoria libre del host")
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('FORM_ASYNC_CONCURRENCY', '0')) or None,
+                        help="Envíos simultáneos del motor async, como mucho --workers (por defecto uno por navegador)")
+    parser.add_argument('--rate-per-minute', type=float, default=float(os.environ.get('FORM_ASYNC_RATE_PER_MIN', '0')) or None,
+                        help="Máximo de envíos por minuto al mismo formulario en el motor async")
+    parser.add_argument('--job-db', default=os.environ.get('FORM_JOB_DB'),
+                        help="Registro SQLite de envíos: reintenta con backoff, retoma tras un reinicio y no reenvía confirmados")
+    parser.add_argument('--shard', default=os.environ.get('FORM_SHARD'),
+                        help="Procesa solo la parte i/N del roster (hash estable por persona; reporte y registro con sufijo _shardIofN)")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Con --job-db, vuelve a encolar las personas que ya habían agotado sus intentos hoy")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Queda escuchando envíos en una API local con navegadores ya abiertos (--workers navegadores)")
+    parser.add_argument('--port', type=int, help="Puerto de la API del daemon (por defecto FORM_DAEMON_PORT o 8765)")
+    parser.add_argument('--report', default=os.environ.get('FORM_BATCH_REPORT', '/tmp/form_batch_report.json'),
+                        help="Ruta del reporte JSON por fila del modo batch")
+    return parser.parse_args(argv)
+
+def workers_count(value):
+    """Entero positivo o 'auto'"""
+    if str(value).lower() == 'auto':
+        return 'auto'
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"La cantidad de workers debe ser al menos 1 (recibido: {workers})")
+    return workers
+
+def resolve_workers(args, governor):
+    """Con --workers auto usa la concurrencia segura que estima el governor"""
+    if args.workers != 'auto':
+        return args.workers
+    browser = args.engine in BROWSER_ENGINES
+    workers = (governor or ResourceGovernor()).safe_concurrency(browser=browser)
+    logging.info(f"🧮 Workers automáticos: {workers} según {'la memoria y ' if browser else ''}la CPU libre del host")
+    return workers
+
+def run_batch(args):
+    """Ejecuta el modo batch y devuelve True si todas las filas se enviaron
+
+    Con --job-db y sin --roster la única fila es la persona del entorno. Con
+    --shard i/N solo se procesan las personas de ese shard.
+    """
+    from form_batch import BatchRunner
+    from form_roster import load_roster, normalize_row
+
+    form_url = os.environ.get('FORM_URL')
+    if not form_url:
+        raise ValueError("Faltan estas variables de entorno: FORM_URL")
+    if args.roster:
+        rows = load_roster(args.roster)
+    else:
+        rows = [normalize_row({'email': os.environ.get('EMAIL'), 'nombre': os.environ.get('NOMBRE'), 'dni': os.environ.get('DNI')}, 1)]
+    report_path, job_db, shard = args.report, args.job_db, None
+    if args.shard:
+        from form_shard import parse_shard, select_shard, shard_info, shard_path
+
+        index, count = parse_shard(args.shard)
+        total = len(rows)
+        rows = select_shard(rows, index, count)
+        shard = shard_info(index, count, len(rows))
+        report_path = args.report = shard_path(report_path, index, count)  # main lo muestra al final
+        job_db = shard_path(job_db, index, count) if job_db else None
+        logging.info(f"🧩 Shard {index}/{count}: {len(rows)} de {total} filas")
+        if not rows:
+            # Igual se deja el reporte para que el merge no lo tome como un shard caído
+            runner = BatchRunner(form_url, [], report_path=report_path, engine=args.engine)
+            runner.shard = shard
+            runner.write_report(0.0)
+            return True
+    governor = ResourceGovernor.from_env()
+    workers = resolve_workers(args, governor)
+    if job_db:
+        from form_job_store import DurableBatchRunner, JobStore
+
+        store = JobStore.from_env(job_db)
+        try:
+            runner = DurableBatchRunner(form_url, rows, store, workers=workers, report_path=report_path,
+                                        engine=args.engine, governor=governor, retry_failed=args.retry_failed)
+            runner.shard = shard
+            results = runner.run()
         finally:
-            if self.driver:
-                logging.info("🔚 Cerrando navegador...")
-                self.driver.quit()
+            store.close()
+        return all(r['status'] == 'ok' for r in results)
+    if args.engine == 'async':
+        from form_async_engine import AsyncBatchRunner
+
+        runner = AsyncBatchRunner(form_url, rows, workers=workers, report_path=report_path,
+                                  concurrency=args.concurrency, rate_per_minute=args.rate_per_minute)
+    else:
+        runner = BatchRunner(form_url, rows, workers=workers, report_path=report_path, engine=args.engine, governor=governor)
+    runner.shard = shard
+    results = runner.run()
+    if len(results) != len(rows):
+        logging.error(f"❌ El reporte tiene {len(results)} de {len(rows)} filas")
+        return False
+    return all(r['status'] == 'ok' for r in results)
+
+def run_daemon(args):
+    """Levanta el daemon con un pool de navegadores calientes hasta que lo detengan"""
+    from form_daemon import FormDaemon
+
+    form_url = os.environ.get('FORM_URL')
+    if not form_url:
+        raise ValueError("Faltan estas variables de entorno: FORM_URL")
+    workers = resolve_workers(args, ResourceGovernor.from_env())
+    FormDaemon.from_env(form_url, workers=workers, engine=args.engine, port=args.port).serve_forever()
 
-def main():
+def main(argv=None):
     """Función principal"""
     try:
+        args = parse_args(argv)
+        if args.pacing:
+            os.environ['FORM_PACING'] = args.pacing
+        if args.capture:
+            os.environ['FORM_CAPTURE'] = args.capture
+        if args.lean:
+            os.environ['FORM_CHROME_LEAN'] = '1'
+        if args.lookup:
+            os.environ['FORM_LOOKUP'] = args.lookup
+        if args.flow:
+            os.environ['FORM_FLOW'] = args.flow
+        if args.record:
+            os.environ['FORM_RECORD'] = args.record
+        if args.governor:
+            os.environ['FORM_CHROME_LIMITS'] = '1'
+            os.environ['FORM_RESOURCE_GOVERNOR'] = '1'
         logging.info("🤖 === INICIANDO AUTOMATIZACIÓN DE FORMULARIO ===")
         
-        automator = GitHubFormAutomator()
+        if args.clear_locator_cache:
+            cache = LocatorCache.from_env()
+            if cache:
+                cache.clear()
+                logging.info(f"🧹 Caché de localizadores borrada: {cache.path}")
+        
+        if args.daemon:
+            run_daemon(args)
+            exit(0)
+        
+        if args.shard and not args.roster:
+            raise ValueError("--shard necesita un --roster para repartir")
+        if args.roster or args.job_db:
+            if run_batch(args):
+                logging.info("✅ === BATCH COMPLETADO EXITOSAMENTE ===")
+                print("✅ ¡Todas las filas del roster fueron enviadas!")
+                exit(0)
+            else:
+                logging.error("❌ === BATCH CON FILAS FALLIDAS ===")
+                print(f"❌ Error: algunas filas fallaron, ver {args.report}")
+                exit(1)
+        
+        automator = build_automator(args.engine)
         success = automator.fill_form_step_by_step()
         
         if success:
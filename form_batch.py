@@ -0,0 +1,188 @@
+# form_batch.py
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from form_config import BROWSER_ENGINES
+from form_resources import session_driver
+from form_roster import missing_fields
+
+DEFAULT_REPORT_PATH = '/tmp/form_batch_report.json'
+
+
+class BatchRunner:
+    """Llena el formulario para todo un roster con un pool de navegadores
+
+    Cada worker mantiene su Chrome abierto entre filas y lo recrea solo si
+    deja de responder. Un error en una fila no afecta a las demás. Con un
+    governor (ResourceGovernor) cada worker espera memoria libre antes de abrir
+    su navegador (con el motor auto, antes del respaldo a Selenium) y lo recicla
+    si crece demasiado.
+    """
+
+    def __init__(self, form_url, rows, workers=2, report_path=DEFAULT_REPORT_PATH, engine='selenium', governor=None):
+        self.form_url = form_url
+        self.governor = governor
+        self.shard = None  # {'index', 'count', 'rows'} cuando el roster está repartido (--shard i/N)
+        self.engine = engine
+        self.rows = rows
+        self.workers = max(1, min(workers, len(rows)))
+        self.report_path = report_path
+        self.results = []
+        self._results_lock = threading.Lock()
+        self._queue = queue.Queue()
+
+    def record(self, result):
+        with self._results_lock:
+            self.results.append(result)
+
+    def new_result(self, row, worker_name):
+        return {
+            'row': row['row'],
+            'email': row.get('email'),
+            'nombre': row.get('nombre'),
+            'worker': worker_name,
+            'status': 'error',
+            'error': None,
+            'verification': None,
+            'duration_s': 0.0,
+        }
+
+    def run_row(self, automator, row, worker_name):
+        """Procesa una fila y devuelve su resultado"""
+        result = self.new_result(row, worker_name)
+        start = time.monotonic()
+        try:
+            automator.set_identity(row['email'], row['nombre'], row['dni'], row)
+            automator.screenshot_prefix = f"row{row['row']:04d}_"
+            success = automator.fill_form_step_by_step(keep_browser=True)
+            result['status'] = 'ok' if success else 'failed'
+            result['error'] = None if success else automator.last_error
+            verification = getattr(automator, 'verification', None)
+            result['verification'] = verification.state if verification else None
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            logging.error(f"💥 [{worker_name}] Error en fila {row['row']}: {result['error']}")
+        result['duration_s'] = round(time.monotonic() - start, 2)
+
+        # Si el navegador quedó colgado se recrea en la próxima fila
+        if result['status'] != 'ok' and not automator.is_driver_alive():
+            logging.warning(f"♻️ [{worker_name}] Navegador no responde, se reiniciará")
+            automator.close()
+        return result
+
+    def open_automator(self, row, worker_name):
+        """Crea el automatizador del worker, esperando lugar en el host si hay governor"""
+        # Import diferido: el motor async hereda de BatchRunner sin cargar selenium
+        from form_automation_github import build_automator
+
+        if self.governor and self.engine in BROWSER_ENGINES:
+            self.governor.admit(worker_name)
+        automator = build_automator(self.engine, self.form_url, row['email'], row['nombre'], row['dni'])
+        automator.chrome_slot = worker_name
+        if self.governor and self.engine == 'auto':
+            automator.governor = self.governor  # Reserva memoria recién si hace falta el respaldo Selenium
+        return automator
+
+    def govern(self, automator, worker_name):
+        """Después de cada fila: recicla el navegador si superó los límites del governor
+
+        Devuelve el automatizador a seguir usando o None si se cerró.
+        """
+        if not self.governor:
+            return automator
+        reason = self.governor.recycle_reason(worker_name, session_driver(automator))
+        if not reason:
+            return automator
+        logging.info(f"♻️ [{worker_name}] Reciclando navegador ({reason})")
+        self.close_automator(automator, worker_name)
+        return None
+
+    def close_automator(self, automator, worker_name):
+        if automator:
+            automator.close()
+        if self.governor:
+            self.governor.release(worker_name)
+
+    def worker(self, worker_name):
+        automator = None
+        try:
+            while True:
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                missing = missing_fields(row)
+                if missing:
+                    result = self.new_result(row, worker_name)
+                    result['status'] = 'invalid'
+                    result['error'] = f"Faltan campos: {', '.join(missing)}"
+                    logging.error(f"❌ [{worker_name}] Fila {row['row']} inválida: {result['error']}")
+                    self.record(result)
+                    continue
+                if automator is None:
+                    try:
+                        automator = self.open_automator(row, worker_name)
+                    except Exception as e:
+                        # La fila queda en el reporte y el worker sigue con la cola
+                        result = self.new_result(row, worker_name)
+                        result['error'] = f"No se pudo crear el automatizador: {type(e).__name__}: {e}"
+                        logging.error(f"💥 [{worker_name}] Fila {row['row']}: {result['error']}")
+                        self.record(result)
+                        self.close_automator(None, worker_name)
+                        continue
+                logging.info(f"👷 [{worker_name}] Procesando fila {row['row']} ({row.get('nombre')})")
+                self.record(self.run_row(automator, row, worker_name))
+                automator = self.govern(automator, worker_name)
+        finally:
+            self.close_automator(automator, worker_name)
+
+    def run(self):
+        """Ejecuta todo el roster y devuelve la lista de resultados por fila"""
+        logging.info(f"🤖 === MODO BATCH: {len(self.rows)} filas con {self.workers} navegadores ===")
+        for row in self.rows:
+            self._queue.put(row)
+
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=self.worker, args=(f"worker-{i}",), name=f"worker-{i}")
+            for i in range(1, self.workers + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.results.sort(key=lambda r: r['row'])
+        self.write_report(time.monotonic() - start)
+        return self.results
+
+    def write_report(self, total_seconds):
+        """Guarda el reporte JSON y muestra un resumen por fila"""
+        ok = sum(1 for r in self.results if r['status'] == 'ok')
+        report = {
+            'form_url': self.form_url,
+            'engine': self.engine,
+            'workers': self.workers,
+            'shard': self.shard,
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'resources': self.governor.snapshot() if self.governor else None,
+            'total': len(self.results),
+            'ok': ok,
+            'failed': len(self.results) - ok,
+            'duration_s': round(total_seconds, 2),
+            'results': self.results,
+        }
+        os.makedirs(os.path.dirname(self.report_path) or '.', exist_ok=True)
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        logging.info("\n📊 === RESULTADO POR FILA ===")
+        for r in self.results:
+            icon = '✅' if r['status'] == 'ok' else '❌'
+            detail = f" - {r['error']}" if r['error'] else ''
+            logging.info(f"{icon} Fila {r['row']:>4} {r['nombre'] or '-':<30} {r['status']:<8} {r['duration_s']:>6.1f}s{detail}")
+        logging.info(f"📊 {ok}/{len(self.results)} filas OK en {total_seconds:.1f}s - reporte: {self.report_path}")
@@ -0,0 +1,50 @@
+# form_capture.py
+import logging
+import os
+from collections import deque
+
+CAPTURE_POLICIES = ('none', 'on-error', 'always')
+DEFAULT_CAPTURE_POLICY = 'on-error'
+DEFAULT_BUFFER_SIZE = 4
+
+
+class CaptureBuffer:
+    """Guarda en memoria los últimos snapshots del DOM y los escribe solo si algo falla
+
+    Con 'on-error' una ejecución exitosa no codifica ni escribe ningún archivo;
+    con 'always' cada punto de control se guarda como screenshot (comportamiento
+    anterior) y con 'none' no se captura nada.
+    """
+
+    def __init__(self, policy=DEFAULT_CAPTURE_POLICY, size=DEFAULT_BUFFER_SIZE):
+        if policy not in CAPTURE_POLICIES:
+            raise ValueError(f"Política de captura desconocida: {policy} (opciones: {', '.join(CAPTURE_POLICIES)})")
+        self.policy = policy
+        self.frames = deque(maxlen=max(1, size))
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('FORM_CAPTURE', DEFAULT_CAPTURE_POLICY).lower(),
+                   int(os.environ.get('FORM_CAPTURE_BUFFER', DEFAULT_BUFFER_SIZE)))
+
+    def reset(self):
+        self.frames.clear()
+
+    def record(self, name, html):
+        self.frames.append((name, html))
+
+    def flush(self, path_for):
+        """Escribe los snapshots del buffer; path_for(name) devuelve la ruta sin extensión"""
+        written = []
+        while self.frames:
+            name, html = self.frames.popleft()
+            path = f"{path_for(name)}.html"
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                written.append(path)
+            except OSError as e:
+                logging.error(f"❌ Error al guardar snapshot {path}: {e}")
+        if written:
+            logging.info(f"📸 {len(written)} snapshots previos al error guardados: {', '.join(written)}")
+        return written
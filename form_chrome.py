@@ -0,0 +1,152 @@
+# form_chrome.py
+import logging
+import os
+
+from form_resources import ResourceLimits
+
+HEADLESS_MODES = ('default', 'new', 'old')
+
+# Recursos que el formulario no necesita para funcionar
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.mp3', '*.ogg',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*/gen_204*', '*play.google.com/log*',
+]
+BLOCKED_CSS_PATTERNS = ['*.css', '*fonts.googleapis.com*']
+
+
+DEFAULT_WINDOW_SIZE = '1920,1080'
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Opciones necesarias para GitHub Actions (el modo headless se agrega aparte)
+BASE_ARGUMENTS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-plugins",
+]
+
+# Opciones anti-detección
+STEALTH_ARGUMENTS = [
+    "--disable-blink-features=AutomationControlled",
+    f"--user-agent={USER_AGENT}",
+]
+
+
+class ChromeArguments:
+    """Junta argumentos y opciones experimentales sin depender de selenium
+
+    Tiene la misma interfaz que selenium Options para que ChromeLaunchProfile
+    sirva también al motor asyncio, que arma las capabilities a mano.
+    """
+
+    def __init__(self):
+        self.arguments = []
+        self.experimental_options = {}
+
+    def add_argument(self, argument):
+        self.arguments.append(argument)
+
+    def add_experimental_option(self, name, value):
+        self.experimental_options[name] = value
+
+    def to_capabilities(self):
+        options = dict(self.experimental_options)
+        options['args'] = list(self.arguments)
+        return {'browserName': 'chrome', 'goog:chromeOptions': options}
+
+
+def env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class ChromeLaunchProfile:
+    """Opciones de arranque rápido de Chrome (modo liviano y perfil reutilizable)
+
+    - FORM_CHROME_LEAN=1: bloquea imágenes, fuentes, media y analytics.
+    - FORM_CHROME_BLOCK_CSS=1: bloquea también las hojas de estilo.
+    - FORM_CHROME_PROFILE_DIR: user-data-dir persistente (con su caché de disco).
+    - FORM_CHROME_HEADLESS: default, new u old.
+    - FORM_CHROME_LIMITS=1: ventana chica y límites de procesos y heap (ver ResourceLimits).
+    """
+
+    def __init__(self, lean=False, block_css=False, profile_dir=None, headless='default', limits=None):
+        if headless not in HEADLESS_MODES:
+            raise ValueError(f"Modo headless desconocido: {headless} (opciones: {', '.join(HEADLESS_MODES)})")
+        self.lean = lean
+        self.block_css = block_css
+        self.profile_dir = profile_dir
+        self.headless = headless
+        self.limits = limits
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            lean=env_flag('FORM_CHROME_LEAN'),
+            block_css=env_flag('FORM_CHROME_BLOCK_CSS'),
+            profile_dir=os.path.expanduser(os.environ['FORM_CHROME_PROFILE_DIR']) if os.environ.get('FORM_CHROME_PROFILE_DIR') else None,
+            headless=os.environ.get('FORM_CHROME_HEADLESS', 'default').lower(),
+            limits=ResourceLimits.from_env(),
+        )
+
+    @property
+    def blocked_urls(self):
+        patterns = list(BLOCKED_URL_PATTERNS) if self.lean else []
+        if self.block_css:
+            patterns += BLOCKED_CSS_PATTERNS
+        return patterns
+
+    def headless_argument(self):
+        if self.headless == 'default':
+            return "--headless"
+        return f"--headless={self.headless}"
+
+    def apply(self, chrome_options, slot=None):
+        """Agrega todos los argumentos y preferencias antes de lanzar Chrome
+
+        slot separa el perfil de cada navegador cuando corren varios en paralelo
+        (Chrome no permite compartir un user-data-dir).
+        """
+        chrome_options.add_argument(self.headless_argument())  # Sin interfaz gráfica
+        for argument in BASE_ARGUMENTS + STEALTH_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_argument(f"--window-size={self.limits.window_size if self.limits else DEFAULT_WINDOW_SIZE}")
+        if self.limits:
+            self.limits.apply(chrome_options)
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+
+        if self.profile_dir:
+            user_data_dir = os.path.join(self.profile_dir, slot or 'default')
+            os.makedirs(user_data_dir, exist_ok=True)
+            chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+            chrome_options.add_argument(f"--disk-cache-dir={os.path.join(user_data_dir, 'cache')}")
+        if self.lean:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_argument("--disable-background-networking")
+            chrome_options.add_argument("--disable-component-update")
+            chrome_options.add_argument("--disable-default-apps")
+            chrome_options.add_argument("--disable-sync")
+            chrome_options.add_argument("--no-first-run")
+            chrome_options.add_argument("--mute-audio")
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.managed_default_content_settings.media_stream': 2,
+                'profile.default_content_setting_values.notifications': 2,
+            })
+
+    def after_start(self, driver):
+        """Bloquea por CDP los recursos que las preferencias no cubren"""
+        patterns = self.blocked_urls
+        if not patterns:
+            return
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            logging.info(f"🪶 Modo liviano: {len(patterns)} patrones de recursos bloqueados")
+        except Exception as e:
+            logging.warning(f"⚠️ No se pudieron bloquear recursos por CDP: {e}")
@@ -0,0 +1,33 @@
+# form_config.py
+import os
+
+ENGINES = ('auto', 'http', 'selenium', 'async')
+# Motores que abren Chrome en cada sesión (auto solo lo abre en el respaldo a Selenium)
+BROWSER_ENGINES = ('selenium', 'async')
+
+# Cómo se buscan los campos (FORM_LOOKUP)
+LOOKUP_MODES = ('cascade', 'js', 'race')
+
+# Dato de la persona -> variable de entorno (GitHub Secrets)
+IDENTITY_SETTINGS = (('form_url', 'FORM_URL'), ('email', 'EMAIL'), ('nombre', 'NOMBRE'), ('dni', 'DNI'))
+
+
+def resolve_identity(form_url=None, email=None, nombre=None, dni=None):
+    """(form_url, email, nombre, dni) desde los argumentos o el entorno
+
+    Lanza ValueError con todas las variables que faltan. No importa ningún
+    motor: el error de configuración aparece sin cargar selenium ni requests.
+    """
+    given = {'form_url': form_url, 'email': email, 'nombre': nombre, 'dni': dni}
+    values = {key: given[key] or os.environ.get(env) for key, env in IDENTITY_SETTINGS}
+    missing = [env for key, env in IDENTITY_SETTINGS if not values[key]]
+    if missing:
+        raise ValueError(f"Faltan estas variables de entorno: {', '.join(missing)}")
+    return tuple(values[key] for key, _ in IDENTITY_SETTINGS)
+
+
+def lookup_mode_from_env():
+    mode = os.environ.get('FORM_LOOKUP', 'cascade').lower()
+    if mode not in LOOKUP_MODES:
+        raise ValueError(f"Modo de búsqueda desconocido: {mode} (opciones: {', '.join(LOOKUP_MODES)})")
+    return mode
@@ -0,0 +1,378 @@
+# form_daemon.py
+import json
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from form_proc_stats import driver_root_pid, tree_usage
+from form_resources import ResourceGovernor
+from form_roster import missing_fields, normalize_row
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_JOBS = 50
+DEFAULT_MAX_RSS_MB = 1500
+DEFAULT_HEALTH_INTERVAL = 30
+DEFAULT_QUEUE_TIMEOUT = 60
+
+# Motores que usan navegador (http y async no ganan nada con un pool caliente)
+DAEMON_ENGINES = ('selenium', 'auto')
+
+# Identidad provisoria para abrir el navegador antes del primer trabajo;
+# cada trabajo la reemplaza con set_identity
+WARMUP_IDENTITY = ('warmup@localhost', 'warmup', '0')
+
+
+class WarmSlot:
+    """Un automatizador con su Chrome ya abierto, reutilizado entre trabajos
+
+    Con lazy (motor auto) no se abre Chrome por adelantado: los trabajos van
+    por HTTP y el navegador lo abre el primer respaldo Selenium, que queda
+    abierto para los siguientes.
+    """
+
+    def __init__(self, name, automator, lazy=False):
+        self.name = name
+        self.automator = automator
+        self.lazy = lazy
+        self.jobs = 0
+        self.admitted = False  # Si el governor ya le reservó memoria a su Chrome
+
+    @property
+    def driver(self):
+        # En modo auto es el driver del Selenium de respaldo (None hasta que se usa)
+        return self.automator.driver
+
+    def warm(self):
+        """Abre Chrome si no está abierto (setup_chrome_driver completo)"""
+        self.automator.chrome_slot = self.name
+        if self.lazy or self.driver:
+            return
+        self.automator.trace = None  # El arranque no pertenece a ningún trabajo
+        start = time.monotonic()
+        self.automator.setup_chrome_driver()
+        self.jobs = 0
+        logging.info(f"🔥 [{self.name}] Navegador listo en {time.monotonic() - start:.1f}s")
+
+    def recycle(self):
+        if self.lazy:
+            # Solo se cierra el Chrome del respaldo: la sesión HTTP sigue atendiendo
+            self.automator.selenium.close()
+        else:
+            self.automator.close()
+        self.warm()
+
+    def rss_mb(self):
+        driver = self.driver
+        pid = driver_root_pid(driver) if driver else None
+        return tree_usage(pid)[0] / 2**20 if pid else 0.0
+
+
+class WarmDriverPool:
+    """Pool de navegadores abiertos y verificados que atiende los trabajos del daemon
+
+    Un navegador se recicla después de max_jobs envíos o si su árbol de
+    procesos supera max_rss_mb, siempre después de responder el trabajo. Con
+    un governor (ResourceGovernor) solo se abren los navegadores que entran en
+    la memoria del host y se recicla también ante sus límites. Con el motor
+    auto los navegadores se abren recién con el primer respaldo Selenium.
+    """
+
+    def __init__(self, form_url, size=1, engine='auto', max_jobs=DEFAULT_MAX_JOBS, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                 governor=None):
+        if engine not in DAEMON_ENGINES:
+            raise ValueError(f"El daemon necesita un motor con navegador: {', '.join(DAEMON_ENGINES)} (recibido: {engine})")
+        self.form_url = form_url
+        self.size = max(1, size)
+        self.engine = engine
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.governor = governor
+        self.slots = []
+        self.stats = {'jobs': 0, 'ok': 0, 'failed': 0, 'busy': 0, 'recycled': 0, 'restarted': 0}
+        self.started = time.monotonic()
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+            return self.stats[key]
+
+    def start(self):
+        # Import diferido: el daemon no carga selenium hasta arrancar el pool
+        from form_automation_github import build_automator
+
+        lazy = self.engine == 'auto'
+        if lazy:
+            logging.info(f"🧊 {self.size} automatizadores listos (auto): Chrome se abre con el primer respaldo Selenium")
+        else:
+            logging.info(f"🔥 Calentando {self.size} navegadores ({self.engine})...")
+        for i in range(1, self.size + 1):
+            name = f"daemon-{i}"
+            if not lazy and self.governor and not self.governor.admit(name, timeout=0):
+                logging.warning(f"⚠️ Sin memoria para más navegadores: el pool queda con {len(self.slots)} de {self.size}")
+                break
+            slot = WarmSlot(name, build_automator(self.engine, self.form_url, *WARMUP_IDENTITY), lazy=lazy)
+            slot.admitted = not lazy and self.governor is not None
+            slot.warm()
+            if self.governor and slot.driver:
+                self.governor.observe(name, slot.driver)
+            self.slots.append(slot)
+            self._idle.put(slot)
+
+    def acquire(self, timeout):
+        """Devuelve un navegador libre o lanza queue.Empty si no se libera ninguno a tiempo"""
+        return self._idle.get(timeout=timeout)
+
+    def admit_lazy(self, slot):
+        """Registra en el governor el Chrome que abrió un respaldo Selenium
+
+        Devuelve False si no entra en la memoria del host: hay que cerrarlo.
+        """
+        if not self.governor or slot.admitted or not slot.driver:
+            return True
+        slot.admitted = self.governor.admit(slot.name, timeout=0)
+        return slot.admitted
+
+    def recycle_reason(self, slot):
+        if not slot.driver:
+            return None  # Modo auto sin respaldo Selenium todavía: no hay Chrome que reciclar
+        if not slot.automator.is_driver_alive():
+            return "no responde"
+        if not self.admit_lazy(slot):
+            return "sin memoria para otro navegador"
+        if slot.jobs >= self.max_jobs:
+            return f"{slot.jobs} trabajos"
+        reason = self.governor.recycle_reason(slot.name, slot.driver) if self.governor else None
+        if reason:
+            return reason
+        rss = slot.rss_mb()
+        if rss > self.max_rss_mb:
+            return f"{rss:.0f} MB de RSS"
+        return None
+
+    def release(self, slot):
+        """Devuelve el navegador al pool, reciclándolo antes si hace falta"""
+        try:
+            reason = self.recycle_reason(slot)
+            if reason:
+                logging.info(f"♻️ [{slot.name}] Reciclando navegador ({reason})")
+                self.count('recycled')
+                if slot.lazy and slot.admitted:
+                    # El próximo respaldo Selenium vuelve a pedir lugar al governor
+                    self.governor.release(slot.name)
+                    slot.admitted = False
+                slot.recycle()
+        except Exception as e:
+            # El próximo trabajo abre Chrome de nuevo si hace falta
+            logging.error(f"💥 [{slot.name}] No se pudo reciclar el navegador: {type(e).__name__}: {e}")
+        self._idle.put(slot)
+
+    def health_check(self):
+        """Verifica los navegadores libres y reinicia los que no responden"""
+        for _ in range(self._idle.qsize()):
+            try:
+                slot = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if not slot.automator.is_driver_alive():
+                    logging.warning(f"♻️ [{slot.name}] Navegador caído, reiniciando")
+                    self.count('restarted')
+                    slot.recycle()
+            except Exception as e:
+                logging.error(f"💥 [{slot.name}] No se pudo reiniciar el navegador: {type(e).__name__}: {e}")
+            finally:
+                self._idle.put(slot)
+
+    def run(self, slot, row, queued_s):
+        """Envía el formulario para una persona y devuelve el resultado con sus tiempos"""
+        job_id = self.count('jobs')
+        automator = slot.automator
+        automator.set_identity(row['email'], row['nombre'], row['dni'], row)
+        automator.screenshot_prefix = f"daemon{job_id:05d}_"
+        start = time.monotonic()
+        try:
+            success = automator.fill_form_step_by_step(keep_browser=True)
+            error = None if success else automator.last_error
+        except Exception as e:
+            success = False
+            error = f"{type(e).__name__}: {e}"
+            logging.error(f"💥 [{slot.name}] Error en el trabajo {job_id}: {error}")
+        slot.jobs += 1
+        self.count('ok' if success else 'failed')
+
+        trace = getattr(automator, 'trace', None)
+        verification = getattr(automator, 'verification', None)
+        return {
+            'job': job_id,
+            'status': 'ok' if success else 'failed',
+            'error': error,
+            'verification': {'state': verification.state, 'reason': verification.reason,
+                             'evidence': verification.evidence} if verification else None,
+            'worker': slot.name,
+            'browser_jobs': slot.jobs,
+            'timings': {
+                'queued_s': round(queued_s, 4),
+                'run_s': round(time.monotonic() - start, 4),
+                'steps': {r['step']: r['duration_s'] for r in trace.summary_rows()} if trace else {},
+            },
+        }
+
+    def health(self):
+        alive = [slot.name for slot in self.slots if slot.driver]
+        # En modo auto el pool está listo sin Chrome abierto: los trabajos van por HTTP
+        ready = alive or (self.slots and self.engine == 'auto')
+        return {
+            'status': 'ok' if ready else 'starting',
+            'engine': self.engine,
+            'browsers': len(self.slots),
+            'alive': len(alive),
+            'idle': self._idle.qsize(),
+        }
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['uptime_s'] = round(time.monotonic() - self.started, 1)
+        stats['browsers'] = [
+            {'name': slot.name, 'jobs': slot.jobs, 'rss_mb': round(slot.rss_mb(), 1)}
+            for slot in self.slots
+        ]
+        if self.governor:
+            stats['resources'] = self.governor.snapshot()
+        return stats
+
+    def close(self):
+        for slot in self.slots:
+            slot.automator.close()
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """API local: POST /submit, GET /health y GET /stats (JSON)"""
+
+    server_version = 'FormDaemon/1'
+
+    def log_message(self, format, *args):
+        logging.debug(f"🌐 {self.address_string()} {format % args}")
+
+    def reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        pool = self.server.pool
+        if self.path == '/health':
+            health = pool.health()
+            self.reply(200 if health['status'] == 'ok' else 503, health)
+        elif self.path == '/stats':
+            self.reply(200, pool.snapshot())
+        else:
+            self.reply(404, {'error': f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/submit':
+            self.reply(404, {'error': f"Ruta desconocida: {self.path}"})
+            return
+        try:
+            raw = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            if not isinstance(raw, dict):
+                raise ValueError("se esperaba un objeto JSON")
+        except ValueError as e:
+            self.reply(400, {'status': 'invalid', 'error': f"JSON inválido: {e}"})
+            return
+        row = normalize_row(raw, 0)
+        missing = missing_fields(row)
+        if missing:
+            self.reply(400, {'status': 'invalid', 'error': f"Faltan campos: {', '.join(missing)}"})
+            return
+
+        pool = self.server.pool
+        queued = time.monotonic()
+        try:
+            slot = pool.acquire(self.server.queue_timeout)
+        except queue.Empty:
+            pool.count('busy')
+            self.reply(503, {'status': 'busy', 'error': f"Ningún navegador libre en {self.server.queue_timeout}s"})
+            return
+        try:
+            result = pool.run(slot, row, time.monotonic() - queued)
+            self.reply(200, result)
+        finally:
+            # Reciclar después de responder: el cliente no espera el reinicio
+            pool.release(slot)
+
+
+class FormDaemon:
+    """Proceso de larga vida que envía formularios con navegadores ya abiertos
+
+    Configuración (además de las variables del automatizador):
+    - FORM_DAEMON_HOST / FORM_DAEMON_PORT: dirección de la API (127.0.0.1:8765).
+    - FORM_DAEMON_MAX_JOBS: trabajos por navegador antes de reciclarlo (50).
+    - FORM_DAEMON_MAX_RSS_MB: memoria máxima del árbol de Chrome (1500 MB).
+    - FORM_DAEMON_HEALTH_INTERVAL: segundos entre verificaciones (30).
+    - FORM_DAEMON_QUEUE_TIMEOUT: espera máxima por un navegador libre (60 s).
+    """
+
+    def __init__(self, pool, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 health_interval=DEFAULT_HEALTH_INTERVAL, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self.health_interval = health_interval
+        self.queue_timeout = queue_timeout
+        self.httpd = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls, form_url, workers=1, engine='auto', port=None):
+        pool = WarmDriverPool(
+            form_url, size=workers, engine=engine,
+            max_jobs=int(os.environ.get('FORM_DAEMON_MAX_JOBS', DEFAULT_MAX_JOBS)),
+            max_rss_mb=float(os.environ.get('FORM_DAEMON_MAX_RSS_MB', DEFAULT_MAX_RSS_MB)),
+            governor=ResourceGovernor.from_env(),
+        )
+        return cls(
+            pool,
+            host=os.environ.get('FORM_DAEMON_HOST', DEFAULT_HOST),
+            port=port or int(os.environ.get('FORM_DAEMON_PORT', DEFAULT_PORT)),
+            health_interval=float(os.environ.get('FORM_DAEMON_HEALTH_INTERVAL', DEFAULT_HEALTH_INTERVAL)),
+            queue_timeout=float(os.environ.get('FORM_DAEMON_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT)),
+        )
+
+    def health_loop(self):
+        while not self._stopped.wait(self.health_interval):
+            self.pool.health_check()
+
+    def stop(self, *_):
+        self._stopped.set()
+        if self.httpd:
+            # shutdown() bloquea hasta que termine serve_forever: otro hilo
+            threading.Thread(target=self.httpd.shutdown, daemon=True).start()
+
+    def serve_forever(self):
+        self.httpd = ThreadingHTTPServer((self.host, self.port), DaemonHandler)
+        self.httpd.pool = self.pool
+        self.httpd.queue_timeout = self.queue_timeout
+        signal.signal(signal.SIGTERM, self.stop)
+        try:
+            self.pool.start()
+            threading.Thread(target=self.health_loop, name='daemon-health', daemon=True).start()
+            logging.info(f"🛰️ Daemon escuchando en http://{self.host}:{self.port} (POST /submit, GET /health, GET /stats)")
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("🛑 Daemon interrumpido")
+        finally:
+            self._stopped.set()
+            self.httpd.server_close()
+            self.pool.close()
+            logging.info(f"📊 Daemon detenido: {json.dumps(self.pool.stats, ensure_ascii=False)}")
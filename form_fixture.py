@@ -0,0 +1,172 @@
+# form_fixture.py
+import json
+import logging
+import os
+import re
+import time
+
+# Identidad que usa la reproducción: los datos reales no quedan en el bundle
+REPLAY_EMAIL = 'replay@example.com'
+REPLAY_DNI = '00000000'
+BUNDLE_VARIANT = 'recorded'  # Subcarpeta de las secciones, como las variantes de benchmarks/form_replica
+MANIFEST_NAME = 'manifest.json'
+
+SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>.*?</script>', re.S | re.I)
+STYLE_PATTERN = re.compile(r'<style\b[^>]*>.*?</style>|<link\b[^>]*rel="?stylesheet"?[^>]*>', re.S | re.I)
+EXTERNAL_PATTERN = re.compile(r'<(?:img|iframe|base)\b[^>]*>', re.I)
+FORM_ACTION_PATTERN = re.compile(r'(<form\b[^>]*\baction=")[^"]*(")', re.I)
+
+# Reemplaza el JS de Google en la reproducción: navegación entre secciones, desplegables y envío
+REPLAY_SHIM = """<script>
+(function () {
+  const NEXT_PAGE = %(next_page)s;
+  const label = el => (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+  function submit() {
+    const form = document.createElement('form');
+    form.method = 'post';
+    form.action = 'formResponse';
+    document.querySelectorAll('input, textarea').forEach((el, i) => {
+      if (['button', 'submit'].includes(el.type) || (['radio', 'checkbox'].includes(el.type) && !el.checked)) return;
+      const field = document.createElement('input');
+      field.type = 'hidden';
+      field.name = el.name || el.getAttribute('aria-label') || ('field' + i);
+      field.value = el.value;
+      form.appendChild(field);
+    });
+    document.body.appendChild(form);
+    form.submit();
+  }
+  document.addEventListener('click', event => {
+    const option = event.target.closest('[role="option"]');
+    const listbox = event.target.closest('[role="listbox"]');
+    if (option) {
+      const value = option.getAttribute('data-value') || label(option);
+      const holder = option.closest('[role="listitem"], .question') || listbox || document;
+      const hidden = holder.querySelector('input[type="hidden"][name^="entry."]');
+      if (hidden) hidden.value = value;
+      (listbox || document).querySelectorAll('[role="option"]').forEach(o => o.setAttribute('aria-selected', String(o === option)));
+      if (listbox) listbox.setAttribute('aria-expanded', 'false');
+      return;
+    }
+    if (listbox) {
+      listbox.setAttribute('aria-expanded', listbox.getAttribute('aria-expanded') === 'true' ? 'false' : 'true');
+      return;
+    }
+    const button = event.target.closest('[role="button"], button, input[type="submit"]');
+    if (!button) return;
+    if (/siguiente|next/.test(label(button)) && NEXT_PAGE) {
+      window.location.href = NEXT_PAGE;
+    } else if (/enviar|submit/.test(label(button))) {
+      submit();
+    }
+  }, true);
+})();
+</script>"""
+
+
+def sanitize_page(html, next_page=None, redact=()):
+    """Snapshot servible sin red: sin scripts de Google (salvo FB_PUBLIC_LOAD_DATA_),
+    sin estilos ni recursos externos, con los datos personales reemplazados y el shim
+    de reproducción agregado al final"""
+    html = SCRIPT_PATTERN.sub(lambda m: m.group(0) if 'FB_PUBLIC_LOAD_DATA_' in m.group(0) else '', html)
+    html = STYLE_PATTERN.sub('', html)
+    html = EXTERNAL_PATTERN.sub('', html)
+    html = FORM_ACTION_PATTERN.sub(r'\1formResponse\2', html)
+    for value, placeholder in redact:
+        if value:
+            html = html.replace(value, placeholder)
+    shim = REPLAY_SHIM % {'next_page': json.dumps(next_page)}
+    if '</body>' in html:
+        return html.replace('</body>', shim + '\n</body>', 1)
+    return html + shim
+
+
+def section_file(number):
+    return f"section{number}.html"
+
+
+class FixtureRecorder:
+    """Graba una ejecución real en un bundle que benchmarks/replay_check.py reproduce sin red
+
+    Guarda el DOM de cada sección (al cargar la página y después de cada
+    'Siguiente'), la página de confirmación y qué estrategia encontró cada campo.
+    El email y el DNI reales se reemplazan por REPLAY_EMAIL y REPLAY_DNI.
+
+    - FORM_RECORD: carpeta del bundle (o --record).
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.sections = []
+        self.confirmation = None
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get('FORM_RECORD')
+        return cls(path) if path else None
+
+    def reset(self):
+        self.sections = []
+        self.confirmation = None
+
+    @staticmethod
+    def page_html(driver):
+        return driver.execute_script("return '<!DOCTYPE html>\\n' + document.documentElement.outerHTML;")
+
+    def checkpoint(self, name, driver):
+        """Guarda la sección al cargar el formulario y después de cada 'Siguiente'"""
+        if name == '01_inicial' or name.endswith('_after_next'):
+            try:
+                self.sections.append({'checkpoint': name, 'url': driver.current_url, 'html': self.page_html(driver)})
+            except Exception as e:
+                logging.warning(f"⚠️ No se pudo grabar la sección {name}: {e}")
+
+    def submitted(self, driver):
+        try:
+            self.confirmation = self.page_html(driver)
+        except Exception as e:
+            logging.warning(f"⚠️ No se pudo grabar la confirmación: {e}")
+
+    def save(self, form_url, identity, trace, verification):
+        """Escribe el bundle: secciones, confirmación y manifest con lo esperado"""
+        if not self.sections:
+            logging.warning("⚠️ Nada para grabar: el formulario no llegó a cargarse")
+            return None
+        if not self.confirmation:
+            logging.warning("⚠️ El bundle no tiene página de confirmación: la reproducción no podrá completar el envío")
+        redact = [(identity.get('email'), REPLAY_EMAIL), (identity.get('dni'), REPLAY_DNI)]
+        variant_dir = os.path.join(self.path, BUNDLE_VARIANT)
+        os.makedirs(variant_dir, exist_ok=True)
+        for number, section in enumerate(self.sections, 1):
+            next_page = f"section{number + 1}" if number < len(self.sections) else None
+            with open(os.path.join(variant_dir, section_file(number)), 'w', encoding='utf-8') as f:
+                f.write(sanitize_page(section['html'], next_page, redact))
+        if self.confirmation:
+            with open(os.path.join(self.path, 'confirmation.html'), 'w', encoding='utf-8') as f:
+                f.write(sanitize_page(self.confirmation, None, redact))
+
+        events = trace.events if trace else []
+        manifest = {
+            'form_url': form_url,
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'flow': os.environ.get('FORM_FLOW'),
+            'identity': {'email': REPLAY_EMAIL, 'nombre': identity.get('nombre'), 'dni': REPLAY_DNI},
+            'sections': [section['checkpoint'] for section in self.sections],
+            'strategies': {e['name']: {'index': e['index'] - 1, 'by': e['by'], 'selector': e['selector']}
+                           for e in events if e['kind'] == 'strategy' and e['outcome'] == 'hit'},
+            'steps': {e['name']: e.get('outcome') for e in events if e['kind'] == 'step'},
+            'verification': verification.state if verification else None,
+        }
+        with open(os.path.join(self.path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logging.info(f"🎞️ Bundle grabado en {self.path}: {len(self.sections)} secciones, "
+                     f"{len(manifest['strategies'])} campos")
+        return manifest
+
+
+def load_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No es un bundle grabado (falta {MANIFEST_NAME}): {path}")
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
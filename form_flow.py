@@ -0,0 +1,372 @@
+# form_flow.py
+import json
+import logging
+import os
+import threading
+import time
+
+from form_locators import CSS, DNI_STRATEGIES, DROPDOWN_STRATEGIES, EMAIL_STRATEGIES, NEXT_STRATEGIES, SUBMIT_STRATEGIES, XPATH
+from form_option_index import OptionIndex
+
+FIELD_KINDS = ('text', 'dropdown', 'radio', 'checkbox', 'date')
+ADVANCE_ACTIONS = ('next', 'submit')
+VALUE_SOURCES = ('column', 'env', 'const')  # En este orden: gana la primera con valor
+FIELD_FALLBACKS = ('last_text_input',)
+DEFAULT_FIELD_TIMEOUT = 8
+DEFAULT_FLOW_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flows', 'default_flow.json')
+
+# Listas de estrategias que un spec puede nombrar en lugar de escribir los selectores
+LOCATOR_SETS = {
+    'email': EMAIL_STRATEGIES,
+    'next': NEXT_STRATEGIES,
+    'dropdown': DROPDOWN_STRATEGIES,
+    'dni': DNI_STRATEGIES,
+    'submit': SUBMIT_STRATEGIES,
+}
+LOCATOR_TYPES = {'css': CSS, CSS: CSS, 'xpath': XPATH}
+
+# Prueba la sintaxis de todos los selectores en la página; devuelve los índices inválidos
+VALIDATE_LOCATORS_SCRIPT = """
+const invalid = [];
+arguments[0].forEach(([using, value], i) => {
+    try {
+        if (using === 'css selector') document.querySelector(value);
+        else document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+    } catch (e) {
+        invalid.push(i);
+    }
+});
+return invalid;
+"""
+
+# Asigna el valor de un input (p. ej. type="date", donde send_keys depende del idioma)
+SET_VALUE_SCRIPT = """
+const [input, value] = arguments;
+const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+setter.call(input, value);
+input.dispatchEvent(new Event('input', {bubbles: true}));
+input.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+# Etiquetas de las opciones radio/checkbox dentro de un contenedor
+CHOICE_LABELS_SCRIPT = """
+const [container, role] = arguments;
+const label = el => el.getAttribute('aria-label') || el.getAttribute('data-value')
+    || el.getAttribute('data-answer-value') || el.value
+    || (el.closest('label') ? el.closest('label').textContent : el.textContent);
+return Array.from(container.querySelectorAll(`[role="${role}"], input[type="${role}"]`))
+    .map(el => (label(el) || '').replace(/\\s+/g, ' ').trim());
+"""
+
+CLICK_CHOICE_SCRIPT = """
+const [container, role, position] = arguments;
+const el = container.querySelectorAll(`[role="${role}"], input[type="${role}"]`)[position];
+const checked = el.getAttribute('aria-checked') === 'true' || el.checked === true;
+if (!checked) el.click();
+return true;
+"""
+
+
+class FlowSpecError(ValueError):
+    """El spec del flujo no es válido"""
+
+
+class FlowField:
+    def __init__(self, name, kind, label, strategies, sources, timeout, cache_key, fallback=None):
+        self.name = name
+        self.kind = kind
+        self.label = label
+        self.strategies = strategies
+        self.sources = sources
+        self.timeout = timeout
+        self.cache_key = cache_key
+        self.fallback = fallback
+
+    def value(self, values):
+        """Primer valor no vacío entre las fuentes (columna del roster, entorno, constante)"""
+        for source, key in self.sources:
+            if source == 'column':
+                value = values.get(key)
+            elif source == 'env':
+                value = os.environ.get(key)
+            else:
+                value = key
+            if value:
+                if self.kind == 'date' and value == 'today':
+                    return time.strftime('%Y-%m-%d')
+                return value
+        return None
+
+
+class FlowAdvance:
+    def __init__(self, action, label, strategies, timeout, cache_key):
+        self.action = action
+        self.label = label
+        self.strategies = strategies
+        self.timeout = timeout
+        self.cache_key = cache_key
+
+
+class FlowSection:
+    def __init__(self, name, fields, advance):
+        self.name = name
+        self.fields = fields
+        self.advance = advance
+
+
+class CompiledFlow:
+    """Flujo ya validado y listo para ejecutar (se compila una vez por spec)"""
+
+    def __init__(self, name, sections, path=None):
+        self.name = name
+        self.sections = sections
+        self.path = path
+        self.validated = False
+        self._lock = threading.Lock()
+
+    def locatables(self):
+        for section in self.sections:
+            yield from section.fields
+            yield section.advance
+
+    def validate_locators(self, driver):
+        """Descarta selectores con errores de sintaxis (una sola llamada, la primera vez)"""
+        with self._lock:
+            if self.validated:
+                return
+            targets = sorted({pair for item in self.locatables() for pair in item.strategies})
+            invalid = {targets[i] for i in driver.execute_script(VALIDATE_LOCATORS_SCRIPT, [list(t) for t in targets])}
+            for item in self.locatables():
+                bad = [pair for pair in item.strategies if pair in invalid]
+                if bad:
+                    logging.warning(f"⚠️ Flujo {self.name}: {item.label} tiene {len(bad)} selectores inválidos: {bad}")
+                    item.strategies = [pair for pair in item.strategies if pair not in invalid]
+                if not item.strategies:
+                    raise FlowSpecError(f"{item.label}: no queda ningún selector válido")
+            self.validated = True
+
+
+def compile_locators(where, locators):
+    """Acepta el nombre de una lista de LOCATOR_SETS o una lista de [tipo, selector]"""
+    if isinstance(locators, str):
+        if locators not in LOCATOR_SETS:
+            raise FlowSpecError(f"{where}: lista de localizadores desconocida '{locators}' (opciones: {', '.join(LOCATOR_SETS)})")
+        return [tuple(pair) for pair in LOCATOR_SETS[locators]], locators
+    if not isinstance(locators, list) or not locators:
+        raise FlowSpecError(f"{where}: 'locators' debe ser un nombre o una lista de [tipo, selector]")
+    strategies = []
+    for pair in locators:
+        if not (isinstance(pair, (list, tuple)) and len(pair) == 2 and pair[0] in LOCATOR_TYPES and pair[1]):
+            raise FlowSpecError(f"{where}: localizador inválido {pair!r} (tipos: css, xpath)")
+        strategies.append((LOCATOR_TYPES[pair[0]], pair[1]))
+    return strategies, None
+
+
+def compile_sources(where, value):
+    if isinstance(value, str):
+        value = {'const': value}
+    if not isinstance(value, dict) or not value:
+        raise FlowSpecError(f"{where}: 'value' debe indicar column, env o const")
+    unknown = set(value) - set(VALUE_SOURCES)
+    if unknown:
+        raise FlowSpecError(f"{where}: fuentes de valor desconocidas {sorted(unknown)} (opciones: {', '.join(VALUE_SOURCES)})")
+    return [(source, str(value[source])) for source in VALUE_SOURCES if source in value]
+
+
+def compile_timeout(where, spec, default):
+    timeout = spec.get('timeout', default)
+    if not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise FlowSpecError(f"{where}: 'timeout' debe ser un número positivo")
+    return timeout
+
+
+def compile_flow(spec, path=None):
+    """Valida el spec y devuelve un CompiledFlow"""
+    if not isinstance(spec, dict) or not isinstance(spec.get('sections'), list) or not spec['sections']:
+        raise FlowSpecError("El spec debe tener una lista 'sections' no vacía")
+    name = spec.get('name') or os.path.basename(path or 'flujo')
+    default_timeout = spec.get('timeout', DEFAULT_FIELD_TIMEOUT)
+    seen = set()
+    sections = []
+    for s_index, section_spec in enumerate(spec['sections'], 1):
+        section_name = section_spec.get('name') or f"seccion{s_index}"
+        fields = []
+        for f_index, field_spec in enumerate(section_spec.get('fields', []), 1):
+            where = f"{section_name}.{field_spec.get('name') or f_index}"
+            field_name = field_spec.get('name')
+            if not field_name or field_name in seen:
+                raise FlowSpecError(f"{where}: cada campo necesita un 'name' único")
+            seen.add(field_name)
+            kind = field_spec.get('kind', 'text')
+            if kind not in FIELD_KINDS:
+                raise FlowSpecError(f"{where}: tipo desconocido '{kind}' (opciones: {', '.join(FIELD_KINDS)})")
+            fallback = field_spec.get('fallback')
+            if fallback and fallback not in FIELD_FALLBACKS:
+                raise FlowSpecError(f"{where}: fallback desconocido '{fallback}' (opciones: {', '.join(FIELD_FALLBACKS)})")
+            strategies, locator_set = compile_locators(where, field_spec.get('locators'))
+            fields.append(FlowField(
+                field_name, kind, field_spec.get('label') or f"Campo {field_name}", strategies,
+                compile_sources(where, field_spec.get('value', {'column': field_name})),
+                compile_timeout(where, field_spec, default_timeout), locator_set or field_name, fallback))
+
+        advance_spec = section_spec.get('advance') or {}
+        where = f"{section_name}.advance"
+        action = advance_spec.get('action', 'submit' if s_index == len(spec['sections']) else 'next')
+        if action not in ADVANCE_ACTIONS:
+            raise FlowSpecError(f"{where}: acción desconocida '{action}' (opciones: {', '.join(ADVANCE_ACTIONS)})")
+        if (action == 'submit') != (s_index == len(spec['sections'])):
+            raise FlowSpecError(f"{where}: solo la última sección envía el formulario")
+        strategies, locator_set = compile_locators(where, advance_spec.get('locators', action))
+        advance = FlowAdvance(action, advance_spec.get('label') or f"Botón {action}", strategies,
+                              compile_timeout(where, advance_spec, default_timeout), locator_set or f"{section_name}_{action}")
+        sections.append(FlowSection(section_name, fields, advance))
+    return CompiledFlow(name, sections, path)
+
+
+def read_spec(path):
+    """Lee un spec JSON o YAML (YAML necesita PyYAML instalado)"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise FlowSpecError(f"Para leer {path} hace falta PyYAML (pip install pyyaml), o usar un spec JSON")
+        return yaml.safe_load(text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise FlowSpecError(f"{path} no es JSON válido: {e}")
+
+
+_FLOW_CACHE = {}
+_FLOW_CACHE_LOCK = threading.Lock()
+
+
+def load_flow(path=None):
+    """Flujo compilado de path (o FORM_FLOW, o el flujo por defecto), cacheado mientras el archivo no cambie"""
+    path = os.path.abspath(os.path.expanduser(path or os.environ.get('FORM_FLOW') or DEFAULT_FLOW_PATH))
+    if not os.path.exists(path):
+        raise FlowSpecError(f"No existe el spec de flujo: {path}")
+    mtime = os.path.getmtime(path)
+    with _FLOW_CACHE_LOCK:
+        cached = _FLOW_CACHE.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        flow = compile_flow(read_spec(path), path)
+        _FLOW_CACHE[path] = (mtime, flow)
+    logging.info(f"🧭 Flujo '{flow.name}' compilado: {len(flow.sections)} secciones, "
+                 f"{sum(len(s.fields) for s in flow.sections)} campos")
+    return flow
+
+
+class FlowRunner:
+    """Ejecuta un CompiledFlow con los métodos del automatizador Selenium
+
+    El automatizador aporta la búsqueda con estrategias (caché y traza), las
+    esperas, las capturas y el manejo de errores; el runner solo recorre el
+    flujo. Devuelve lo mismo que fill_form_step_by_step.
+    """
+
+    def __init__(self, automator, flow):
+        self.automator = automator
+        self.flow = flow
+        self.driver = automator.driver
+        self.checkpoints = 1  # 01_inicial lo toma el automatizador
+
+    def checkpoint(self, name):
+        self.checkpoints += 1
+        self.automator.checkpoint(f"{self.checkpoints:02d}_{name}")
+
+    def run(self, values):
+        self.flow.validate_locators(self.driver)
+        for section in self.flow.sections:
+            logging.info(f"\n📄 === SECCIÓN {section.name.upper()} ===")
+            for field in section.fields:
+                if not self.fill_field(field, values):
+                    return False
+            if section.advance.action == 'next':
+                if not self.next_section(section.advance):
+                    return False
+            else:
+                return self.submit(section.advance)
+        return False
+
+    def find(self, item):
+        return self.automator.find_with_strategies(item.cache_key, item.strategies, item.timeout, item.label)
+
+    def fill_field(self, field, values):
+        automator = self.automator
+        automator.trace.begin_step(field.name)
+        value = field.value(values)
+        if value is None:
+            return automator.fail(f"No hay valor para el campo '{field.name}'")
+
+        element = self.find(field)
+        if not element and field.fallback == 'last_text_input':
+            element = self.last_text_input()
+        if not element:
+            return automator.fail(f"No se pudo encontrar: {field.label}", f"error_no_{field.name}_field")
+
+        logging.info(f"✍️ {field.label}: {value}")
+        if field.kind == 'text':
+            automator.type_like_human(element, value)
+            automator.waits.value_applied(f"{field.name} ingresado", 2, element, value)
+        elif field.kind == 'date':
+            self.driver.execute_script(SET_VALUE_SCRIPT, element, value)
+            automator.waits.value_applied(f"{field.name} ingresado", 2, element, value)
+        elif field.kind == 'dropdown':
+            if not automator.select_dropdown(element, value, field.name):
+                return False
+            automator.waits.selection_settled()
+        elif not self.choose(field, element, value):
+            return False
+        self.checkpoint(f"{field.name}_filled")
+        return True
+
+    def last_text_input(self):
+        """Último campo de texto (o input visible) de la sección"""
+        try:
+            logging.info("🔍 Buscando último campo de texto...")
+            text_fields = self.driver.find_elements(CSS, 'input[type="text"]')
+            if text_fields:
+                return text_fields[-1]
+            visible_inputs = [inp for inp in self.driver.find_elements(CSS, 'input') if inp.is_displayed()]
+            return visible_inputs[-1] if visible_inputs else None
+        except Exception as e:
+            logging.error(f"❌ Error buscando campo de texto alternativo: {e}")
+            return None
+
+    def choose(self, field, container, value):
+        """Marca radio/checkbox por etiqueta (checkbox: varios valores separados por ';')"""
+        labels = self.driver.execute_script(CHOICE_LABELS_SCRIPT, container, field.kind) or []
+        index = OptionIndex([label for label in labels if label])
+        wanted = [v.strip() for v in value.split(';') if v.strip()] if field.kind == 'checkbox' else [value]
+        for item in wanted:
+            match = index.resolve(item)
+            self.automator.trace.event('option', match.reason, wanted=item, option=match.option,
+                                       candidates=match.candidates, suggestions=match.suggestions)
+            if match.option is None:
+                return self.automator.fail(f"{field.label}: {match.describe()}", f"error_{field.name}_option")
+            self.driver.execute_script(CLICK_CHOICE_SCRIPT, container, field.kind, labels.index(match.option))
+        return True
+
+    def next_section(self, advance):
+        automator = self.automator
+        automator.trace.begin_step('siguiente')
+        button = self.find(advance)
+        if not button:
+            return automator.fail(f"No se encontró: {advance.label}", "error_no_next_button")
+        logging.info(f"👆 Haciendo click en {advance.label}...")
+        self.driver.execute_script("arguments[0].click();", button)
+        automator.waits.section_transition(button)
+        self.checkpoint("after_next")
+        return True
+
+    def submit(self, advance):
+        automator = self.automator
+        automator.trace.begin_step('enviar')
+        button = self.find(advance)
+        if not button:
+            return automator.fail(f"No se encontró: {advance.label}", "error_no_submit_button")
+        return automator.submit(button)
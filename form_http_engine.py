@@ -0,0 +1,288 @@
+# form_http_engine.py
+import json
+import logging
+import re
+import time
+
+import requests
+
+from form_chrome import USER_AGENT
+from form_option_index import OPTION_INDEXES
+from form_trace import RunTrace
+from form_verification import verify_response
+
+# Tipos de pregunta dentro de FB_PUBLIC_LOAD_DATA_
+QUESTION_TEXT = 0
+QUESTION_PARAGRAPH = 1
+QUESTION_RADIO = 2
+QUESTION_DROPDOWN = 3
+QUESTION_CHECKBOX = 4
+PAGE_BREAK = 8
+
+LOAD_DATA_PATTERN = re.compile(r'FB_PUBLIC_LOAD_DATA_\s*=\s*(.*?);\s*</script>', re.DOTALL)
+EMAIL_TITLE_PATTERN = re.compile(r'e-?mail|correo', re.IGNORECASE)
+NAME_TITLE_PATTERN = re.compile(r'nombre|name', re.IGNORECASE)
+DNI_TITLE_PATTERN = re.compile(r'dni|documento|document', re.IGNORECASE)
+
+
+class FormSchemaError(Exception):
+    """El formulario no tiene la forma que espera el motor HTTP"""
+
+
+def normalize_spaces(text):
+    return ' '.join((text or '').split())
+
+
+def base_form_url(form_url):
+    """URL del formulario sin /viewform ni parámetros"""
+    url = form_url.split('?', 1)[0].split('#', 1)[0].rstrip('/')
+    for suffix in ('/viewform', '/formResponse'):
+        if url.endswith(suffix):
+            url = url[:-len(suffix)]
+    return url
+
+
+class FormQuestion:
+    """Pregunta del formulario con su entry ID y opciones"""
+
+    def __init__(self, title, kind, entry_id, options, required, section):
+        self.title = title
+        self.kind = kind
+        self.entry_id = entry_id
+        self.options = options
+        self.required = required
+        self.section = section
+
+    @property
+    def field_name(self):
+        return f"entry.{self.entry_id}"
+
+    def __repr__(self):
+        return f"FormQuestion({self.title!r}, kind={self.kind}, entry={self.entry_id}, section={self.section})"
+
+
+class FormSchema:
+    """Estructura del formulario extraída de FB_PUBLIC_LOAD_DATA_"""
+
+    def __init__(self, questions, section_count, fbzx):
+        self.questions = questions
+        self.section_count = section_count
+        self.fbzx = fbzx
+
+    @classmethod
+    def from_html(cls, html):
+        match = LOAD_DATA_PATTERN.search(html)
+        if not match:
+            raise FormSchemaError("No se encontró FB_PUBLIC_LOAD_DATA_ en la página")
+        try:
+            data = json.loads(match.group(1))
+        except json.JSONDecodeError as e:
+            raise FormSchemaError(f"FB_PUBLIC_LOAD_DATA_ no es JSON válido: {e}")
+        return cls.from_load_data(data)
+
+    @classmethod
+    def from_load_data(cls, data):
+        try:
+            items = data[1][1] or []
+            fbzx = data[14] if len(data) > 14 else None
+        except (IndexError, TypeError, KeyError):
+            raise FormSchemaError("FB_PUBLIC_LOAD_DATA_ sin lista de preguntas")
+
+        questions = []
+        section = 0
+        for position, item in enumerate(items):
+            try:
+                kind = item[3] if len(item) > 3 else None
+                if kind == PAGE_BREAK:
+                    section += 1
+                    continue
+                if len(item) < 5 or not item[4]:
+                    continue  # Títulos, imágenes y otros elementos sin respuesta
+                answer = item[4][0]
+                options = [option[0] for option in (answer[1] or []) if option and option[0]]
+                questions.append(FormQuestion(
+                    title=normalize_spaces(item[1]),
+                    kind=kind,
+                    entry_id=answer[0],
+                    options=options,
+                    required=bool(answer[2]) if len(answer) > 2 else False,
+                    section=section,
+                ))
+            except (IndexError, TypeError, KeyError, AttributeError) as e:
+                # El motor HTTP se rinde con un error conocido y el modo auto sigue con Selenium
+                raise FormSchemaError(f"Elemento {position} de FB_PUBLIC_LOAD_DATA_ con forma inesperada: "
+                                      f"{type(e).__name__}: {e}")
+        return cls(questions, section + 1, str(fbzx) if fbzx is not None else None)
+
+    def find(self, pattern, kinds=None):
+        for question in self.questions:
+            if kinds and question.kind not in kinds:
+                continue
+            if pattern.search(question.title):
+                return question
+        return None
+
+    def resolve_fields(self):
+        """Identifica las preguntas de email, nombre y DNI (misma lógica que las estrategias Selenium)"""
+        text_kinds = (QUESTION_TEXT, QUESTION_PARAGRAPH)
+        email = self.find(EMAIL_TITLE_PATTERN, text_kinds)
+        name = next((q for q in self.questions if q.kind == QUESTION_DROPDOWN), None) \
+            or self.find(NAME_TITLE_PATTERN, (QUESTION_RADIO, QUESTION_DROPDOWN))
+        dni = self.find(DNI_TITLE_PATTERN, text_kinds)
+        if not dni:
+            # Igual que en Selenium: último campo de texto como DNI
+            candidates = [q for q in self.questions if q.kind in text_kinds and q is not email]
+            dni = candidates[-1] if candidates else None
+
+        if not name:
+            raise FormSchemaError("No se encontró la pregunta desplegable de nombres")
+        if not dni:
+            raise FormSchemaError("No se encontró la pregunta de DNI")
+
+        known = {id(q) for q in (email, name, dni) if q}
+        unanswered = [q.title for q in self.questions if q.required and id(q) not in known]
+        if unanswered:
+            raise FormSchemaError(f"Preguntas obligatorias sin dato: {', '.join(unanswered)}")
+        return email, name, dni
+
+
+class GoogleFormHttpAutomator:
+    """Envía el formulario directo a formResponse sin abrir un navegador
+
+    Tiene la misma interfaz que GitHubFormAutomator para poder usarse en el
+    modo batch. El esquema del formulario se descarga una sola vez.
+    """
+
+    def __init__(self, form_url, email, nombre, dni, timeout=20):
+        self.form_url = form_url
+        self.email = email
+        self.nombre = nombre
+        self.dni = dni
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.schema = None
+        self.screenshot_prefix = ''
+        self.last_error = None
+        self.trace = None
+        # True si el POST pudo haber quedado registrado (no conviene reintentar con otro motor)
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False  # El error depende de los datos (no conviene reintentar)
+        self.trace_listener = None
+
+    def set_identity(self, email, nombre, dni, row=None):
+        self.email = email
+        self.nombre = nombre
+        self.dni = dni
+        self.last_error = None
+        self.submitted = False
+
+    def is_driver_alive(self):
+        return True
+
+    def close(self):
+        self.session.close()
+
+    def fail(self, message):
+        logging.error(f"❌ {message}")
+        self.last_error = message
+        if self.trace:
+            self.trace.end_step('failed', error=message)
+        return False
+
+    def load_schema(self):
+        """Descarga la página del formulario y extrae su esquema (una vez por formulario)"""
+        if self.schema is None:
+            url = f"{base_form_url(self.form_url)}/viewform"
+            logging.info(f"📄 Descargando formulario: {url}")
+            with self.trace.span('http', 'viewform') as span:
+                response = self.session.get(url, timeout=self.timeout)
+                span['status'] = response.status_code
+            response.raise_for_status()
+            self.schema = FormSchema.from_html(response.text)
+            logging.info(f"✅ Esquema cargado: {len(self.schema.questions)} preguntas en {self.schema.section_count} secciones")
+        return self.schema
+
+    def match_option(self, question, value):
+        """Resuelve value contra el índice de opciones (cacheado por formulario)"""
+        index = OPTION_INDEXES.build(f"{base_form_url(self.form_url)}#{question.field_name}", question.options)
+        match = index.resolve(value)
+        if self.trace:
+            self.trace.event('option', match.reason, wanted=value, option=match.option,
+                             candidates=match.candidates, suggestions=match.suggestions)
+        return match
+
+    def build_payload(self):
+        email_question, name_question, dni_question = self.schema.resolve_fields()
+
+        match = self.match_option(name_question, self.nombre)
+        if match.option is None:
+            self.permanent = True
+            raise FormSchemaError(f"{match.describe()} ({len(name_question.options)} opciones en el desplegable)")
+
+        payload = {
+            name_question.field_name: match.option,
+            dni_question.field_name: self.dni,
+            'fvv': '1',
+            'pageHistory': ','.join(str(i) for i in range(self.schema.section_count)),
+        }
+        if email_question:
+            payload[email_question.field_name] = self.email
+        else:
+            # Email recolectado por el propio formulario
+            payload['emailAddress'] = self.email
+        if self.schema.fbzx:
+            payload['fbzx'] = self.schema.fbzx
+            payload['partialResponse'] = json.dumps([None, None, self.schema.fbzx])
+        return payload
+
+    def fill_form_step_by_step(self, keep_browser=False):
+        """Envía la respuesta multi-sección en uno o dos requests"""
+        start = time.monotonic()
+        self.last_error = None
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False
+        self.trace = RunTrace.start(f"{self.screenshot_prefix}http_")
+        self.trace.listener = self.trace_listener
+        try:
+            logging.info("🚀 === ENVÍO DIRECTO POR HTTP ===")
+            self.trace.begin_step('esquema')
+            self.load_schema()
+            payload = self.build_payload()
+            self.trace.begin_step('enviar')
+
+            url = f"{base_form_url(self.form_url)}/formResponse"
+            logging.info(f"📤 Enviando respuesta a {url}")
+            self.submitted = True
+            self.trace.event('submit', 'formResponse')
+            with self.trace.span('http', 'formResponse') as span:
+                response = self.session.post(url, data=payload, timeout=self.timeout)
+                span['status'] = response.status_code
+
+            self.verification = verify_response(response)
+            self.trace.event('verify', self.verification.state, reason=self.verification.reason,
+                             evidence=self.verification.evidence)
+            if self.verification.state == 'rejected':
+                # El formulario volvió sin registrar la respuesta: se puede reintentar
+                self.submitted = False
+                self.permanent = self.verification.permanent
+                return self.fail(f"Google rechazó el envío: {self.verification.describe()}")
+            if not self.verification.confirmed:
+                # submitted queda en True: la respuesta pudo haberse registrado
+                return self.fail(f"No se pudo confirmar el envío: {self.verification.describe()}")
+
+            self.confirmed = True
+            logging.info(f"🎉 ¡FORMULARIO ENVIADO POR HTTP en {time.monotonic() - start:.2f}s! ({self.verification.reason})")
+            return True
+        except FormSchemaError as e:
+            return self.fail(f"Esquema del formulario no compatible: {e}")
+        except requests.RequestException as e:
+            return self.fail(f"Error de red en el envío HTTP: {e}")
+        finally:
+            self.trace.finish('failed' if self.last_error else 'ok', error=self.last_error)
+            if not keep_browser:
+                self.close()
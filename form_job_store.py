@@ -0,0 +1,351 @@
+# form_job_store.py
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from form_batch import DEFAULT_REPORT_PATH, BatchRunner
+from form_roster import missing_fields
+
+DEFAULT_JOB_DB = '~/.cache/form-automation/jobs.sqlite3'
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BACKOFF_S = 30
+DEFAULT_BACKOFF_MAX_S = 600
+
+# pending/retry: por enviar; running: en curso; confirmed: Google confirmó;
+# needs_review: se hizo click en 'Enviar' sin confirmación (no se reintenta);
+# invalid: los datos no sirven para el formulario (nombre fuera de las opciones, rechazo
+# por validación), reintentar no cambia nada; failed: se agotaron los intentos
+JOB_STATES = ('pending', 'running', 'retry', 'confirmed', 'needs_review', 'invalid', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    form_url TEXT NOT NULL,
+    identity TEXT NOT NULL,
+    day TEXT NOT NULL,
+    row INTEGER,
+    email TEXT,
+    nombre TEXT,
+    dni TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_step TEXT,
+    submitted INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    confirmed_at REAL,
+    PRIMARY KEY (form_url, identity, day)
+);
+CREATE TABLE IF NOT EXISTS job_steps (
+    form_url TEXT NOT NULL,
+    identity TEXT NOT NULL,
+    day TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    outcome TEXT,
+    duration_s REAL,
+    at REAL NOT NULL
+);
+"""
+
+
+def identity_key(row):
+    """La persona se identifica por DNI (o email si no hay DNI)"""
+    return (row.get('dni') or row.get('email') or '').strip().lower()
+
+
+def today():
+    return time.strftime('%Y-%m-%d')
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_S, cap=DEFAULT_BACKOFF_MAX_S):
+    """Backoff exponencial con jitter: entre la mitad y el total de base * 2^(intento-1)"""
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class JobStore:
+    """Registro persistente de envíos por (formulario, persona, día) en SQLite
+
+    Guarda cada paso completado y si se llegó a hacer click en 'Enviar', así
+    un reinicio del proceso puede retomar el día sin enviar dos veces a una
+    persona ya confirmada.
+    """
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff_s=DEFAULT_BACKOFF_S,
+                 backoff_max_s=DEFAULT_BACKOFF_MAX_S):
+        self.path = os.path.expanduser(path)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, path):
+        return cls(
+            path,
+            max_attempts=int(os.environ.get('FORM_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)),
+            backoff_s=float(os.environ.get('FORM_JOB_BACKOFF_S', DEFAULT_BACKOFF_S)),
+            backoff_max_s=float(os.environ.get('FORM_JOB_BACKOFF_MAX_S', DEFAULT_BACKOFF_MAX_S)),
+        )
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def enqueue(self, form_url, rows, day):
+        """Agrega las filas del día; las que ya existen conservan su estado"""
+        now = time.time()
+        added = 0
+        with self._lock:
+            for row in rows:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO jobs (form_url, identity, day, row, email, nombre, dni, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (form_url, identity_key(row), day, row['row'], row['email'], row['nombre'], row['dni'], now, now))
+                added += cursor.rowcount
+        return added
+
+    def recover(self, form_url, day):
+        """Retoma trabajos que quedaron 'running' porque el proceso murió
+
+        Si ya se había hecho click en 'Enviar' no se reintenta: queda para revisar.
+        """
+        now = time.time()
+        with self._lock:
+            review = self._db.execute(
+                "UPDATE jobs SET status = 'needs_review', error = 'Proceso interrumpido después de enviar', updated_at = ? "
+                "WHERE form_url = ? AND day = ? AND status = 'running' AND submitted = 1", (now, form_url, day)).rowcount
+            retry = self._db.execute(
+                "UPDATE jobs SET status = 'retry', next_attempt_at = 0, updated_at = ? "
+                "WHERE form_url = ? AND day = ? AND status = 'running'", (now, form_url, day)).rowcount
+        if review or retry:
+            logging.warning(f"♻️ Trabajos interrumpidos: {retry} se reintentarán, {review} quedan para revisar")
+        return retry, review
+
+    def requeue_failed(self, form_url, day):
+        """Vuelve a encolar los trabajos que agotaron sus intentos (con intentos nuevos)"""
+        with self._lock:
+            count = self._db.execute(
+                "UPDATE jobs SET status = 'retry', attempts = 0, next_attempt_at = 0, updated_at = ? "
+                "WHERE form_url = ? AND day = ? AND status = 'failed' AND submitted = 0",
+                (time.time(), form_url, day)).rowcount
+        if count:
+            logging.info(f"🔁 {count} trabajos fallidos vuelven a la cola")
+        return count
+
+    def claim(self, form_url, day):
+        """Toma el próximo trabajo vencido y lo marca 'running' (o None)"""
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                job = self._db.execute(
+                    "SELECT * FROM jobs WHERE form_url = ? AND day = ? AND status IN ('pending', 'retry') "
+                    "AND next_attempt_at <= ? ORDER BY next_attempt_at, row LIMIT 1", (form_url, day, now)).fetchone()
+                if job:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, submitted = 0, updated_at = ? "
+                        "WHERE form_url = ? AND identity = ? AND day = ?", (now, form_url, job['identity'], day))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        if not job:
+            return None
+        job = dict(job)
+        job['attempts'] += 1
+        return job
+
+    def next_due(self, form_url, day):
+        """Segundos hasta el próximo reintento, 0 si hay algo listo, None si no queda nada"""
+        rows = self.execute(
+            "SELECT MIN(next_attempt_at) AS due, SUM(status = 'running') AS running FROM jobs "
+            "WHERE form_url = ? AND day = ? AND status IN ('pending', 'retry', 'running')", (form_url, day))
+        due, running = rows[0]['due'], rows[0]['running']
+        if due is None:
+            return None
+        return max(0.0, due - time.time()) if not running else min(1.0, max(0.0, due - time.time()))
+
+    def listener(self, job):
+        """Listener de la traza que persiste cada paso y el click en 'Enviar'"""
+        key = (job['form_url'], job['identity'], job['day'])
+
+        def on_event(record):
+            if record['kind'] == 'step':
+                self.execute(
+                    "INSERT INTO job_steps (form_url, identity, day, attempt, step, outcome, duration_s, at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + (job['attempts'], record['name'], record.get('outcome'), record.get('duration_s'), time.time()))
+                self.execute("UPDATE jobs SET last_step = ?, updated_at = ? WHERE form_url = ? AND identity = ? AND day = ?",
+                             (record['name'], time.time()) + key)
+            elif record['kind'] == 'submit':
+                # Se guarda antes de que Google responda: si el proceso muere acá no se reenvía
+                self.execute("UPDATE jobs SET submitted = 1, updated_at = ? WHERE form_url = ? AND identity = ? AND day = ?",
+                             (time.time(),) + key)
+
+        return on_event
+
+    def finish(self, job, success, submitted, confirmed, error, permanent=False):
+        """Cierra un intento y devuelve el nuevo estado
+
+        permanent: el error depende de los datos, no se gasta el resto de los intentos.
+        """
+        now = time.time()
+        next_attempt_at = 0
+        if success and confirmed:
+            status = 'confirmed'
+        elif submitted:
+            status = 'needs_review'
+            error = error or "Se hizo click en 'Enviar' pero no se vio la confirmación"
+        elif permanent:
+            status = 'invalid'
+        elif job['attempts'] >= self.max_attempts:
+            status = 'failed'
+        else:
+            status = 'retry'
+            delay = backoff_delay(job['attempts'], self.backoff_s, self.backoff_max_s)
+            next_attempt_at = now + delay
+            logging.info(f"⏳ {job['nombre']}: reintento {job['attempts'] + 1}/{self.max_attempts} en {delay:.0f}s")
+        self.execute(
+            "UPDATE jobs SET status = ?, error = ?, submitted = ?, next_attempt_at = ?, updated_at = ?, "
+            "confirmed_at = CASE WHEN ? = 'confirmed' THEN ? ELSE confirmed_at END "
+            "WHERE form_url = ? AND identity = ? AND day = ?",
+            (status, error, int(bool(submitted)), next_attempt_at, now, status, now,
+             job['form_url'], job['identity'], job['day']))
+        return status
+
+    def jobs(self, form_url, day):
+        return [dict(row) for row in self.execute(
+            "SELECT * FROM jobs WHERE form_url = ? AND day = ? ORDER BY row", (form_url, day))]
+
+    def close(self):
+        with self._lock:
+            # Pasa el WAL al archivo principal: el .sqlite3 solo ya queda completo (artefactos del workflow)
+            try:
+                self._db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ No se pudo consolidar el WAL de {self.path}: {e}")
+            self._db.close()
+
+
+class DurableBatchRunner(BatchRunner):
+    """Modo batch sobre el JobStore: reintenta con backoff y retoma tras un reinicio
+
+    Las personas ya confirmadas en el día no se vuelven a enviar. Con
+    retry_failed también se reintentan las que ya habían agotado sus intentos.
+    """
+
+    def __init__(self, form_url, rows, store, workers=2, report_path=DEFAULT_REPORT_PATH, engine='selenium', day=None,
+                 governor=None, retry_failed=False):
+        super().__init__(form_url, rows, workers=workers, report_path=report_path, engine=engine, governor=governor)
+        self.store = store
+        self.retry_failed = retry_failed
+        self.day = day or today()
+        self.invalid = []
+        self.durations = {}
+        self.verifications = {}
+        self.rows_by_identity = {identity_key(row): row for row in rows}
+
+    def next_job(self):
+        """Espera el próximo trabajo vencido; None cuando el día está terminado"""
+        while True:
+            job = self.store.claim(self.form_url, self.day)
+            if job:
+                return job
+            wait = self.store.next_due(self.form_url, self.day)
+            if wait is None:
+                return None
+            time.sleep(min(wait, 5) or 0.2)
+
+    def worker(self, worker_name):
+        automator = None
+        try:
+            while True:
+                job = self.next_job()
+                if job is None:
+                    return
+                # La fila del roster trae también las columnas extra que usa el flujo
+                row = self.rows_by_identity.get(job['identity']) or {
+                    'row': job['row'], 'email': job['email'], 'nombre': job['nombre'], 'dni': job['dni']}
+                if automator is None:
+                    try:
+                        automator = self.open_automator(row, worker_name)
+                    except Exception as e:
+                        # El trabajo vuelve a la cola (o falla) y el worker sigue con los demás
+                        error = f"No se pudo crear el automatizador: {type(e).__name__}: {e}"
+                        logging.error(f"💥 [{worker_name}] Fila {row['row']}: {error}")
+                        status = self.store.finish(job, False, False, False, error)
+                        logging.info(f"📝 [{worker_name}] Fila {row['row']}: {status}")
+                        self.close_automator(None, worker_name)
+                        continue
+                automator.trace_listener = self.store.listener(job)
+                logging.info(f"👷 [{worker_name}] Fila {row['row']} ({row['nombre']}), intento {job['attempts']}")
+                result = self.run_row(automator, row, worker_name)
+                with self._results_lock:
+                    self.durations[job['identity']] = self.durations.get(job['identity'], 0.0) + result['duration_s']
+                    self.verifications[job['identity']] = result['verification']
+                status = self.store.finish(job, result['status'] == 'ok', getattr(automator, 'submitted', False),
+                                           getattr(automator, 'confirmed', result['status'] == 'ok'), result['error'],
+                                           getattr(automator, 'permanent', False))
+                logging.info(f"📝 [{worker_name}] Fila {row['row']}: {status}")
+                automator = self.govern(automator, worker_name)
+        finally:
+            self.close_automator(automator, worker_name)
+
+    def run(self):
+        for row in self.rows:
+            missing = missing_fields(row)
+            if missing:
+                result = self.new_result(row, '-')
+                result['status'] = 'invalid'
+                result['error'] = f"Faltan campos: {', '.join(missing)}"
+                logging.error(f"❌ Fila {row['row']} inválida: {result['error']}")
+                self.invalid.append(result)
+        valid = [row for row in self.rows if not missing_fields(row)]
+        self.store.recover(self.form_url, self.day)
+        if self.retry_failed:
+            self.store.requeue_failed(self.form_url, self.day)
+        added = self.store.enqueue(self.form_url, valid, self.day)
+        logging.info(f"🗃️ Registro de trabajos {self.store.path}: {added} nuevos, {len(valid) - added} ya registrados hoy")
+
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=self.worker, args=(f"worker-{i}",), name=f"worker-{i}")
+            for i in range(1, self.workers + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        identities = {identity_key(row) for row in valid}
+        self.results = self.invalid + [self.job_result(job) for job in self.store.jobs(self.form_url, self.day)
+                                       if job['identity'] in identities]
+        self.results.sort(key=lambda r: r['row'])
+        self.write_report(time.monotonic() - start)
+        return self.results
+
+    def job_result(self, job):
+        return {
+            'row': job['row'],
+            'email': job['email'],
+            'nombre': job['nombre'],
+            'worker': None,
+            'status': 'ok' if job['status'] == 'confirmed' else job['status'],
+            'error': job['error'],
+            'attempts': job['attempts'],
+            'last_step': job['last_step'],
+            'verification': self.verifications.get(job['identity']),
+            'duration_s': round(self.durations.get(job['identity'], 0.0), 2),
+        }
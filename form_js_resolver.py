@@ -0,0 +1,103 @@
+# form_js_resolver.py
+import logging
+
+# Evalúa todas las estrategias dentro de la página y devuelve la primera que
+# encuentra un elemento visible y habilitado. Si ninguna coincide todavía,
+# espera con un MutationObserver hasta que el DOM cambie o venza el timeout.
+RESOLVE_FIELD_SCRIPT = """
+const [candidates, timeoutMs, done] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+const clickable = el => el && !el.disabled && el.getClientRects().length > 0
+    && getComputedStyle(el).visibility !== 'hidden';
+const locate = ([using, value]) => {
+    try {
+        if (using === 'css selector') return document.querySelector(value);
+        return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {
+        return null;
+    }
+};
+const resolve = () => {
+    for (let i = 0; i < candidates.length; i++) {
+        const el = locate(candidates[i]);
+        if (clickable(el)) return {element: el, position: i};
+    }
+    return null;
+};
+const found = resolve();
+if (found || timeoutMs <= 0) { done(found); return; }
+let finished = false;
+const finish = result => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(result);
+};
+const observer = new MutationObserver(() => {
+    const result = resolve();
+    if (result) finish(result);
+});
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+const timer = setTimeout(() => finish(resolve()), timeoutMs);
+"""
+
+# Busca la opción del desplegable por data-value o por texto normalizado de
+# sus spans, todo en una llamada (antes: un round trip por opción).
+RESOLVE_OPTION_SCRIPT = """
+const [wanted, timeoutMs, done] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+const target = norm(wanted);
+const resolve = () => {
+    for (const option of document.querySelectorAll('[role="option"]')) {
+        if (norm(option.getAttribute('data-value')) === target) return option;
+        for (const span of option.querySelectorAll('span')) {
+            if (norm(span.textContent) === target) return option;
+        }
+    }
+    return null;
+};
+const found = resolve();
+if (found || timeoutMs <= 0) { done(found); return; }
+const observer = new MutationObserver(() => {
+    const result = resolve();
+    if (result) { observer.disconnect(); clearTimeout(timer); done(result); }
+});
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+const timer = setTimeout(() => { observer.disconnect(); done(resolve()); }, timeoutMs);
+"""
+
+
+class JsFieldResolver:
+    """Resuelve un campo con un único execute_async_script en vez de una espera por estrategia"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, script, argument, timeout):
+        # El timeout de scripts tiene que cubrir la espera del MutationObserver
+        self.driver.set_script_timeout(timeout + 5)
+        return self.driver.execute_async_script(script, argument, int(timeout * 1000))
+
+    def resolve(self, strategies, timeout, order=None):
+        """Devuelve (elemento, índice de estrategia) o (None, None)
+
+        order permite probar primero una estrategia (p. ej. la de la caché).
+        """
+        order = order or list(range(len(strategies)))
+        candidates = [list(strategies[index]) for index in order]
+        try:
+            found = self.run(RESOLVE_FIELD_SCRIPT, candidates, timeout)
+        except Exception as e:
+            logging.warning(f"⚠️ Falló el resolvedor JS: {type(e).__name__}: {e}")
+            return None, None
+        if not found:
+            return None, None
+        return found['element'], order[found['position']]
+
+    def resolve_option(self, name, timeout):
+        """Elemento role="option" que corresponde a name, o None"""
+        try:
+            return self.run(RESOLVE_OPTION_SCRIPT, name, timeout)
+        except Exception as e:
+            logging.warning(f"⚠️ Falló la búsqueda JS de la opción: {type(e).__name__}: {e}")
+            return None
@@ -0,0 +1,141 @@
+# form_locator_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'form-automation', 'locators.json')
+DEFAULT_MAX_AGE_HOURS = 168  # Una semana
+TOUCH_INTERVAL_S = 3600  # Un acierto renueva la entrada como mucho una vez por hora (no en cada fila)
+
+# Resumen estructural de la sección visible: tipos de campo, roles y etiquetas
+# (sin valores, para que sea igual para todas las personas)
+DOM_FINGERPRINT_SCRIPT = """
+const parts = [];
+document.querySelectorAll('input, select, textarea, button, [role="listbox"], [role="combobox"], [role="button"]').forEach(el => {
+    parts.push([
+        el.tagName,
+        el.getAttribute('type') || '',
+        el.getAttribute('role') || '',
+        el.getAttribute('aria-label') || '',
+        el.getAttribute('name') || '',
+    ].join(':'));
+});
+return parts.join('|');
+"""
+
+# Un solo lock por proceso: los workers del modo batch comparten el archivo
+_file_lock = threading.Lock()
+
+
+def fingerprint_text(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class LocatorCache:
+    """Recuerda qué estrategia encontró cada campo para probarla primero
+
+    Las entradas se guardan por FORM_URL + huella del DOM de la sección, así
+    que un cambio en el diseño del formulario genera entradas nuevas y las
+    viejas caducan por edad.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age_seconds = max_age_hours * 3600
+        self.entries = self.read()
+
+    @classmethod
+    def from_env(cls):
+        """Crea la caché según FORM_LOCATOR_CACHE; devuelve None si está desactivada"""
+        path = os.environ.get('FORM_LOCATOR_CACHE', DEFAULT_CACHE_PATH)
+        if path.lower() in ('', '0', 'off', 'false', 'no'):
+            return None
+        max_age = float(os.environ.get('FORM_LOCATOR_CACHE_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS))
+        return cls(path, max_age)
+
+    @staticmethod
+    def key(form_url, fingerprint):
+        return f"{form_url}|{fingerprint}"
+
+    def read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"⚠️ Caché de localizadores ilegible, se ignora: {e}")
+            return {}
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get('saved_at', 0) <= self.max_age_seconds
+
+    def get(self, form_url, fingerprint, field):
+        """Devuelve la entrada vigente {index, by, selector} o None"""
+        entry = self.entries.get(self.key(form_url, fingerprint), {}).get(field)
+        if entry and self.is_fresh(entry):
+            return entry
+        return None
+
+    def update(self, mutate):
+        """Relee el archivo, aplica el cambio y lo guarda de forma atómica"""
+        with _file_lock:
+            entries = self.read()
+            mutate(entries)
+            # Limpiar entradas vencidas
+            for key in list(entries):
+                fields = {f: e for f, e in entries[key].items() if self.is_fresh(e)}
+                if fields:
+                    entries[key] = fields
+                else:
+                    del entries[key]
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning(f"⚠️ No se pudo guardar la caché de localizadores: {e}")
+            self.entries = entries
+
+    def put(self, form_url, fingerprint, field, index, by, selector):
+        entry = {'index': index, 'by': by, 'selector': selector, 'saved_at': time.time()}
+        self.update(lambda entries: entries.setdefault(self.key(form_url, fingerprint), {}).__setitem__(field, entry))
+
+    def touch(self, form_url, fingerprint, field):
+        """Renueva saved_at de una entrada que volvió a funcionar, para que no caduque por edad"""
+        entry = self.get(form_url, fingerprint, field)
+        if not entry or time.time() - entry.get('saved_at', 0) < TOUCH_INTERVAL_S:
+            return
+
+        def mutate(entries):
+            current = entries.get(self.key(form_url, fingerprint), {}).get(field)
+            if current and current.get('selector') == entry['selector']:
+                current['saved_at'] = time.time()
+        self.update(mutate)
+
+    def invalidate(self, form_url, fingerprint=None, field=None):
+        """Borra una entrada, todas las de una huella, o todas las del formulario"""
+        def mutate(entries):
+            for key in list(entries):
+                if not key.startswith(f"{form_url}|"):
+                    continue
+                if fingerprint and key != self.key(form_url, fingerprint):
+                    continue
+                if field:
+                    entries[key].pop(field, None)
+                else:
+                    del entries[key]
+        self.update(mutate)
+
+    def clear(self):
+        with _file_lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.entries = {}
@@ -0,0 +1,65 @@
+# form_locators.py
+"""Estrategias de búsqueda y scripts de página compartidos por todos los motores
+
+Se usan los nombres de localizador de WebDriver ('css selector' / 'xpath'),
+iguales a By.CSS_SELECTOR y By.XPATH, para no depender de selenium.
+"""
+
+CSS = 'css selector'
+XPATH = 'xpath'
+
+# Estrategias de búsqueda de cada campo, en orden de preferencia
+EMAIL_STRATEGIES = [
+    (CSS, 'input[type="email"]'),
+    (CSS, 'input[aria-label*="email" i]'),
+    (CSS, 'input[aria-label*="correo" i]'),
+    (CSS, 'input[name*="email" i]'),
+    (XPATH, '//input[contains(@aria-label, "email") or contains(@aria-label, "correo") or contains(@aria-label, "Email") or contains(@aria-label, "Correo")]'),
+    (XPATH, '//input[@type="text" or @type="email"][1]'),  # Primer campo de texto
+]
+
+NEXT_STRATEGIES = [
+    (XPATH, '//span[contains(text(), "Siguiente")]/../..'),
+    (XPATH, '//span[contains(text(), "Next")]/../..'),
+    (XPATH, '//div[@role="button" and contains(., "Siguiente")]'),
+    (XPATH, '//button[contains(., "Siguiente")]'),
+    (XPATH, '//*[contains(text(), "Siguiente")]/ancestor::*[@role="button" or @type="button" or contains(@class, "button")]'),
+]
+
+DROPDOWN_STRATEGIES = [
+    (CSS, 'select'),
+    (CSS, 'div[role="listbox"]'),
+    (CSS, 'div[role="combobox"]'),
+    (CSS, 'div[aria-haspopup="listbox"]'),
+    (XPATH, '//div[contains(@class, "dropdown") or contains(@class, "select")]'),
+]
+
+DNI_STRATEGIES = [
+    (CSS, 'input[aria-label*="dni" i]'),
+    (CSS, 'input[aria-label*="DNI"]'),
+    (CSS, 'input[aria-label*="documento" i]'),
+    (CSS, 'input[name*="dni" i]'),
+    (CSS, 'input[name*="document" i]'),
+    (XPATH, '//input[contains(@aria-label, "dni") or contains(@aria-label, "DNI") or contains(@aria-label, "documento") or contains(@aria-label, "Documento")]'),
+]
+
+SUBMIT_STRATEGIES = [
+    (XPATH, '//span[contains(text(), "Enviar")]/../..'),
+    (XPATH, '//span[contains(text(), "Submit")]/../..'),
+    (XPATH, '//div[@role="button" and contains(., "Enviar")]'),
+    (XPATH, '//button[contains(., "Enviar")]'),
+    (XPATH, '//input[@type="submit"]'),
+    (XPATH, '//*[contains(text(), "Enviar")]/ancestor::*[@role="button" or @type="button" or contains(@class, "button")]'),
+]
+
+# Estado de la página después de Enviar (arguments[0]: el botón clickeado): 'message' si se
+# registró, 'error' si hay validación, 'navigated' si el botón ya no está en la página.
+# La URL no sirve: en un formulario con secciones ya es formResponse antes del click.
+CONFIRMATION_STATE_SCRIPT = """
+if (document.querySelector('.freebirdFormviewerViewResponseConfirmationMessage, .vHW8K')) return 'message';
+if (document.querySelector('[role="alert"]:not(:empty), [aria-invalid="true"]')) return 'error';
+if (arguments[0] && !arguments[0].isConnected && document.readyState === 'complete') return 'navigated';
+return null;
+"""
+# Cuando el botón quedó en la página anterior (referencia vencida): la nueva ya cargó
+NAVIGATED_STATE_SCRIPT = "return document.readyState === 'complete' ? 'navigated' : null;"
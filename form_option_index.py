@@ -0,0 +1,184 @@
+# form_option_index.py
+import difflib
+import os
+import re
+import threading
+import unicodedata
+
+FUZZY_CUTOFF = 0.75
+FUZZY_ACCEPT_RATIO = 0.9
+FUZZY_MARGIN = 0.05
+MAX_SUGGESTIONS = 3
+
+# Opciones del desplegable recibido, no las de toda la página: con varios desplegables
+# en la misma sección cada uno tiene las suyas. Se buscan en el popup que apunta
+# aria-controls/aria-owns, dentro del desplegable o en su pregunta (role="listitem").
+DROPDOWN_OPTIONS_JS = """
+const dropdownOptions = dropdown => {
+    const popupId = dropdown.getAttribute('aria-controls') || dropdown.getAttribute('aria-owns');
+    const popup = popupId && document.getElementById(popupId);
+    for (const scope of [popup, dropdown, dropdown.closest('[role="listitem"]')]) {
+        const options = scope ? Array.from(scope.querySelectorAll('[role="option"]')) : [];
+        if (options.length) return options;
+    }
+    return [];
+};
+"""
+
+# Todas las opciones del dropdown en una sola llamada (select nativo o listbox de Google)
+OPTIONS_SCRIPT = DROPDOWN_OPTIONS_JS + """
+const dropdown = arguments[0];
+const norm = s => (s || '').replace(/\\s+/g, ' ').trim();
+if (dropdown && dropdown.tagName === 'SELECT') {
+    return Array.from(dropdown.options).filter(o => o.value !== '' && norm(o.text)).map(o => o.text);
+}
+return dropdownOptions(dropdown)
+    .map(o => o.getAttribute('data-value') || norm(o.textContent))
+    .filter(v => norm(v));
+"""
+
+# Selecciona la opción (select nativo o desplegable de Google) en una sola llamada.
+# Devuelve 'ok', 'missing' si no existe, o null si las opciones aún no se dibujaron.
+SELECT_OPTION_SCRIPT = DROPDOWN_OPTIONS_JS + """
+const [dropdown, wanted] = arguments;
+const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+if (dropdown.tagName === 'SELECT') {
+    const option = Array.from(dropdown.options).find(o => norm(o.text) === norm(wanted));
+    if (!option) return 'missing';
+    dropdown.value = option.value;
+    dropdown.dispatchEvent(new Event('change', {bubbles: true}));
+    return 'ok';
+}
+const options = dropdownOptions(dropdown);
+const option = options.find(o => norm(o.getAttribute('data-value')) === norm(wanted) || norm(o.textContent) === norm(wanted));
+if (!option) return options.length ? 'missing' : null;
+option.click();
+return 'ok';
+"""
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+
+
+def fold(text):
+    """Clave normalizada: sin acentos, sin mayúsculas, sin puntuación y con espacios simples"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(PUNCTUATION_PATTERN.sub(' ', without_accents.casefold()).split())
+
+
+def token_key(text):
+    """Clave independiente del orden de las palabras ("Pérez José" == "José Pérez")"""
+    return ' '.join(sorted(fold(text).split()))
+
+
+def fuzzy_enabled():
+    return os.environ.get('FORM_OPTION_FUZZY', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class OptionMatch:
+    """Resultado de buscar un nombre en el índice"""
+
+    def __init__(self, wanted, option=None, reason='sin coincidencia', candidates=None, suggestions=None):
+        self.wanted = wanted
+        self.option = option
+        self.reason = reason
+        self.candidates = candidates or []
+        self.suggestions = suggestions or []
+
+    @property
+    def ambiguous(self):
+        return self.option is None and len(self.candidates) > 1
+
+    def describe(self):
+        if self.option is not None:
+            return f"'{self.wanted}' -> '{self.option}' ({self.reason})"
+        if self.ambiguous:
+            return f"'{self.wanted}' es ambiguo entre: {', '.join(repr(c) for c in self.candidates)}"
+        hint = f"; ¿quisiste decir {', '.join(repr(s) for s in self.suggestions)}?" if self.suggestions else ''
+        return f"'{self.wanted}' no está entre las opciones{hint}"
+
+
+class OptionIndex:
+    """Índice de las opciones del dropdown con claves normalizadas
+
+    Busca en orden: texto exacto, clave sin acentos/mayúsculas/espacios y clave
+    con las palabras ordenadas. Si nada coincide sugiere las opciones más
+    parecidas (y con FORM_OPTION_FUZZY=1 acepta una si no hay dudas).
+    """
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.exact = {}
+        self.folded = {}
+        self.tokens = {}
+        for option in self.options:
+            self.exact.setdefault(option, option)
+            self.add(self.folded, fold(option), option)
+            self.add(self.tokens, token_key(option), option)
+
+    @staticmethod
+    def add(table, key, option):
+        entries = table.setdefault(key, [])
+        if option not in entries:
+            entries.append(option)
+
+    def __len__(self):
+        return len(self.options)
+
+    def resolve(self, wanted, accept_fuzzy=None):
+        if wanted in self.exact:
+            return OptionMatch(wanted, wanted, 'exacta')
+        for reason, table, key in (('normalizada', self.folded, fold(wanted)),
+                                   ('palabras', self.tokens, token_key(wanted))):
+            candidates = table.get(key, [])
+            if len(candidates) == 1:
+                return OptionMatch(wanted, candidates[0], reason)
+            if candidates:
+                return OptionMatch(wanted, reason='ambigua', candidates=candidates)
+
+        ranked = self.suggest(wanted)
+        accept = fuzzy_enabled() if accept_fuzzy is None else accept_fuzzy
+        if accept and ranked and ranked[0][0] >= FUZZY_ACCEPT_RATIO:
+            if len(ranked) == 1 or ranked[0][0] - ranked[1][0] >= FUZZY_MARGIN:
+                return OptionMatch(wanted, ranked[0][1], f"aproximada {ranked[0][0]:.2f}")
+        return OptionMatch(wanted, suggestions=[option for _, option in ranked])
+
+    def suggest(self, wanted, limit=MAX_SUGGESTIONS):
+        """[(similitud, opción)] de mayor a menor, comparando claves con palabras ordenadas"""
+        key = token_key(wanted)
+        ranked = []
+        for candidate_key, options in self.tokens.items():
+            ratio = difflib.SequenceMatcher(None, key, candidate_key).ratio()
+            if ratio >= FUZZY_CUTOFF:
+                ranked.extend((round(ratio, 3), option) for option in options)
+        ranked.sort(key=lambda item: -item[0])
+        return ranked[:limit]
+
+
+class OptionIndexCache:
+    """Índices por formulario, compartidos entre envíos del mismo proceso (batch, daemon)"""
+
+    def __init__(self):
+        self.indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, form_url):
+        with self._lock:
+            return self.indexes.get(form_url)
+
+    def build(self, form_url, options):
+        """Devuelve el índice cacheado si las opciones no cambiaron, o uno nuevo"""
+        options = list(options)
+        with self._lock:
+            index = self.indexes.get(form_url)
+            if index is None or index.options != options:
+                index = OptionIndex(options)
+                self.indexes[form_url] = index
+            return index
+
+    def invalidate(self, form_url):
+        with self._lock:
+            self.indexes.pop(form_url, None)
+
+
+OPTION_INDEXES = OptionIndexCache()
@@ -0,0 +1,68 @@
+# form_proc_stats.py
+import os
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def read_stat(pid):
+    """Devuelve (ppid, cpu_segundos, rss_bytes) de /proc/<pid>/stat o None"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # El nombre del proceso va entre paréntesis y puede tener espacios
+    fields = data[data.rindex(')') + 2:].split()
+    ppid = int(fields[1])
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    rss = int(fields[21]) * PAGE_SIZE
+    return ppid, cpu, rss
+
+
+def process_tree(root_pid):
+    """PIDs de root_pid y todos sus descendientes"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        stat = read_stat(int(entry))
+        if stat:
+            children.setdefault(stat[0], []).append(int(entry))
+    pids = []
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+def tree_usage(root_pid):
+    """(rss_bytes, cpu_segundos) sumados de todo el árbol de procesos"""
+    rss = 0
+    cpu = 0.0
+    for pid in process_tree(root_pid):
+        stat = read_stat(pid)
+        if stat:
+            cpu += stat[1]
+            rss += stat[2]
+    return rss, cpu
+
+
+def driver_root_pid(driver):
+    """PID de chromedriver (raíz del árbol de Chrome) o None"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def host_memory():
+    """(total_bytes, disponible_bytes) según /proc/meminfo"""
+    values = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            values[key] = int(rest.split()[0]) * 1024
+    return values.get('MemTotal', 0), values.get('MemAvailable', values.get('MemFree', 0))
@@ -0,0 +1,284 @@
+# form_resources.py
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from form_proc_stats import driver_root_pid, host_memory, tree_usage
+
+# Límites de Chrome para correr varias sesiones en un runner chico (FORM_CHROME_LIMITS=1)
+DEFAULT_WINDOW_SIZE = '1280,800'
+DEFAULT_RENDERER_LIMIT = 2
+DEFAULT_JS_HEAP_MB = 256
+
+# Gobernador de recursos (FORM_RESOURCE_GOVERNOR=1)
+DEFAULT_SESSION_MB = 400  # Estimación por sesión hasta medir la primera
+DEFAULT_RESERVE_MB = 512  # Memoria que siempre queda libre para el sistema
+DEFAULT_MAX_SESSION_RSS_MB = 900
+DEFAULT_CPU_PER_SESSION = 0.5  # Núcleos que usa una sesión mientras llena el formulario
+ADMIT_POLL_S = 1.0
+MB = 2**20
+
+
+def env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def session_driver(automator):
+    """Driver de Selenium del automatizador (en modo auto, el del respaldo si ya arrancó) o None"""
+    return getattr(automator, 'driver', None)
+
+
+class ResourceLimits:
+    """Argumentos de Chrome que acotan memoria y procesos por sesión
+
+    - FORM_CHROME_LIMITS=1: activa los límites.
+    - FORM_CHROME_WINDOW: tamaño de la ventana (1280,800 en lugar de 1920,1080).
+    - FORM_CHROME_RENDERER_LIMIT: máximo de procesos renderer (2).
+    - FORM_CHROME_JS_HEAP_MB: heap máximo de V8 por renderer (256 MB).
+    """
+
+    def __init__(self, window_size=DEFAULT_WINDOW_SIZE, renderer_limit=DEFAULT_RENDERER_LIMIT, js_heap_mb=DEFAULT_JS_HEAP_MB):
+        if renderer_limit < 1:
+            raise ValueError(f"El límite de renderers debe ser al menos 1 (recibido: {renderer_limit})")
+        if js_heap_mb < 64:
+            raise ValueError(f"El heap de JS debe ser de al menos 64 MB (recibido: {js_heap_mb})")
+        self.window_size = window_size
+        self.renderer_limit = renderer_limit
+        self.js_heap_mb = js_heap_mb
+
+    @classmethod
+    def from_env(cls):
+        """Límites configurados o None si FORM_CHROME_LIMITS no está activo"""
+        if not env_flag('FORM_CHROME_LIMITS'):
+            return None
+        return cls(
+            window_size=os.environ.get('FORM_CHROME_WINDOW', DEFAULT_WINDOW_SIZE),
+            renderer_limit=int(os.environ.get('FORM_CHROME_RENDERER_LIMIT', DEFAULT_RENDERER_LIMIT)),
+            js_heap_mb=int(os.environ.get('FORM_CHROME_JS_HEAP_MB', DEFAULT_JS_HEAP_MB)),
+        )
+
+    def arguments(self):
+        return [
+            "--process-per-site",
+            f"--renderer-process-limit={self.renderer_limit}",
+            # Sin aislamiento por sitio: los iframes de Google no abren renderers propios
+            "--disable-features=IsolateOrigins,site-per-process",
+            f"--js-flags=--max-old-space-size={self.js_heap_mb}",
+        ]
+
+    def apply(self, chrome_options):
+        for argument in self.arguments():
+            chrome_options.add_argument(argument)
+
+
+class ResourceGovernor:
+    """Admite sesiones de Chrome solo si el host tiene memoria libre y recicla las que crecen
+
+    Mide RSS y CPU del árbol de procesos de cada driver en /proc. La memoria
+    estimada por sesión arranca en session_mb y pasa a ser el mayor RSS medido.
+    Siempre admite una sesión si no hay ninguna activa, para no trabar el batch.
+
+    - FORM_RESOURCE_GOVERNOR=1: activa el gobernador.
+    - FORM_RESOURCE_RESERVE_MB: memoria que siempre queda libre (512 MB).
+    - FORM_RESOURCE_SESSION_MB: estimación inicial por sesión (400 MB).
+    - FORM_RESOURCE_MAX_RSS_MB: RSS a partir del cual se recicla una sesión (900 MB).
+    - FORM_RESOURCE_MAX_SESSIONS: tope fijo de sesiones (sin tope por defecto).
+    """
+
+    def __init__(self, reserve_mb=DEFAULT_RESERVE_MB, session_mb=DEFAULT_SESSION_MB,
+                 max_rss_mb=DEFAULT_MAX_SESSION_RSS_MB, max_sessions=None, cpu_per_session=DEFAULT_CPU_PER_SESSION):
+        self.reserve_mb = reserve_mb
+        self.session_mb = session_mb
+        self.max_rss_mb = max_rss_mb
+        self.max_sessions = max_sessions
+        self.cpu_per_session = cpu_per_session
+        self.active = set()
+        self.samples = {}  # sesión -> {'rss_mb', 'cpu_pct', 'cpu_s', 'at'}
+        self.peak_mb = 0.0
+        self.stats = {'admitted': 0, 'waited': 0, 'refused': 0, 'recycled': 0}
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        """Gobernador configurado o None si FORM_RESOURCE_GOVERNOR no está activo"""
+        if not env_flag('FORM_RESOURCE_GOVERNOR'):
+            return None
+        return cls(
+            reserve_mb=float(os.environ.get('FORM_RESOURCE_RESERVE_MB', DEFAULT_RESERVE_MB)),
+            session_mb=float(os.environ.get('FORM_RESOURCE_SESSION_MB', DEFAULT_SESSION_MB)),
+            max_rss_mb=float(os.environ.get('FORM_RESOURCE_MAX_RSS_MB', DEFAULT_MAX_SESSION_RSS_MB)),
+            max_sessions=int(os.environ['FORM_RESOURCE_MAX_SESSIONS']) if os.environ.get('FORM_RESOURCE_MAX_SESSIONS') else None,
+        )
+
+    @property
+    def estimate_mb(self):
+        return max(self.session_mb, self.peak_mb)
+
+    def headroom_mb(self):
+        """Memoria disponible del host descontando la reserva"""
+        _, available = host_memory()
+        return available / MB - self.reserve_mb
+
+    def can_admit(self):
+        if not self.active:
+            return True
+        if self.max_sessions and len(self.active) >= self.max_sessions:
+            return False
+        # Las sesiones admitidas que todavía no abrieron Chrome aún no se ven en /proc/meminfo
+        starting = sum(1 for name in self.active if name not in self.samples)
+        return self.headroom_mb() - starting * self.estimate_mb >= self.estimate_mb
+
+    def admit(self, name, timeout=None):
+        """Reserva un lugar para la sesión; espera hasta timeout (None: sin límite)
+
+        Devuelve False si no hubo lugar a tiempo.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        with self._cond:
+            if name in self.active:
+                return True  # Ya tiene su lugar (p. ej. el respaldo Selenium que vuelve a abrir Chrome)
+            while not self.can_admit():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.stats['refused'] += 1
+                    return False
+                if not waited:
+                    waited = True
+                    self.stats['waited'] += 1
+                    logging.info(f"⏳ [{name}] Esperando memoria libre ({self.headroom_mb():.0f} MB disponibles, "
+                                 f"~{self.estimate_mb:.0f} MB por sesión, {len(self.active)} activas)")
+                # La memoria del host cambia sin avisar: se vuelve a mirar cada tanto
+                self._cond.wait(ADMIT_POLL_S if remaining is None else min(ADMIT_POLL_S, remaining))
+            self.active.add(name)
+            self.stats['admitted'] += 1
+            return True
+
+    def release(self, name):
+        with self._cond:
+            self.active.discard(name)
+            self.samples.pop(name, None)
+            self._cond.notify_all()
+
+    def observe(self, name, driver):
+        """Mide RSS (MB) y CPU (%) del árbol de procesos del driver; None si no hay driver"""
+        pid = driver_root_pid(driver) if driver else None
+        if not pid:
+            return None
+        rss, cpu_s = tree_usage(pid)
+        now = time.monotonic()
+        with self._cond:
+            previous = self.samples.get(name)
+            cpu_pct = 0.0
+            if previous and now > previous['at']:
+                cpu_pct = max(0.0, (cpu_s - previous['cpu_s']) / (now - previous['at']) * 100)
+            sample = {'rss_mb': rss / MB, 'cpu_pct': cpu_pct, 'cpu_s': cpu_s, 'at': now}
+            self.samples[name] = sample
+            self.peak_mb = max(self.peak_mb, sample['rss_mb'])
+        return sample
+
+    def recycle_reason(self, name, driver):
+        """Motivo para reciclar la sesión ahora o None"""
+        sample = self.observe(name, driver)
+        if sample is None:
+            return None
+        if sample['rss_mb'] > self.max_rss_mb:
+            reason = f"{sample['rss_mb']:.0f} MB de RSS"
+        elif len(self.active) > 1 and self.headroom_mb() < 0:
+            # Con el host sin memoria se libera la sesión antes de que lo haga el OOM killer
+            reason = f"host sin memoria ({self.headroom_mb():.0f} MB sobre la reserva)"
+        else:
+            return None
+        with self._cond:
+            self.stats['recycled'] += 1
+        return reason
+
+    def safe_concurrency(self, browser=True):
+        """Sesiones que entran en el host ahora, por memoria y por CPU (al menos 1)
+
+        Con browser=False (motores http y auto) no se cuenta la memoria de Chrome.
+        """
+        limit = int((os.cpu_count() or 1) / self.cpu_per_session)
+        if browser:
+            with self._cond:
+                in_use_mb = sum(sample['rss_mb'] for sample in self.samples.values())
+            limit = min(limit, int((self.headroom_mb() + in_use_mb) // self.estimate_mb))
+        if self.max_sessions:
+            limit = min(limit, self.max_sessions)
+        return max(1, limit)
+
+    def snapshot(self):
+        with self._cond:
+            stats = dict(self.stats)
+            stats['active'] = len(self.active)
+            stats['sessions'] = {name: {'rss_mb': round(s['rss_mb'], 1), 'cpu_pct': round(s['cpu_pct'], 1)}
+                                 for name, s in self.samples.items()}
+        stats['estimate_mb'] = round(self.estimate_mb, 1)
+        stats['headroom_mb'] = round(self.headroom_mb(), 1)
+        return stats
+
+
+def probe_concurrency(form_url, engine='selenium', governor=None, limit=None):
+    """Abre sesiones de a una con el formulario cargado hasta que el host no admita más
+
+    Devuelve las mediciones y la concurrencia recomendada para este host.
+    """
+    # Import diferido: medir no debería cargar selenium hasta abrir el primer Chrome
+    from form_automation_github import build_automator
+
+    governor = governor or ResourceGovernor()
+    limit = limit or governor.safe_concurrency() * 2
+    automators = []
+    sessions = []
+    try:
+        for i in range(1, limit + 1):
+            name = f"probe-{i}"
+            if not governor.admit(name, timeout=0):
+                logging.info(f"🧪 Sin memoria para la sesión {i}: {governor.headroom_mb():.0f} MB disponibles")
+                break
+            automator = build_automator(engine, form_url, 'probe@localhost', 'probe', '0')
+            automators.append(automator)
+            browser = getattr(automator, 'selenium', automator)
+            browser.chrome_slot = name
+            start = time.monotonic()
+            browser.setup_chrome_driver()
+            browser.driver.get(form_url)
+            sample = governor.observe(name, browser.driver) or {'rss_mb': 0.0}
+            sessions.append({'session': name, 'rss_mb': round(sample['rss_mb'], 1),
+                             'startup_s': round(time.monotonic() - start, 2)})
+            logging.info(f"🧪 Sesión {i}: {sample['rss_mb']:.0f} MB, {governor.headroom_mb():.0f} MB libres sobre la reserva")
+    finally:
+        for automator in automators:
+            automator.close()
+    return {
+        'sessions_opened': len(sessions),
+        'session_mb': round(governor.estimate_mb, 1),
+        'recommended_workers': max(1, min(len(sessions), governor.safe_concurrency())),
+        'cpu_count': os.cpu_count(),
+        'sessions': sessions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide cuántas sesiones de Chrome entran en este host")
+    parser.add_argument('--engine', choices=('selenium', 'auto'), default='selenium')
+    parser.add_argument('--limit', type=int, help="Máximo de sesiones a abrir (por defecto el doble de la estimación)")
+    parser.add_argument('--output', help="Ruta del JSON con el resultado")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    form_url = os.environ.get('FORM_URL')
+    if not form_url:
+        raise ValueError("Faltan estas variables de entorno: FORM_URL")
+    result = probe_concurrency(form_url, args.engine, ResourceGovernor.from_env(), args.limit)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
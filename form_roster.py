@@ -0,0 +1,64 @@
+# form_roster.py
+import csv
+import json
+import os
+
+# Nombres de columna aceptados para cada dato de la persona
+COLUMN_ALIASES = {
+    'email': ('email', 'correo', 'mail'),
+    'nombre': ('nombre', 'name', 'apellido y nombre'),
+    'dni': ('dni', 'documento', 'document'),
+}
+
+
+def normalize_row(raw, row_number):
+    """Normaliza una fila del roster a un dict con email, nombre y dni
+
+    Las columnas extra se conservan (en minúsculas) para usarlas como
+    fuente de valores en otros campos.
+    """
+    row = {str(k).strip().lower(): (str(v).strip() if v is not None else '') for k, v in raw.items() if k is not None}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if row.get(alias):
+                row[field] = row[alias]
+                break
+        else:
+            row.setdefault(field, '')
+    row['row'] = row_number
+    return row
+
+
+def missing_fields(row):
+    """Devuelve los campos obligatorios que faltan en una fila"""
+    return [field.upper() for field in COLUMN_ALIASES if not row.get(field)]
+
+
+def load_roster(path):
+    """Carga un roster CSV o JSONL y devuelve la lista de filas normalizadas"""
+    if not os.path.exists(path):
+        raise ValueError(f"No existe el archivo de roster: {path}")
+
+    rows = []
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    raw = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Línea {line_number} del roster no es JSON válido: {e}")
+                rows.append(normalize_row(raw, line_number))
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            # La fila 1 es el encabezado, los datos empiezan en la 2
+            for line_number, raw in enumerate(csv.DictReader(f), 2):
+                if not any((v or '').strip() for v in raw.values() if isinstance(v, str)):
+                    continue
+                rows.append(normalize_row(raw, line_number))
+
+    if not rows:
+        raise ValueError(f"El roster {path} no tiene filas")
+    return rows
@@ -0,0 +1,548 @@
+# form_selenium_engine.py
+import json
+import os
+import time
+import logging
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.keys import Keys # Importar Keys para simular teclas
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+from form_capture import CaptureBuffer
+from form_chrome import ChromeLaunchProfile
+from form_config import resolve_identity, lookup_mode_from_env
+from form_fixture import FixtureRecorder
+from form_flow import FlowRunner, load_flow
+from form_js_resolver import JsFieldResolver
+from form_locator_cache import DOM_FINGERPRINT_SCRIPT, LocatorCache, fingerprint_text
+from form_option_index import OPTION_INDEXES, OPTIONS_SCRIPT, SELECT_OPTION_SCRIPT
+from form_trace import RunTrace
+from form_verification import verify_page
+from form_waits import PacingProfile, ReadinessWaiter, StepTimings
+
+IMPLICIT_WAIT_S = 10
+RACE_POLL_S = 0.1
+
+class GitHubFormAutomator:
+    def __init__(self, form_url=None, email=None, nombre=None, dni=None):
+        # Obtener datos desde argumentos o variables de entorno (GitHub Secrets)
+        self.form_url, self.email, self.nombre, self.dni = resolve_identity(form_url, email, nombre, dni)
+        
+        self.driver = None
+        self.screenshot_prefix = ''  # Evita pisar screenshots entre filas del modo batch
+        self.last_error = None
+        self.locator_cache = LocatorCache.from_env()
+        self.capture = CaptureBuffer.from_env()
+        self.recorder = FixtureRecorder.from_env()  # Graba un bundle para reproducir sin red (FORM_RECORD)
+        self.chrome_profile = ChromeLaunchProfile.from_env()
+        self.chrome_slot = None  # Subcarpeta de perfil propia en el modo batch
+        self.lookup_mode = lookup_mode_from_env()
+        self.js_resolver = None
+        self.flow_path = os.environ.get('FORM_FLOW')  # None: flows/default_flow.json
+        self.row = {}  # Columnas extra del roster, fuente de valores del flujo
+        self.pacing = PacingProfile.from_env()
+        self.timings = None
+        self.waits = None
+        self.trace = None
+        self.trace_listener = None
+        # submitted: se hizo click en 'Enviar'; confirmed: se vio la confirmación de Google
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False  # El error depende de los datos (no conviene reintentar)
+        self.capture_devtools_log = os.environ.get('FORM_TRACE_CDP', '').lower() in ('1', 'true', 'yes')
+        logging.info(f"✅ Configuración cargada - Email: {self.email}, Nombre: {self.nombre}")
+
+    def set_identity(self, email, nombre, dni, row=None):
+        """Cambia la persona a firmar sin cerrar el navegador (modo batch)"""
+        self.email = email
+        self.nombre = nombre
+        self.dni = dni
+        self.row = row or {}
+        self.last_error = None
+
+    def flow_values(self):
+        """Valores que el flujo puede tomar con 'column': fila del roster más email, nombre y dni"""
+        values = dict(self.row)
+        values.update(email=self.email, nombre=self.nombre, dni=self.dni)
+        return values
+
+    def is_driver_alive(self):
+        """Verifica que el navegador siga respondiendo"""
+        if not self.driver:
+            return False
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """Cierra el navegador si está abierto"""
+        if self.driver:
+            logging.info("🔚 Cerrando navegador...")
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.warning(f"⚠️ Error al cerrar navegador: {e}")
+            self.driver = None
+        
+    def setup_chrome_driver(self):
+        """Configura Chrome para GitHub Actions"""
+        if self.trace:
+            with self.trace.span('chrome', 'setup'):
+                return self._setup_chrome_driver()
+        return self._setup_chrome_driver()
+
+    def _setup_chrome_driver(self):
+        chrome_options = Options()
+        
+        # Opciones para GitHub Actions, anti-detección, modo liviano y perfil reutilizable
+        self.chrome_profile.apply(chrome_options, self.chrome_slot)
+        
+        # Log de performance/red de DevTools (opcional, FORM_TRACE_CDP=1)
+        if self.capture_devtools_log:
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        
+        # Inicializar driver
+        service = Service()  # ChromeDriver se instala automáticamente
+        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        
+        # Configurar timeouts
+        self.driver.implicitly_wait(IMPLICIT_WAIT_S)
+        self.driver.set_page_load_timeout(30)
+        
+        # Ocultar propiedades de webdriver
+        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        
+        self.chrome_profile.after_start(self.driver)
+        
+        logging.info("✅ Chrome configurado correctamente")
+        
+    def take_screenshot(self, name):
+        """Toma screenshot para debugging"""
+        if self.trace:
+            with self.trace.span('screenshot', name):
+                return self._take_screenshot(name)
+        return self._take_screenshot(name)
+
+    def _take_screenshot(self, name):
+        try:
+            filename = f"{self.capture_path(name)}.png"
+            self.driver.save_screenshot(filename)
+            logging.info(f"📸 Screenshot guardado: {filename}")
+        except Exception as e:
+            logging.error(f"❌ Error al tomar screenshot: {e}")
+
+    def capture_path(self, name):
+        return f"/tmp/form_{self.screenshot_prefix}{name}"
+
+    def checkpoint(self, name):
+        """Punto de control de un paso exitoso según FORM_CAPTURE
+
+        'always' guarda un screenshot; 'on-error' solo guarda el DOM en memoria
+        por si un paso posterior falla; 'none' no hace nada.
+        """
+        if self.recorder:
+            self.recorder.checkpoint(name, self.driver)
+        if self.capture.policy == 'always':
+            self.take_screenshot(name)
+        elif self.capture.policy == 'on-error':
+            try:
+                self.capture.record(name, self.driver.page_source)
+            except Exception as e:
+                logging.warning(f"⚠️ No se pudo guardar el snapshot {name}: {e}")
+
+    def capture_failure(self, name):
+        """Vuelca los snapshots recientes y toma el screenshot del error"""
+        if self.capture.policy == 'none' or not self.driver:
+            return
+        self.capture.flush(self.capture_path)
+        self.take_screenshot(name)
+            
+    def wait_and_find_element(self, by, value, timeout=15, screenshot_name=None):
+        """Busca un elemento con timeout y manejo de errores"""
+        try:
+            logging.info(f"🔍 Buscando elemento: {value}")
+            element = WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((by, value))
+            )
+            logging.info(f"✅ Elemento encontrado: {value}")
+            return element
+        except Exception as e:
+            logging.error(f"❌ No se encontró elemento {value}: {e}")
+            if screenshot_name:
+                self.capture_failure(f"error_{screenshot_name}")
+            return None
+            
+    def dom_fingerprint(self):
+        """Huella de la estructura de la sección actual (para la caché de localizadores)"""
+        try:
+            return fingerprint_text(self.driver.execute_script(DOM_FINGERPRINT_SCRIPT) or '')
+        except Exception as e:
+            logging.warning(f"⚠️ No se pudo calcular la huella del DOM: {e}")
+            return None
+
+    def find_with_strategies(self, field, strategies, timeout, label):
+        """Busca un campo con sus estrategias, empezando por la que funcionó la última vez
+
+        FORM_LOOKUP elige cómo: 'cascade' (una espera por estrategia, en orden),
+        'js' (todas las estrategias evaluadas en la página en una sola llamada)
+        o 'race' (todas sondeadas juntas contra un único plazo).
+        """
+        fingerprint = self.dom_fingerprint() if self.locator_cache else None
+        cached = self.locator_cache.get(self.form_url, fingerprint, field) if fingerprint else None
+
+        order = list(range(len(strategies)))
+        cached_index = None
+        if cached and 0 <= cached['index'] < len(strategies) and list(strategies[cached['index']]) == [cached['by'], cached['selector']]:
+            cached_index = cached['index']
+            order.remove(cached_index)
+            order.insert(0, cached_index)
+            logging.info(f"⚡ {label}: probando primero la estrategia {cached_index + 1} (caché)")
+
+        if self.lookup_mode == 'js':
+            element, index = self.lookup_js(field, strategies, timeout, label, order, cached_index)
+        elif self.lookup_mode == 'race':
+            element, index = self.lookup_race(field, strategies, timeout, label, order, cached_index)
+        else:
+            element, index = self.lookup_cascade(field, strategies, timeout, label, order, cached_index)
+
+        if element is not None and fingerprint and index != cached_index:
+            by, selector = strategies[index]
+            self.locator_cache.put(self.form_url, fingerprint, field, index, by, selector)
+        elif element is not None and fingerprint:
+            self.locator_cache.touch(self.form_url, fingerprint, field)
+        elif element is None and cached_index is not None:
+            # La estrategia cacheada ya no sirve para esta huella
+            self.locator_cache.invalidate(self.form_url, fingerprint, field)
+        return element
+
+    def lookup_cascade(self, field, strategies, timeout, label, order, cached_index):
+        """Una espera completa por estrategia, en orden"""
+        for index in order:
+            by, selector = strategies[index]
+            attempt_start = time.monotonic()
+            try:
+                logging.info(f"🔍 Estrategia {label} {index + 1}: {selector}")
+                element = WebDriverWait(self.driver, timeout).until(
+                    EC.element_to_be_clickable((by, selector))
+                )
+                logging.info(f"✅ {label} encontrado con estrategia {index + 1}")
+                self.trace_strategy(field, index, by, selector, 'hit', attempt_start, index == cached_index)
+                return element, index
+            except Exception:
+                logging.info(f"❌ Estrategia {label} {index + 1} falló")
+                self.trace_strategy(field, index, by, selector, 'miss', attempt_start, index == cached_index)
+        return None, None
+
+    def lookup_js(self, field, strategies, timeout, label, order, cached_index):
+        """Todas las estrategias en un solo execute_async_script con MutationObserver"""
+        attempt_start = time.monotonic()
+        logging.info(f"🔍 {label}: resolviendo {len(strategies)} estrategias en la página")
+        element, index = self.js_resolver.resolve(strategies, timeout, order)
+        if element is None:
+            logging.info(f"❌ {label}: ninguna estrategia coincidió en {timeout}s")
+            self.trace_strategy(field, order[0], 'js', None, 'miss', attempt_start)
+            return None, None
+        logging.info(f"✅ {label} encontrado con estrategia {index + 1} (resolvedor JS)")
+        by, selector = strategies[index]
+        self.trace_strategy(field, index, by, selector, 'hit', attempt_start, index == cached_index)
+        return element, index
+
+    def lookup_race(self, field, strategies, timeout, label, order, cached_index):
+        """Sondea todas las estrategias juntas; gana el primer elemento clickeable
+
+        El peor caso es un solo timeout en lugar de la suma de todos. La espera
+        implícita se apaga mientras tanto para que cada find_elements vuelva enseguida.
+        """
+        attempt_start = time.monotonic()
+        logging.info(f"🔍 {label}: compitiendo {len(strategies)} estrategias durante {timeout}s")
+
+        def first_clickable(driver):
+            for index in order:
+                by, selector = strategies[index]
+                try:
+                    for element in driver.find_elements(by, selector):
+                        if element.is_displayed() and element.is_enabled():
+                            return element, index
+                except Exception:
+                    # Selector inválido o elemento que desapareció: sigue con las demás
+                    continue
+            return False
+
+        self.driver.implicitly_wait(0)
+        try:
+            element, index = WebDriverWait(self.driver, timeout, poll_frequency=RACE_POLL_S).until(first_clickable)
+        except TimeoutException:
+            logging.info(f"❌ {label}: ninguna estrategia coincidió en {timeout}s")
+            self.trace_strategy(field, order[0], 'race', None, 'miss', attempt_start)
+            return None, None
+        finally:
+            self.driver.implicitly_wait(IMPLICIT_WAIT_S)
+
+        by, selector = strategies[index]
+        logging.info(f"✅ {label} encontrado con estrategia {index + 1} en {time.monotonic() - attempt_start:.2f}s (carrera): {selector}")
+        self.trace_strategy(field, index, by, selector, 'hit', attempt_start, index == cached_index)
+        return element, index
+
+    def trace_strategy(self, field, index, by, selector, outcome, start, cached=False):
+        """Registra un intento de estrategia en la traza"""
+        if self.trace:
+            self.trace.event('strategy', field, step=self.trace.current_step and self.trace.current_step[0],
+                             index=index + 1, by=by, selector=selector, cached=cached,
+                             outcome=outcome, duration_s=round(time.monotonic() - start, 4))
+
+    def save_devtools_log(self):
+        """Guarda el log de performance/red de DevTools junto a la traza"""
+        if not (self.capture_devtools_log and self.driver and self.trace and self.trace.path):
+            return
+        try:
+            entries = [json.loads(entry['message']) for entry in self.driver.get_log('performance')]
+            path = self.trace.path.replace('.ndjson', '_devtools.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            logging.info(f"🧾 Log de DevTools guardado: {path} ({len(entries)} eventos)")
+        except Exception as e:
+            logging.warning(f"⚠️ No se pudo guardar el log de DevTools: {e}")
+
+    def select_dropdown(self, dropdown, value, field='nombre'):
+        """Elige value en el dropdown (índice de opciones y, si no se pueden leer, las estrategias anteriores)"""
+        logging.info(f"👆 Seleccionando: {value}")
+        is_select = dropdown.tag_name.lower() == 'select'
+
+        if not is_select:
+            # Abrir dropdown personalizado de Google Forms
+            self.driver.execute_script("arguments[0].click();", dropdown)
+            self.waits.options_rendered("dropdown abierto", 2)
+            self.checkpoint("dropdown_opened")
+
+        # Resolver el nombre contra el índice de opciones del formulario
+        selected = self.select_with_index(dropdown, value, field)
+        if selected is False:
+            return False
+
+        if selected is None and is_select:
+            # Dropdown HTML estándar
+            try:
+                select = Select(dropdown)
+                select.select_by_visible_text(value)
+                logging.info("✅ Nombre seleccionado en dropdown estándar")
+            except Exception as e:
+                return self.fail(f"Error al seleccionar en dropdown estándar: {e}")
+        elif selected is None:
+            # Dropdown personalizado de Google Forms sin opciones legibles
+            try:
+                option_found = False
+
+                # Estrategia principal: Encontrar el campo de texto de búsqueda dentro del dropdown
+                # y luego la opción exacta.
+                try:
+                    # Buscar el input o div que actúa como campo de texto de búsqueda dentro del dropdown.
+                    # Este XPath intenta ser genérico para inputs de texto dentro de un listbox/combobox.
+                    # También considera divs con role="combobox" que son contenteditable.
+                    search_input_field = WebDriverWait(self.driver, 10).until(
+                        EC.element_to_be_clickable((By.XPATH, 
+                            '//div[@role="listbox"]//input[@type="text"] | '
+                            '//div[@role="listbox"]//div[@role="combobox" and @aria-expanded="true"] | '
+                            '//div[@role="listbox"]//div[@data-initial-value] | ' # Otro patrón común en GForms
+                            '//input[@type="text" and @aria-label="Your answer"]' # Patrón común para campos de texto
+                        ))
+                    )
+
+                    logging.info(f"🔍 Campo de búsqueda del dropdown encontrado. Tipo de elemento: {search_input_field.tag_name}. Intentando enviar teclas: '{value.strip()}'")
+
+                    # Limpiar el campo antes de escribir (si es un input)
+                    if search_input_field.tag_name.lower() == 'input':
+                        search_input_field.clear()
+
+                    # Enviar el nombre
+                    self.type_like_human(search_input_field, value.strip())
+                    self.waits.options_rendered("sugerencias filtradas", 1)
+
+                    # Ahora, buscar y hacer clic en la opción que coincide exactamente
+                    # Usamos un XPath que busca el div[role="option"] que contiene el span con el texto exacto
+                    # Esto es más robusto que solo buscar el span directamente.
+                    exact_option_xpath = f'//div[@role="option"]//span[normalize-space(text())="{value.strip()}"]/ancestor::div[@role="option"][1]'
+
+                    logging.info(f"🔍 Buscando opción exacta por texto después de filtrar: {exact_option_xpath}")
+                    exact_option_element = WebDriverWait(self.driver, 10).until(
+                        EC.element_to_be_clickable((By.XPATH, exact_option_xpath))
+                    )
+
+                    self.driver.execute_script("arguments[0].click();", exact_option_element)
+                    logging.info(f"✅ Opción '{value}' seleccionada exitosamente después de enviar teclas y hacer clic en la sugerencia.")
+                    option_found = True
+
+                except (TimeoutException, NoSuchElementException) as e:
+                    logging.warning(f"⚠️ Falló la estrategia principal (enviar teclas y clic en sugerencia). Error: {type(e).__name__}: {e}")
+
+                if not option_found:
+                    # Fallback a la estrategia de data-value si la estrategia principal falla
+                    try:
+                        logging.info(f"🔍 Fallback: Intentando seleccionar por data-value: '{value.strip()}'")
+                        option_element = WebDriverWait(self.driver, 10).until(
+                            EC.element_to_be_clickable((By.XPATH, f'//div[@role="option" and @data-value="{value.strip()}"]'))
+                        )
+                        self.driver.execute_script("arguments[0].click();", option_element)
+                        logging.info(f"✅ Fallback: Opción '{value}' seleccionada usando data-value.")
+                        option_found = True
+                    except (TimeoutException, NoSuchElementException) as e:
+                        logging.info(f"❌ Fallback: No se encontró la opción por data-value ('{value.strip()}'). Error: {type(e).__name__}: {e}")
+
+                        # Último fallback: buscar por texto visible normalizado de todas las
+                        # opciones en una sola llamada dentro de la página
+                        logging.info(f"🔍 Fallback: Buscando '{value.strip()}' entre los textos de las opciones")
+                        option_element = self.js_resolver.resolve_option(value, 10)
+                        if option_element is not None:
+                            self.driver.execute_script("arguments[0].click();", option_element)
+                            logging.info(f"✅ Fallback: Opción '{value}' seleccionada usando texto visible.")
+                            option_found = True
+
+                if not option_found:
+                    return self.fail(f"No se encontró la opción '{value}' en el dropdown después de revisar todas las posibles opciones.", "error_option_not_found")
+
+            except Exception as e:
+                return self.fail(f"Error al manejar dropdown personalizado: {e}", "error_dropdown_handling")
+        return True
+
+    def submit(self, submit_button):
+        """Hace click en 'Enviar' y verifica el resultado"""
+        logging.info("👆 Haciendo click en 'Enviar'...")
+        self.driver.execute_script("arguments[0].click();", submit_button)
+        self.submitted = True
+        self.trace.event('submit', 'click')
+        state = self.waits.submit_confirmation(submit_button)
+        self.timings.log_summary()
+
+        # Verificar envío: solo el nodo de confirmación y los mensajes de error
+        self.verification = verify_page(self.driver, state)
+        if self.recorder:
+            self.recorder.submitted(self.driver)
+        self.trace.event('verify', self.verification.state, reason=self.verification.reason,
+                         evidence=self.verification.evidence)
+        if self.verification.state == 'rejected':
+            self.submitted = False  # Google no registró la respuesta: se puede reintentar
+            self.permanent = self.verification.permanent
+            return self.fail(f"Google rechazó el envío: {self.verification.describe()}", "error_rejected")
+        if not self.verification.confirmed:
+            return self.fail(f"No se pudo confirmar el envío: {self.verification.describe()}", "error_unconfirmed")
+
+        self.confirmed = True
+        logging.info(f"🎉 ¡FORMULARIO ENVIADO EXITOSAMENTE! ({self.verification.reason})")
+        return True
+
+    def select_with_index(self, dropdown, value, field):
+        """Elige la opción del nombre con el índice normalizado de opciones
+
+        El índice se guarda por formulario y campo. Devuelve True si la eligió,
+        False si falló (ambiguo o inexistente, sin esperar timeouts) o None si
+        no se pudieron leer las opciones.
+        """
+        index_key = f"{self.form_url}#{field}"
+        index = OPTION_INDEXES.get(index_key)
+        cached = index is not None
+        if not cached:
+            options = self.driver.execute_script(OPTIONS_SCRIPT, dropdown) or []
+            if not options:
+                logging.warning("⚠️ No se pudieron leer las opciones del dropdown, usando las estrategias anteriores")
+                return None
+            index = OPTION_INDEXES.build(index_key, options)
+            logging.info(f"🗂️ Índice de opciones armado: {len(index)} nombres")
+        
+        match = index.resolve(value)
+        self.trace.event('option', match.reason, wanted=value, option=match.option, cached=cached,
+                         candidates=match.candidates, suggestions=match.suggestions)
+        if match.option is None:
+            if cached:
+                # Puede ser una opción agregada después de armar el índice: se relee una vez
+                OPTION_INDEXES.invalidate(index_key)
+                return self.select_with_index(dropdown, value, field)
+            self.permanent = True  # Con las opciones recién leídas el nombre no está (o es ambiguo)
+            return self.fail(f"No se pudo elegir el nombre en el dropdown: {match.describe()}", "error_option_not_found")
+        
+        state = self.driver.execute_script(SELECT_OPTION_SCRIPT, dropdown, match.option)
+        if state == 'ok':
+            logging.info(f"✅ Opción seleccionada: {match.describe()}")
+            return True
+        if cached:
+            # Las opciones cambiaron desde que se armó el índice
+            OPTION_INDEXES.invalidate(index_key)
+            return self.select_with_index(dropdown, value, field)
+        return None
+
+    def type_like_human(self, element, text):
+        """Escribe texto con el ritmo del perfil elegido (FORM_PACING)"""
+        self.pacing.type_text(element, text)
+        logging.info(f"✍️ Texto ingresado: {text}")
+        
+    def fail(self, message, screenshot_name=None):
+        """Registra un error de paso, guarda screenshot y devuelve False"""
+        logging.error(f"❌ {message}")
+        self.last_error = message
+        if self.trace:
+            self.trace.end_step('failed', error=message)
+        if screenshot_name:
+            self.capture_failure(screenshot_name)
+        return False
+
+    def fill_form_step_by_step(self, keep_browser=False):
+        """Llena el formulario paso a paso con logging detallado
+
+        Con keep_browser=True el navegador queda abierto para la siguiente
+        persona (modo batch); si no, se cierra al terminar.
+        """
+        self.last_error = None
+        self.submitted = False
+        self.confirmed = False
+        self.verification = None
+        self.permanent = False
+        self.trace = RunTrace.start(self.screenshot_prefix)
+        self.trace.listener = self.trace_listener
+        self.capture.reset()
+        if self.recorder:
+            self.recorder.reset()
+        try:
+            logging.info("🚀 === INICIANDO AUTOMATIZACIÓN ===")
+            logging.info(f"🌐 URL del formulario: {self.form_url}")
+            
+            # Configurar navegador (se reutiliza si ya está abierto)
+            self.trace.begin_step('navegador')
+            if not self.driver:
+                self.setup_chrome_driver()
+            self.timings = StepTimings(self.trace)
+            self.js_resolver = JsFieldResolver(self.driver)
+            self.waits = ReadinessWaiter(self.driver, self.pacing, self.timings)
+            
+            # Ir al formulario
+            self.trace.begin_step('carga')
+            logging.info("📄 Navegando al formulario...")
+            self.driver.get(self.form_url)
+            self.waits.page_loaded()
+            
+            # Screenshot inicial
+            self.checkpoint("01_inicial")
+            logging.info("✅ Formulario cargado")
+            
+            # Secciones, campos y botones según el spec del flujo
+            flow = load_flow(self.flow_path)
+            return FlowRunner(self, flow).run(self.flow_values())
+                
+        except Exception as e:
+            logging.error(f"💥 ERROR CRÍTICO durante la automatización: {e}")
+            self.last_error = f"Error crítico: {e}"
+            self.trace.end_step('error', error=self.last_error)
+            if self.driver:
+                self.capture_failure("error_critical")
+            return False
+        finally:
+            self.save_devtools_log()
+            self.trace.finish('failed' if self.last_error else 'ok', error=self.last_error)
+            if self.recorder:
+                self.recorder.save(self.form_url, self.flow_values(), self.trace, self.verification)
+            if not keep_browser:
+                self.close()
@@ -0,0 +1,191 @@
+# form_shard.py
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from form_job_store import identity_key
+
+SHARD_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(\d+)\s*$')
+# Estados que justifican volver a correr el shard (invalid y needs_review no se reintentan)
+RETRYABLE_STATUSES = ('failed', 'error', 'retry', 'pending', 'running')
+DEFAULT_MERGED_REPORT = '/tmp/form_batch_report_merged.json'
+DEFAULT_MERGED_TRACE = '/tmp/form_trace_merged.ndjson'
+
+
+def parse_shard(value):
+    """'i/N' -> (i, N) con 1 <= i <= N"""
+    match = SHARD_PATTERN.match(str(value or ''))
+    if not match:
+        raise ValueError(f"Shard inválido: {value!r} (formato i/N, p. ej. 2/4)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard fuera de rango: {index}/{count} (i entre 1 y N)")
+    return index, count
+
+
+def row_identity(row):
+    # Las filas sin DNI ni email caen por su número de fila (igual se reportan como inválidas)
+    return identity_key(row) or f"row-{row['row']}"
+
+
+def shard_of(identity, count):
+    """Shard (1..N) de una persona: hash estable, no depende del orden del roster ni del proceso"""
+    digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+    return int(digest[:16], 16) % count + 1
+
+
+def select_shard(rows, index, count):
+    return [row for row in rows if shard_of(row_identity(row), count) == index]
+
+
+def shard_path(path, index, count):
+    """Agrega el shard al nombre del archivo: report.json -> report_shard2of4.json"""
+    root, ext = os.path.splitext(path)
+    return f"{root}_shard{index}of{count}{ext}"
+
+
+def shard_info(index, count, rows):
+    return {'index': index, 'count': count, 'rows': rows}
+
+
+def find_reports(paths):
+    """Reportes de shard (JSON con 'shard' y 'results') dentro de los archivos o carpetas dados"""
+    reports = []
+    for path in paths:
+        candidates = glob.glob(os.path.join(path, '**', '*.json'), recursive=True) if os.path.isdir(path) else [path]
+        for candidate in sorted(candidates):
+            try:
+                with open(candidate, encoding='utf-8') as f:
+                    report = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️ No se pudo leer {candidate}: {e}")
+                continue
+            if isinstance(report, dict) and report.get('shard') and 'results' in report:
+                report['path'] = candidate
+                reports.append(report)
+    return reports
+
+
+def latest_by_shard(reports):
+    """Un reporte por shard: el último que terminó (el reintento reemplaza al original)"""
+    latest = {}
+    for report in reports:
+        index = report['shard']['index']
+        if index not in latest or report.get('finished_at', '') >= latest[index].get('finished_at', ''):
+            latest[index] = report
+    return latest
+
+
+def needs_retry(report):
+    return any(result['status'] in RETRYABLE_STATUSES for result in report['results'])
+
+
+def merge_reports(reports, count=None):
+    """Combina los reportes de shard en uno solo y calcula qué shards reintentar
+
+    count (N) permite detectar shards que no dejaron reporte (runner caído).
+    """
+    latest = latest_by_shard(reports)
+    counts = {report['shard']['count'] for report in latest.values()}
+    if count:
+        counts.add(count)
+    if len(counts) > 1:
+        raise ValueError(f"Los reportes mezclan distintas cantidades de shards: {sorted(counts)}")
+    count = counts.pop() if counts else 0
+
+    missing = [index for index in range(1, count + 1) if index not in latest]
+    shards = []
+    results = []
+    for index in sorted(latest):
+        report = latest[index]
+        for result in report['results']:
+            results.append(dict(result, shard=index))
+        shards.append({
+            'index': index,
+            'rows': report['shard'].get('rows', report['total']),
+            'ok': report['ok'],
+            'failed': report['failed'],
+            'duration_s': report['duration_s'],
+            'finished_at': report.get('finished_at'),
+            'report': report['path'],
+            'retry': needs_retry(report),
+        })
+    results.sort(key=lambda r: (r['row'], r['shard']))
+
+    ok = sum(1 for r in results if r['status'] == 'ok')
+    retry = sorted(missing + [shard['index'] for shard in shards if shard['retry']])
+    return {
+        'form_url': next((report.get('form_url') for report in latest.values()), None),
+        'shards': count,
+        'missing_shards': missing,
+        'retry_shards': retry,
+        'total': len(results),
+        'ok': ok,
+        'failed': len(results) - ok,
+        # Con los shards en paralelo el tiempo total es el del más lento
+        'duration_s': max((shard['duration_s'] for shard in shards), default=0.0),
+        'merged_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'shard_reports': shards,
+        'results': results,
+    }
+
+
+def merge_traces(reports, output):
+    """Une las trazas NDJSON de cada shard (las de la carpeta de su reporte) agregando 'shard'"""
+    written = 0
+    with open(output, 'w', encoding='utf-8') as out:
+        for index, report in sorted(latest_by_shard(reports).items()):
+            folder = os.path.dirname(report['path']) or '.'
+            for path in sorted(glob.glob(os.path.join(folder, '**', 'form_trace_*.ndjson'), recursive=True)):
+                if os.path.abspath(path) == os.path.abspath(output):
+                    continue
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            record['shard'] = index
+                            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                            written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Combina los reportes y trazas de un batch repartido en shards")
+    parser.add_argument('inputs', nargs='+', help="Reportes JSON o carpetas con los artefactos de cada shard")
+    parser.add_argument('--shards', type=int, help="Cantidad total de shards (para detectar los que no dejaron reporte)")
+    parser.add_argument('--output', default=DEFAULT_MERGED_REPORT, help="Reporte combinado")
+    parser.add_argument('--trace-output', default=DEFAULT_MERGED_TRACE, help="Traza NDJSON combinada")
+    parser.add_argument('--retry-output', help="Archivo donde escribir la lista JSON de shards a reintentar")
+    parser.add_argument('--strict', action='store_true', help="Sale con error si alguna fila no se envió")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    reports = find_reports(args.inputs)
+    merged = merge_reports(reports, args.shards)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2)
+    events = merge_traces(reports, args.trace_output)
+    if args.retry_output:
+        with open(args.retry_output, 'w', encoding='utf-8') as f:
+            json.dump(merged['retry_shards'], f)
+
+    for shard in merged['shard_reports']:
+        icon = '🔁' if shard['retry'] else '✅'
+        logging.info(f"{icon} Shard {shard['index']}/{merged['shards']}: {shard['ok']}/{shard['rows']} OK en {shard['duration_s']:.1f}s")
+    for index in merged['missing_shards']:
+        logging.error(f"❌ Shard {index}/{merged['shards']}: sin reporte")
+    logging.info(f"📊 {merged['ok']}/{merged['total']} filas OK en {len(merged['shard_reports'])} shards - "
+                 f"reporte: {args.output}, traza: {args.trace_output} ({events} eventos)")
+    if merged['retry_shards']:
+        logging.info(f"🔁 Shards a reintentar: {', '.join(str(i) for i in merged['retry_shards'])}")
+    if args.strict and (merged['failed'] or merged['missing_shards']):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# form_trace.py
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_TRACE_DIR = '/tmp'
+
+
+def new_run_id(prefix=''):
+    """Fecha, pid y un sufijo aleatorio: dos reintentos en el mismo segundo no comparten archivo"""
+    return f"{prefix}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class RunTrace:
+    """Traza NDJSON de una ejecución: pasos, estrategias, esperas y screenshots
+
+    Cada evento se escribe apenas ocurre, así la traza sirve aunque el
+    proceso muera a mitad de camino. Los tiempos usan time.monotonic().
+    """
+
+    def __init__(self, path=None, run_id=None):
+        self.run_id = run_id or new_run_id()
+        self.path = path
+        self.started = time.monotonic()
+        self.events = []
+        self.current_step = None
+        self.listener = None  # Callable(record) que recibe cada evento (p. ej. el registro de trabajos)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, prefix=''):
+        """Crea la traza según FORM_TRACE_DIR ('off' la deja solo en memoria)"""
+        trace_dir = os.environ.get('FORM_TRACE_DIR', DEFAULT_TRACE_DIR)
+        run_id = new_run_id(prefix)
+        path = None
+        if trace_dir.lower() not in ('', '0', 'off', 'false', 'no'):
+            os.makedirs(trace_dir, exist_ok=True)
+            path = os.path.join(trace_dir, f"form_trace_{run_id}.ndjson")
+        return cls(path, run_id)
+
+    def event(self, kind, name, **fields):
+        record = {
+            'run_id': self.run_id,
+            't': round(time.monotonic() - self.started, 4),
+            'kind': kind,
+            'name': name,
+        }
+        record.update(fields)
+        with self._lock:
+            self.events.append(record)
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                except OSError as e:
+                    logging.warning(f"⚠️ No se pudo escribir la traza: {e}")
+                    self.path = None
+        if self.listener:
+            try:
+                self.listener(record)
+            except Exception as e:
+                logging.warning(f"⚠️ Error en el listener de la traza: {type(e).__name__}: {e}")
+        return record
+
+    @contextmanager
+    def span(self, kind, name, **fields):
+        """Mide un bloque; el bloque puede completar fields (p. ej. outcome)"""
+        start = time.monotonic()
+        fields.setdefault('outcome', 'ok')
+        try:
+            yield fields
+        except BaseException as e:
+            fields['outcome'] = 'error'
+            fields['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.event(kind, name, duration_s=round(time.monotonic() - start, 4), **fields)
+
+    def begin_step(self, name):
+        """Cierra el paso anterior (si hay) y empieza uno nuevo"""
+        self.end_step('ok')
+        self.current_step = (name, time.monotonic())
+
+    def end_step(self, outcome='ok', **fields):
+        if not self.current_step:
+            return
+        name, start = self.current_step
+        self.current_step = None
+        self.event('step', name, outcome=outcome, duration_s=round(time.monotonic() - start, 4), **fields)
+
+    def finish(self, outcome, **fields):
+        self.end_step(outcome)
+        self.event('run', 'total', outcome=outcome, duration_s=round(time.monotonic() - self.started, 4), **fields)
+        self.log_summary()
+
+    def summary_rows(self):
+        """Una fila por paso con su duración, intentos de estrategia y fallos"""
+        rows = []
+        for step in (e for e in self.events if e['kind'] == 'step'):
+            strategies = [e for e in self.events if e['kind'] == 'strategy' and e.get('step') == step['name']]
+            rows.append({
+                'step': step['name'],
+                'outcome': step['outcome'],
+                'duration_s': step['duration_s'],
+                'attempts': len(strategies),
+                'misses': sum(1 for e in strategies if e['outcome'] != 'hit'),
+                'miss_time_s': round(sum(e['duration_s'] for e in strategies if e['outcome'] != 'hit'), 3),
+            })
+        return rows
+
+    def log_summary(self):
+        rows = self.summary_rows()
+        if not rows:
+            return
+        logging.info("\n📊 === TIEMPOS POR PASO ===")
+        logging.info(f"{'paso':<16} {'resultado':<10} {'tiempo':>8} {'intentos':>9} {'fallos':>7} {'t. fallos':>10}")
+        for r in rows:
+            logging.info(f"{r['step']:<16} {r['outcome']:<10} {r['duration_s']:>7.2f}s {r['attempts']:>9} {r['misses']:>7} {r['miss_time_s']:>9.2f}s")
+        total = next((e for e in reversed(self.events) if e['kind'] == 'run'), None)
+        if total:
+            logging.info(f"{'total':<16} {total['outcome']:<10} {total['duration_s']:>7.2f}s")
+        if self.path:
+            logging.info(f"🧾 Traza guardada: {self.path}")
@@ -0,0 +1,121 @@
+# form_verification.py
+import html
+import re
+
+VERIFICATION_STATES = ('confirmed', 'rejected', 'unknown')
+
+# Nodos que Google usa solo en la página de confirmación
+CONFIRMATION_SELECTORS = ['.freebirdFormviewerViewResponseConfirmationMessage', '.vHW8K']
+# Banners y mensajes de validación que Google muestra al rechazar un envío
+ERROR_SELECTORS = [
+    '.freebirdFormviewerViewItemsItemErrorMessage',
+    '[role="alert"]',
+    '[aria-invalid="true"]',
+]
+# Frases del mensaje de confirmación por defecto (el dueño del formulario puede cambiarlo)
+CONFIRMATION_PHRASES = (
+    'tu respuesta se ha registrado',
+    'se registró tu respuesta',
+    'your response has been recorded',
+)
+MAX_EVIDENCE_TEXT = 200
+
+# Lee solo los nodos relevantes (no todo el page_source)
+VERIFY_SUBMISSION_SCRIPT = """
+const [confirmationSelectors, errorSelectors] = [arguments[0], arguments[1]];
+const text = el => (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim();
+const confirmation = document.querySelector(confirmationSelectors.join(','));
+const errors = [];
+for (const el of document.querySelectorAll(errorSelectors.join(','))) {
+    const value = el.getAttribute('aria-invalid') === 'true' ? (el.getAttribute('aria-label') || el.name || 'campo inválido') : text(el);
+    if (value) errors.push(value);
+}
+return {
+    url: location.href,
+    confirmation: confirmation ? text(confirmation) : null,
+    errors: errors.slice(0, 5),
+    form_present: !!document.querySelector('form input[name^="entry."], form [role="listbox"], form textarea'),
+};
+"""
+
+CONFIRMATION_HTML_PATTERN = re.compile(
+    r'<div[^>]*class="[^"]*(?:freebirdFormviewerViewResponseConfirmationMessage|vHW8K)[^"]*"[^>]*>(.*?)</div>', re.S)
+ALERT_HTML_PATTERN = re.compile(r'<[^>]*role="alert"[^>]*>(.*?)</', re.S)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def clean_text(value):
+    return ' '.join(html.unescape(TAG_PATTERN.sub(' ', value or '')).split())[:MAX_EVIDENCE_TEXT]
+
+
+class Verification:
+    """Resultado de verificar un envío: confirmed, rejected o unknown, con la evidencia"""
+
+    def __init__(self, state, reason, evidence=None):
+        if state not in VERIFICATION_STATES:
+            raise ValueError(f"Estado de verificación desconocido: {state}")
+        self.state = state
+        self.reason = reason
+        self.evidence = evidence or {}
+
+    @property
+    def confirmed(self):
+        return self.state == 'confirmed'
+
+    @property
+    def permanent(self):
+        """Rechazo por validación de los datos: reintentar con los mismos datos no sirve"""
+        return self.state == 'rejected' and bool(self.evidence.get('errors'))
+
+    def describe(self):
+        details = [f"{key}={value!r}" for key, value in self.evidence.items() if value not in (None, [], '')]
+        return f"{self.state} ({self.reason}{': ' + ', '.join(details) if details else ''})"
+
+
+def classify(evidence):
+    """Decide el estado a partir de la evidencia leída de la página"""
+    confirmation = evidence.get('confirmation')
+    errors = evidence.get('errors') or []
+    if errors:
+        return Verification('rejected', 'mensaje de validación', evidence)
+    if confirmation is not None:
+        if any(phrase in confirmation.lower() for phrase in CONFIRMATION_PHRASES):
+            return Verification('confirmed', 'mensaje de confirmación', evidence)
+        # El nodo solo existe en la página de confirmación aunque el texto sea personalizado
+        return Verification('confirmed', 'nodo de confirmación', evidence)
+    # La URL no alcanza: en un formulario con secciones ya es formResponse antes de enviar.
+    # Solo si la página cambió después del click el formulario a la vista es un rechazo.
+    if evidence.get('form_present') and evidence.get('page') == 'navigated':
+        return Verification('rejected', 'el formulario volvió a mostrarse', evidence)
+    return Verification('unknown', 'sin confirmación ni error visibles', evidence)
+
+
+def verify_page(driver, state=None):
+    """Verifica el envío en el navegador leyendo solo los nodos de confirmación y error
+
+    state: lo que devolvió la espera después del click (ver CONFIRMATION_STATE_SCRIPT).
+    """
+    try:
+        evidence = driver.execute_script(VERIFY_SUBMISSION_SCRIPT, CONFIRMATION_SELECTORS, ERROR_SELECTORS)
+    except Exception as e:
+        return Verification('unknown', f"no se pudo leer la página: {type(e).__name__}", {})
+    return classify(dict(evidence or {}, page=state))
+
+
+def verify_response(response):
+    """Verifica la respuesta HTTP de formResponse (motor HTTP)"""
+    evidence = {'url': response.url, 'status': response.status_code}
+    if 400 <= response.status_code < 500:
+        return Verification('rejected', f"HTTP {response.status_code}", evidence)
+    if response.status_code != 200:
+        # Un error del servidor no dice si la respuesta quedó registrada
+        return Verification('unknown', f"HTTP {response.status_code}", evidence)
+    body = response.text
+    match = CONFIRMATION_HTML_PATTERN.search(body)
+    evidence['confirmation'] = clean_text(match.group(1)) if match else None
+    evidence['errors'] = [text for text in (clean_text(m) for m in ALERT_HTML_PATTERN.findall(body)) if text][:5]
+    # Si el envío es rechazado Google vuelve a mostrar el formulario
+    evidence['form_present'] = 'FB_PUBLIC_LOAD_DATA_' in body
+    if evidence['form_present'] and evidence['confirmation'] is None:
+        return Verification('rejected', 'el formulario volvió a mostrarse', evidence)
+    return classify(evidence)
@@ -0,0 +1,190 @@
+# form_waits.py
+import logging
+import os
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from form_locators import CONFIRMATION_STATE_SCRIPT, NAVIGATED_STATE_SCRIPT
+
+# Perfiles de ritmo: cómo se escribe y cuánto se pausa entre pasos
+PACING_PROFILES = {
+    'off': {'char_delay': None, 'step_pause': 0.0},     # Sin pausas, texto de una vez
+    'fast': {'char_delay': None, 'step_pause': 0.3},    # Pausa corta entre pasos
+    'human': {'char_delay': 0.1, 'step_pause': 1.5},    # Escritura letra por letra
+}
+DEFAULT_PACING = 'off'
+
+# Cuenta requests fetch/XHR en curso para detectar "red en reposo"
+NETWORK_TRACKER_SCRIPT = """
+if (!window.__formPending) {
+    window.__formPending = {count: 0};
+    const origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            window.__formPending.count++;
+            return origFetch.apply(this, arguments).finally(() => window.__formPending.count--);
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__formPending.count++;
+        this.addEventListener('loadend', () => window.__formPending.count--);
+        return origSend.apply(this, arguments);
+    };
+}
+return [window.__formPending.count, performance.getEntriesByType('resource').length, document.readyState];
+"""
+
+
+class PacingProfile:
+    """Ritmo de escritura y pausas entre pasos (off / fast / human)"""
+
+    def __init__(self, name=DEFAULT_PACING):
+        if name not in PACING_PROFILES:
+            raise ValueError(f"Perfil de ritmo desconocido: {name} (opciones: {', '.join(PACING_PROFILES)})")
+        self.name = name
+        self.char_delay = PACING_PROFILES[name]['char_delay']
+        self.step_pause = PACING_PROFILES[name]['step_pause']
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('FORM_PACING', DEFAULT_PACING).lower())
+
+    def type_text(self, element, text):
+        element.clear()
+        if self.char_delay is None:
+            element.send_keys(text)
+            return
+        time.sleep(0.5)
+        for char in text:
+            element.send_keys(char)
+            time.sleep(self.char_delay + (hash(char) % 50) / 1000)  # Variación aleatoria
+
+    def pause(self):
+        if self.step_pause:
+            time.sleep(self.step_pause)
+
+
+class StepTimings:
+    """Compara el tiempo real de cada espera con la pausa fija que reemplaza"""
+
+    def __init__(self, trace=None):
+        self.steps = []
+        self.trace = trace
+
+    def record(self, step, legacy_seconds, elapsed, timed_out=False):
+        saved = legacy_seconds - elapsed
+        self.steps.append((step, legacy_seconds, elapsed))
+        if self.trace:
+            self.trace.event('wait', step, legacy_s=legacy_seconds, duration_s=round(elapsed, 4),
+                             saved_s=round(saved, 4), outcome='timeout' if timed_out else 'ok')
+        logging.info(f"⏱️ {step}: listo en {elapsed:.2f}s (antes {legacy_seconds:.1f}s fijos, ahorro {saved:+.2f}s)")
+
+    def log_summary(self):
+        if not self.steps:
+            return
+        legacy = sum(s[1] for s in self.steps)
+        elapsed = sum(s[2] for s in self.steps)
+        logging.info(f"⏱️ Esperas: {elapsed:.2f}s en total contra {legacy:.1f}s fijos (ahorro {legacy - elapsed:.2f}s)")
+
+
+class ReadinessWaiter:
+    """Esperas por condición en lugar de time.sleep fijos"""
+
+    def __init__(self, driver, pacing=None, timings=None, poll=0.1):
+        self.driver = driver
+        self.pacing = pacing or PacingProfile()
+        self.timings = timings or StepTimings()
+        self.poll = poll
+
+    def until(self, condition, timeout):
+        return WebDriverWait(self.driver, timeout, poll_frequency=self.poll).until(condition)
+
+    def timed(self, step, legacy_seconds, wait, timeout):
+        """Ejecuta la espera, registra el ahorro y aplica la pausa del perfil
+
+        Un timeout no corta el flujo: el paso siguiente tiene su propia búsqueda.
+        """
+        start = time.monotonic()
+        result = None
+        timed_out = False
+        try:
+            result = wait(timeout)
+        except Exception as e:
+            timed_out = True
+            logging.warning(f"⚠️ {step}: la condición no se cumplió en {timeout}s ({type(e).__name__})")
+        self.pacing.pause()
+        self.timings.record(step, legacy_seconds, time.monotonic() - start, timed_out)
+        return result
+
+    def document_ready(self, timeout):
+        return self.until(lambda d: d.execute_script("return document.readyState") == 'complete', timeout)
+
+    def network_idle(self, timeout, idle_time=0.3):
+        """Espera a que no haya requests en curso ni recursos nuevos durante idle_time"""
+        last_state = None
+        stable_since = time.monotonic()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            pending, resources, ready = self.driver.execute_script(NETWORK_TRACKER_SCRIPT)
+            state = (resources, ready)
+            if pending > 0 or ready != 'complete' or state != last_state:
+                last_state = state
+                stable_since = time.monotonic()
+            elif time.monotonic() - stable_since >= idle_time:
+                return True
+            time.sleep(self.poll)
+        raise TimeoutError("la red no quedó en reposo")
+
+    def in_sequence(self, timeout, *waits):
+        """Corre las esperas una tras otra con un único plazo (cada una recibe lo que queda)"""
+        deadline = time.monotonic() + timeout
+        result = None
+        for wait in waits:
+            result = wait(max(0.0, deadline - time.monotonic()))
+            if not result:
+                return result
+        return result
+
+    def page_loaded(self, timeout=15):
+        return self.timed("carga inicial", 5,
+                          lambda t: self.in_sequence(t, self.document_ready, self.network_idle), timeout)
+
+    def value_applied(self, step, legacy_seconds, element, value, timeout=3):
+        return self.timed(step, legacy_seconds,
+                          lambda t: self.until(lambda d: (element.get_attribute('value') or '') == value, t), timeout)
+
+    def section_transition(self, old_element, timeout=15):
+        """La sección cambió cuando el botón anterior desaparece del DOM"""
+        def wait(t):
+            return self.in_sequence(t, lambda remaining: self.until(EC.staleness_of(old_element), remaining),
+                                    self.document_ready, self.network_idle)
+        return self.timed("cambio de sección", 4, wait, timeout)
+
+    def options_rendered(self, step='opciones visibles', legacy_seconds=2, timeout=10):
+        return self.timed(step, legacy_seconds, lambda t: self.until(
+            lambda d: d.execute_script(
+                "return Array.from(document.querySelectorAll('[role=\"option\"], select option'))"
+                ".some(o => o.offsetParent !== null || o.tagName === 'OPTION');"), t), timeout)
+
+    def selection_settled(self, timeout=5):
+        """El desplegable se cerró y no quedan requests pendientes"""
+        return self.timed("selección aplicada", 2, lambda t: self.until(
+            lambda d: not d.execute_script(
+                "return !!document.querySelector('[role=\"listbox\"][aria-expanded=\"true\"]');"), t)
+            and self.network_idle(t), timeout)
+
+    def submit_confirmation(self, submit_button, timeout=15):
+        """Espera la confirmación, un error de validación o que la página del botón 'Enviar' se vaya
+
+        Devuelve el estado ('message', 'error', 'navigated') o None si el click no tuvo efecto a tiempo.
+        """
+        def state(d):
+            try:
+                return d.execute_script(CONFIRMATION_STATE_SCRIPT, submit_button)
+            except StaleElementReferenceException:
+                return d.execute_script(NAVIGATED_STATE_SCRIPT)
+        return self.timed("confirmación de envío", 5, lambda t: self.until(state, t), timeout)
@@ -0,0 +1,45 @@
+import json
+
+import form_async_engine
+from form_async_engine import AsyncBatchRunner
+
+
+class FakeDriver:
+    def __init__(self, slot):
+        self.slot = slot
+        self.alive = True
+
+    async def is_alive(self):
+        return self.alive
+
+    async def quit(self):
+        self.alive = False
+
+
+def row(number):
+    return {'row': number, 'email': f"p{number}@example.com", 'nombre': f"Persona {number}", 'dni': str(number)}
+
+
+def test_failed_restart_fails_one_row_and_keeps_draining(monkeypatch, tmp_path):
+    starts = []
+
+    async def start_chrome(slot=None):
+        starts.append(slot)
+        if len(starts) == 2:
+            raise RuntimeError('chromedriver no arrancó')
+        return FakeDriver(slot)
+
+    async def submit_once(driver, form_url, email, nombre, dni, prefix='', listener=None):
+        flow = form_async_engine.AsyncFormFlow(driver, form_url, email, nombre, dni)
+        driver.alive = dni != '1'  # El navegador se cae después de la primera fila
+        return True, flow
+
+    monkeypatch.setattr(form_async_engine, 'start_chrome', start_chrome)
+    monkeypatch.setattr(form_async_engine, 'submit_once', submit_once)
+    report = tmp_path / 'report.json'
+    runner = AsyncBatchRunner('http://127.0.0.1/form', [row(1), row(2), row(3)], workers=1, report_path=str(report))
+    results = runner.run()
+    assert [r['status'] for r in results] == ['ok', 'error', 'ok']
+    assert 'No se pudo reiniciar el navegador' in results[1]['error']
+    assert len(starts) == 3
+    assert json.loads(report.read_text(encoding='utf-8'))['total'] == 3
@@ -0,0 +1,47 @@
+import form_automation_github
+from form_daemon import WarmDriverPool
+
+
+class FakeAutomator:
+    """Automatizador sin navegador: cuenta los Chromes que se abren"""
+
+    opened = 0
+
+    def __init__(self, *args):
+        self.driver = None
+        self.chrome_slot = None
+        self.trace = None
+
+    def setup_chrome_driver(self):
+        FakeAutomator.opened += 1
+        self.driver = object()
+
+    def is_driver_alive(self):
+        return True
+
+    def close(self):
+        self.driver = None
+
+
+def start_pool(monkeypatch, engine):
+    FakeAutomator.opened = 0
+    monkeypatch.setattr(form_automation_github, 'build_automator', lambda engine, *args: FakeAutomator(*args))
+    pool = WarmDriverPool('http://127.0.0.1/form', size=2, engine=engine)
+    pool.start()
+    return pool
+
+
+def test_selenium_pool_opens_every_browser_at_start(monkeypatch):
+    pool = start_pool(monkeypatch, 'selenium')
+    assert FakeAutomator.opened == 2
+    assert pool.health()['status'] == 'ok'
+    assert pool.health()['alive'] == 2
+
+
+def test_auto_pool_waits_for_the_first_selenium_fallback(monkeypatch):
+    pool = start_pool(monkeypatch, 'auto')
+    assert FakeAutomator.opened == 0
+    assert pool.health()['status'] == 'ok'
+    assert pool.health()['alive'] == 0
+    slot = pool.acquire(timeout=1)
+    assert pool.recycle_reason(slot) is None
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+
+
+def test_import_does_not_load_engines():
+    proc = run_python("import sys, form_automation_github; "
+                      "print(sorted({'selenium', 'requests'} & {m.split('.')[0] for m in sys.modules}))")
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == '[]'
+
+
+def test_selenium_automator_is_still_exported():
+    pytest.importorskip('selenium')
+    from form_automation_github import GitHubFormAutomator
+    from form_selenium_engine import GitHubFormAutomator as engine_class
+
+    assert GitHubFormAutomator is engine_class
+
+
+def test_unknown_attribute_raises_attribute_error():
+    import form_automation_github
+
+    with pytest.raises(AttributeError):
+        form_automation_github.NoExiste
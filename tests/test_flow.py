@@ -0,0 +1,74 @@
+# tests/test_flow.py
+import copy
+
+import pytest
+
+from form_flow import DEFAULT_FLOW_PATH, FlowSpecError, compile_flow, load_flow, read_spec
+from form_locators import CSS, DROPDOWN_STRATEGIES, XPATH
+
+
+@pytest.fixture
+def spec():
+    return read_spec(DEFAULT_FLOW_PATH)
+
+
+def test_default_flow_compiles(spec):
+    flow = compile_flow(spec)
+    assert [section.name for section in flow.sections] == ['email', 'datos']
+    assert [section.advance.action for section in flow.sections] == ['next', 'submit']
+    nombre = flow.sections[1].fields[0]
+    assert nombre.strategies == [tuple(pair) for pair in DROPDOWN_STRATEGIES]
+    assert nombre.cache_key == 'dropdown'
+    assert flow.sections[1].fields[1].fallback == 'last_text_input'
+
+
+def test_custom_locators_and_sources(monkeypatch):
+    flow = compile_flow({'sections': [{'fields': [
+        {'name': 'turno', 'kind': 'radio', 'locators': [['css', '#turno'], ['xpath', '//div']],
+         'value': {'column': 'turno', 'env': 'TURNO', 'const': 'mañana'}}]}]})
+    field = flow.sections[0].fields[0]
+    assert field.strategies == [(CSS, '#turno'), (XPATH, '//div')]
+    assert field.value({'turno': 'tarde'}) == 'tarde'
+    monkeypatch.setenv('TURNO', 'noche')
+    assert field.value({}) == 'noche'
+    monkeypatch.delenv('TURNO')
+    assert field.value({}) == 'mañana'
+
+
+@pytest.mark.parametrize('mutate', [
+    lambda s: s.update(sections=[]),
+    lambda s: s['sections'][0]['fields'][0].update(kind='slider'),
+    lambda s: s['sections'][0]['fields'][0].update(locators='inexistente'),
+    lambda s: s['sections'][0]['fields'][0].update(locators=[['id', 'x']]),
+    lambda s: s['sections'][0]['fields'][0].update(value={'secret': 'x'}),
+    lambda s: s['sections'][0]['fields'][0].update(timeout=0),
+    lambda s: s['sections'][0]['fields'][0].update(fallback='adivinar'),
+    lambda s: s['sections'][1]['fields'][0].update(name='email'),
+    lambda s: s['sections'][0]['advance'].update(action='submit'),
+    lambda s: s['sections'][1]['advance'].update(action='next'),
+    lambda s: s['sections'][1]['advance'].update(action='jump'),
+])
+def test_invalid_specs(spec, mutate):
+    spec = copy.deepcopy(spec)
+    mutate(spec)
+    with pytest.raises(FlowSpecError):
+        compile_flow(spec)
+
+
+def test_load_flow_is_cached_until_the_file_changes(tmp_path, spec):
+    import json
+    import os
+
+    path = tmp_path / 'flow.json'
+    path.write_text(json.dumps(spec), encoding='utf-8')
+    flow = load_flow(str(path))
+    assert load_flow(str(path)) is flow
+    spec['name'] = 'otro'
+    path.write_text(json.dumps(spec), encoding='utf-8')
+    os.utime(path, (os.path.getmtime(path) + 5,) * 2)
+    assert load_flow(str(path)).name == 'otro'
+
+
+def test_load_flow_missing(tmp_path):
+    with pytest.raises(FlowSpecError):
+        load_flow(str(tmp_path / 'no.json'))
@@ -0,0 +1,101 @@
+# tests/test_http_engine.py
+"""Motor HTTP de punta a punta contra la réplica local (sin navegador)"""
+import os
+
+import pytest
+
+pytest.importorskip('requests')
+
+from form_automation_github import FallbackAutomator  # noqa: E402
+from form_http_engine import GoogleFormHttpAutomator  # noqa: E402
+from replica_server import ReplicaHandler, ReplicaServer  # noqa: E402
+
+IDENTITY = {'email': 'ana@example.com', 'nombre': 'jose perez', 'dni': '30111222'}
+
+
+class ScriptedHandler(ReplicaHandler):
+    """La réplica, con la respuesta al envío elegida por el test (server.mode)"""
+
+    def do_POST(self):
+        mode = getattr(self.server, 'mode', 'confirm')
+        if mode == 'confirm':
+            super().do_POST()
+            return
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if mode == 'reject':
+            # Google vuelve a mostrar el formulario sin registrar la respuesta
+            variant, _ = self.route()
+            self.send_file(os.path.join(self.server.replica_dir, variant, 'section1.html'))
+        else:
+            self.send_error(500)
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    monkeypatch.setenv('FORM_TRACE_DIR', str(tmp_path))
+    with ReplicaServer(handler=ScriptedHandler) as server:
+        yield server
+
+
+def http_automator(server):
+    return GoogleFormHttpAutomator(server.form_url('listbox'), **IDENTITY)
+
+
+def test_confirmed_submission_payload(server):
+    automator = http_automator(server)
+    assert automator.fill_form_step_by_step()
+    assert (automator.submitted, automator.confirmed, automator.verification.state) == (True, True, 'confirmed')
+    [submission] = server.submissions
+    fields = {name: values[0] for name, values in submission['fields'].items()}
+    assert submission['variant'] == 'listbox'
+    assert fields['entry.333'] == 'José Pérez'  # El nombre resuelto contra las opciones del desplegable
+    assert fields['entry.444'] == '30111222'
+    assert fields['emailAddress'] == 'ana@example.com'  # Email recolectado por el formulario
+    assert fields['pageHistory'] == '0,1'
+    assert fields['fbzx'] == '-4242424242424242'
+    assert fields['fvv'] == '1'
+
+
+def test_name_outside_the_options_is_permanent(server):
+    automator = GoogleFormHttpAutomator(server.form_url('listbox'), IDENTITY['email'], 'Nadie Conocido', '1')
+    assert not automator.fill_form_step_by_step()
+    assert (automator.submitted, automator.permanent) == (False, True)
+    assert server.submissions == []
+
+
+def test_rejection_is_retryable_and_falls_back_to_selenium(server, monkeypatch):
+    server.httpd.mode = 'reject'
+    automator = http_automator(server)
+    assert not automator.fill_form_step_by_step()
+    assert (automator.submitted, automator.confirmed, automator.permanent) == (False, False, False)
+    assert automator.verification.state == 'rejected'
+
+    fallback = FallbackAutomator(server.form_url('listbox'), **IDENTITY)
+    calls = []
+    monkeypatch.setattr(fallback, 'run_selenium', lambda keep_browser: calls.append(keep_browser) or True)
+    assert fallback.fill_form_step_by_step()
+    assert calls == [False]
+
+
+def test_unconfirmed_submission_does_not_fall_back(server, monkeypatch):
+    server.httpd.mode = 'error'
+    fallback = FallbackAutomator(server.form_url('listbox'), **IDENTITY)
+    monkeypatch.setattr(fallback, 'run_selenium', lambda keep_browser: pytest.fail("no debía usar Selenium"))
+    assert not fallback.fill_form_step_by_step()
+    assert fallback.submitted
+    assert fallback.verification.state == 'unknown'
+
+
+def test_reused_automator_starts_each_run_unsubmitted(server, monkeypatch):
+    server.httpd.mode = 'error'
+    fallback = FallbackAutomator(server.form_url('listbox'), **IDENTITY)
+    calls = []
+    monkeypatch.setattr(fallback, 'run_selenium', lambda keep_browser: calls.append(keep_browser) or True)
+    assert not fallback.fill_form_step_by_step(keep_browser=True)
+    assert fallback.http.submitted
+
+    # Sin set_identity: el envío anterior no puede bloquear el respaldo de este, que falla antes del POST
+    fallback.http.nombre = 'Nadie Conocido'
+    assert fallback.fill_form_step_by_step(keep_browser=True)
+    assert not fallback.http.submitted
+    assert calls == [True]
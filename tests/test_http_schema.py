@@ -0,0 +1,84 @@
+# tests/test_http_schema.py
+import os
+
+import pytest
+
+pytest.importorskip('requests')
+
+from form_http_engine import QUESTION_DROPDOWN, FormSchema, FormSchemaError, base_form_url  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPLICA_PAGE = os.path.join(ROOT, 'benchmarks', 'form_replica', 'listbox', 'section1.html')
+
+
+def load_data(*items, fbzx='-42'):
+    return [None, ['', list(items)], None, None, None, None, None, None, None, None, None, None, None, None, fbzx]
+
+
+def test_from_html_replica():
+    with open(REPLICA_PAGE, encoding='utf-8') as f:
+        schema = FormSchema.from_html(f.read())
+    assert schema.section_count == 2
+    assert schema.fbzx == '-4242424242424242'
+    email, name, dni = schema.resolve_fields()
+    assert email is None
+    assert (name.kind, name.field_name, name.section) == (QUESTION_DROPDOWN, 'entry.333', 1)
+    assert 'José Pérez' in name.options
+    assert dni.field_name == 'entry.444'
+
+
+def test_from_load_data_sections_and_fields():
+    schema = FormSchema.from_load_data(load_data(
+        [1, 'Correo  electrónico', None, 0, [[111, None, 1]]],
+        [2, 'Firma', None, 8],
+        [3, 'Nombre', None, 3, [[222, [['Ana'], [''], ['Bob']], 1]]],
+        [4, 'Documento', None, 0, [[333, None, 0]]],
+    ))
+    email, name, dni = schema.resolve_fields()
+    assert email.title == 'Correo electrónico'
+    assert name.options == ['Ana', 'Bob']
+    assert (dni.entry_id, dni.required, dni.section) == (333, False, 1)
+
+
+def test_required_question_without_data():
+    schema = FormSchema.from_load_data(load_data(
+        [3, 'Nombre', None, 3, [[222, [['Ana']], 1]]],
+        [4, 'DNI', None, 0, [[333, None, 1]]],
+        [5, 'Turno', None, 2, [[444, [['Mañana']], 1]]],
+    ))
+    with pytest.raises(FormSchemaError, match='Turno'):
+        schema.resolve_fields()
+
+
+@pytest.mark.parametrize('html', ['<html></html>', '<script>var FB_PUBLIC_LOAD_DATA_ = [1, ;</script>'])
+def test_from_html_errors(html):
+    with pytest.raises(FormSchemaError):
+        FormSchema.from_html(html)
+
+
+def test_from_load_data_without_questions():
+    with pytest.raises(FormSchemaError):
+        FormSchema.from_load_data([None])
+
+
+def test_base_form_url():
+    assert base_form_url('https://docs.google.com/forms/d/e/X/viewform?usp=sf_link') == 'https://docs.google.com/forms/d/e/X'
+
+
+@pytest.mark.parametrize('item', [
+    None,
+    [1, 'Nombre', None, 3, [None]],
+    [1, 'Nombre', None, 3, [[222, 5, 1]]],
+    [1, 'Nombre', None, 3, 7],
+    [1, ['no es texto'], None, 0, [[111, None, 1]]],
+])
+def test_malformed_item_raises_schema_error_with_position(item):
+    data = load_data([0, 'Email', None, 0, [[100, None, 1]]], item)
+    with pytest.raises(FormSchemaError, match='Elemento 1'):
+        FormSchema.from_load_data(data)
+
+
+@pytest.mark.parametrize('data', [None, 42, {'1': []}, [None, 'x']])
+def test_malformed_root_raises_schema_error(data):
+    with pytest.raises(FormSchemaError):
+        FormSchema.from_load_data(data)
@@ -0,0 +1,174 @@
+# tests/test_job_store.py
+import pytest
+
+from form_job_store import JobStore, backoff_delay, identity_key
+
+FORM = 'https://form'
+DAY = '2026-01-01'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), max_attempts=2, backoff_s=0, backoff_max_s=0)
+    yield store
+    store.close()
+
+
+def person(row, dni):
+    return {'row': row, 'email': f"p{row}@example.com", 'nombre': f"Persona {row}", 'dni': dni}
+
+
+def status(store, dni):
+    return next(job['status'] for job in store.jobs(FORM, DAY) if job['identity'] == dni)
+
+
+def test_identity_key_prefers_dni():
+    assert identity_key({'dni': ' 30111222 ', 'email': 'a@x.com'}) == '30111222'
+    assert identity_key({'dni': '', 'email': 'A@X.com'}) == 'a@x.com'
+
+
+def test_backoff_delay_is_capped_with_jitter():
+    for attempt in range(1, 8):
+        delay = backoff_delay(attempt, base=10, cap=60)
+        expected = min(60, 10 * 2 ** (attempt - 1))
+        assert expected / 2 <= delay <= expected
+
+
+def test_enqueue_is_idempotent_per_day(store):
+    assert store.enqueue(FORM, [person(2, '1'), person(3, '2')], DAY) == 2
+    assert store.enqueue(FORM, [person(2, '1')], DAY) == 0
+    assert store.enqueue(FORM, [person(2, '1')], '2026-01-02') == 1
+
+
+def test_claim_marks_running_and_counts_attempts(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    assert (job['identity'], job['attempts']) == ('1', 1)
+    assert status(store, '1') == 'running'
+    assert store.claim(FORM, DAY) is None
+
+
+def test_finish_confirmed(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    assert store.finish(job, True, True, True, None) == 'confirmed'
+    assert store.next_due(FORM, DAY) is None
+
+
+def test_finish_submitted_without_confirmation_needs_review(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    assert store.finish(job, False, True, False, None) == 'needs_review'
+    assert store.claim(FORM, DAY) is None
+
+
+def test_finish_retries_until_attempts_run_out(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    assert store.finish(job, False, False, False, 'timeout') == 'retry'
+    job = store.claim(FORM, DAY)
+    assert job['attempts'] == 2
+    assert store.finish(job, False, False, False, 'timeout') == 'failed'
+    assert store.claim(FORM, DAY) is None
+    assert store.requeue_failed(FORM, DAY) == 1
+    assert store.claim(FORM, DAY)['attempts'] == 1
+
+
+def test_recover_interrupted_jobs(store):
+    store.enqueue(FORM, [person(2, '1'), person(3, '2')], DAY)
+    submitted = store.claim(FORM, DAY)
+    store.claim(FORM, DAY)
+    store.listener(submitted)({'kind': 'submit', 'name': 'click'})
+    assert store.recover(FORM, DAY) == (1, 1)
+    assert status(store, '1') == 'needs_review'
+    assert status(store, '2') == 'retry'
+
+
+def test_listener_records_steps(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    store.listener(job)({'kind': 'step', 'name': 'email', 'outcome': 'ok', 'duration_s': 0.5})
+    assert store.jobs(FORM, DAY)[0]['last_step'] == 'email'
+    assert store.execute("SELECT step, outcome FROM job_steps")[0]['step'] == 'email'
+
+
+def test_finish_permanent_failure_is_invalid_without_retries(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    assert store.finish(job, False, False, False, "'Nadie' no está entre las opciones", permanent=True) == 'invalid'
+    assert store.claim(FORM, DAY) is None
+    assert store.requeue_failed(FORM, DAY) == 0
+
+
+def test_finish_submitted_wins_over_permanent(store):
+    store.enqueue(FORM, [person(2, '1')], DAY)
+    job = store.claim(FORM, DAY)
+    assert store.finish(job, False, True, False, None, permanent=True) == 'needs_review'
+
+
+class ScriptedAutomator:
+    """Automatizador de prueba: cada persona (por DNI) termina como indica outcomes"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+        self.trace_listener = None
+
+    def set_identity(self, email, nombre, dni, row=None):
+        self.dni = dni
+
+    def fill_form_step_by_step(self, keep_browser=False):
+        self.calls.append(self.dni)
+        success, self.submitted, self.permanent, state = self.outcomes[self.dni]
+        self.confirmed = success
+        self.verification = type('V', (), {'state': state})() if state else None
+        self.last_error = None if success else 'falló'
+        return success
+
+    def is_driver_alive(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def test_durable_runner_classifies_and_reports_verification(tmp_path, store):
+    from form_job_store import DurableBatchRunner
+
+    automator = ScriptedAutomator({
+        '1': (True, True, False, 'confirmed'),
+        '2': (False, False, True, None),  # Nombre fuera de las opciones
+        '3': (False, True, False, 'unknown'),  # Se hizo click sin confirmación
+    })
+
+    class Runner(DurableBatchRunner):
+        def open_automator(self, row, worker_name):
+            return automator
+
+    runner = Runner(FORM, [person(2, '1'), person(3, '2'), person(4, '3')], store, workers=1,
+                    report_path=str(tmp_path / 'report.json'), day=DAY)
+    results = {r['row']: r for r in runner.run()}
+    assert [results[row]['status'] for row in (2, 3, 4)] == ['ok', 'invalid', 'needs_review']
+    assert [results[row]['verification'] for row in (2, 3, 4)] == ['confirmed', None, 'unknown']
+    assert sorted(automator.calls) == ['1', '2', '3']  # Ningún reintento
+
+
+def test_durable_runner_retries_a_job_whose_automator_failed_to_open(tmp_path, store):
+    from form_job_store import DurableBatchRunner
+
+    outcomes = {'1': (True, True, False, 'confirmed'), '2': (True, True, False, 'confirmed')}
+    opened = []
+
+    class Runner(DurableBatchRunner):
+        def open_automator(self, row, worker_name):
+            opened.append(worker_name)
+            if len(opened) == 1:
+                raise RuntimeError('chromedriver no encontrado')
+            return ScriptedAutomator(outcomes)
+
+    runner = Runner(FORM, [person(2, '1'), person(3, '2')], store, workers=2,
+                    report_path=str(tmp_path / 'report.json'), day=DAY)
+    results = runner.run()
+    assert [r['status'] for r in results] == ['ok', 'ok']
+    assert sorted(r['attempts'] for r in results) == [1, 2]
+    assert (tmp_path / 'report.json').exists()
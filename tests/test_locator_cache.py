@@ -0,0 +1,38 @@
+import time
+
+from form_locator_cache import TOUCH_INTERVAL_S, LocatorCache
+
+FORM = 'https://docs.google.com/forms/d/x/viewform'
+
+
+def age_entry(cache, seconds):
+    def mutate(entries):
+        entries[cache.key(FORM, 'abc')]['email']['saved_at'] = time.time() - seconds
+    cache.update(mutate)
+
+
+def test_hit_keeps_a_working_locator_from_expiring(tmp_path):
+    cache = LocatorCache(str(tmp_path / 'locators.json'), max_age_hours=2)
+    cache.put(FORM, 'abc', 'email', 0, 'css selector', 'input[type="email"]')
+    age_entry(cache, 1.5 * 3600)
+    cache.touch(FORM, 'abc', 'email')
+    assert time.time() - cache.get(FORM, 'abc', 'email')['saved_at'] < 60
+    # Releído del archivo: el acierto quedó guardado
+    assert LocatorCache(cache.path, max_age_hours=2).get(FORM, 'abc', 'email') is not None
+
+
+def test_recent_entries_are_not_rewritten(tmp_path):
+    cache = LocatorCache(str(tmp_path / 'locators.json'))
+    cache.put(FORM, 'abc', 'email', 0, 'css selector', 'input[type="email"]')
+    age_entry(cache, TOUCH_INTERVAL_S / 2)
+    saved_at = cache.get(FORM, 'abc', 'email')['saved_at']
+    cache.touch(FORM, 'abc', 'email')
+    assert cache.get(FORM, 'abc', 'email')['saved_at'] == saved_at
+
+
+def test_expired_entries_are_not_revived(tmp_path):
+    cache = LocatorCache(str(tmp_path / 'locators.json'), max_age_hours=1)
+    cache.put(FORM, 'abc', 'email', 0, 'css selector', 'input[type="email"]')
+    cache.entries[cache.key(FORM, 'abc')]['email']['saved_at'] = time.time() - 7200
+    cache.touch(FORM, 'abc', 'email')
+    assert cache.get(FORM, 'abc', 'email') is None
@@ -0,0 +1,49 @@
+# tests/test_option_index.py
+from form_option_index import OptionIndex, OptionIndexCache, fold, token_key
+
+OPTIONS = ['Ana Gómez', 'Carlos Díaz', 'José Pérez', 'María  López', 'Martín Sosa']
+
+
+def test_fold_and_token_key():
+    assert fold('  JOSÉ   Pérez. ') == 'jose perez'
+    assert token_key('Pérez José') == token_key('José Pérez')
+
+
+def test_resolve_exact_normalized_and_word_order():
+    index = OptionIndex(OPTIONS)
+    assert index.resolve('José Pérez').reason == 'exacta'
+    match = index.resolve('jose perez')
+    assert (match.option, match.reason) == ('José Pérez', 'normalizada')
+    assert index.resolve('María López').option == 'María  López'
+    match = index.resolve('Sosa Martín')
+    assert (match.option, match.reason) == ('Martín Sosa', 'palabras')
+
+
+def test_resolve_ambiguous():
+    match = OptionIndex(['Juan Pérez', 'juan perez']).resolve('JUAN PEREZ')
+    assert match.option is None
+    assert match.ambiguous
+    assert match.candidates == ['Juan Pérez', 'juan perez']
+
+
+def test_resolve_missing_suggests_without_accepting_by_default():
+    match = OptionIndex(OPTIONS).resolve('Jose Peres', accept_fuzzy=False)
+    assert match.option is None
+    assert match.suggestions[0] == 'José Pérez'
+    assert 'José Pérez' in match.describe()
+
+
+def test_resolve_fuzzy_accepts_clear_winner(monkeypatch):
+    monkeypatch.setenv('FORM_OPTION_FUZZY', '1')
+    match = OptionIndex(OPTIONS).resolve('Carlos Diaaz')
+    assert match.option == 'Carlos Díaz'
+    assert match.reason.startswith('aproximada')
+
+
+def test_cache_rebuilds_only_when_options_change():
+    cache = OptionIndexCache()
+    first = cache.build('form#nombre', OPTIONS)
+    assert cache.build('form#nombre', list(OPTIONS)) is first
+    assert cache.build('form#nombre', OPTIONS + ['Nuevo Nombre']) is not first
+    cache.invalidate('form#nombre')
+    assert cache.get('form#nombre') is None
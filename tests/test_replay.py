@@ -0,0 +1,134 @@
+# tests/test_replay.py
+"""Ramas de estrategias y fallbacks contra la réplica y los bundles grabados (--record)
+
+Los casos con navegador necesitan selenium y chromedriver; sin ellos se saltean.
+FORM_REPLAY_BUNDLES agrega bundles grabados (carpetas separadas por os.pathsep).
+"""
+import importlib.util
+import os
+import shutil
+
+import pytest
+
+from form_fixture import BUNDLE_VARIANT, REPLAY_DNI, REPLAY_EMAIL, FixtureRecorder, load_manifest
+from form_flow import DEFAULT_FLOW_PATH, compile_flow, read_spec
+from replay_check import (CLEARED_ENV, REPLAY_ENV, REPLICA_IDENTITY, BundleHandler, ReplayCase, check_result,
+                          run_case, run_sweep, sweep_problems, sweep_specs)
+from replica_server import REPLICA_DIR, ReplicaServer
+
+LOOKUPS = ('cascade', 'js', 'race')
+REPLICA_VARIANTS = sorted(d for d in os.listdir(REPLICA_DIR) if os.path.isdir(os.path.join(REPLICA_DIR, d)))
+RECORDED_BUNDLES = [path for path in os.environ.get('FORM_REPLAY_BUNDLES', '').split(os.pathsep) if path]
+
+requires_chrome = pytest.mark.skipif(
+    not (importlib.util.find_spec('selenium') and shutil.which('chromedriver')),
+    reason="hace falta selenium y chromedriver")
+
+
+def record_replica(variant, bundle_dir, identity=REPLICA_IDENTITY):
+    """Bundle armado con FixtureRecorder a partir de las páginas de la réplica (como lo grabaría --record)"""
+    def page(name):
+        with open(os.path.join(REPLICA_DIR, *name), encoding='utf-8') as f:
+            return f.read()
+
+    recorder = FixtureRecorder(str(bundle_dir))
+    recorder.sections = [
+        {'checkpoint': '01_inicial', 'url': 'viewform', 'html': page((variant, 'section1.html'))},
+        {'checkpoint': '02_after_next', 'url': 'section2', 'html': page((variant, 'section2.html'))},
+    ]
+    recorder.confirmation = page(('confirmation.html',))
+    recorder.save('http://replica/viewform', identity, None, None)
+    return str(bundle_dir)
+
+
+def test_sweep_covers_every_strategy_and_fallback():
+    spec = read_spec(DEFAULT_FLOW_PATH)
+    flow = compile_flow(spec)
+    items = [item for section in flow.sections for item in section.fields + [section.advance]]
+    expected = sum(len(item.strategies) + bool(getattr(item, 'fallback', None)) for item in items)
+    derived = list(sweep_specs(spec))
+    assert len(derived) == expected
+    for item, index, selector, derived_spec in derived:
+        single = compile_flow(derived_spec)
+        locators = [entry.strategies for section in single.sections for entry in section.fields + [section.advance]
+                    if entry.label == item.label]
+        assert locators and len(locators[0]) == 1
+        if index != 'fallback':
+            assert locators[0][0] == item.strategies[index]
+
+
+def test_recorded_bundle_is_sanitized(tmp_path):
+    identity = {'email': 'real@example.com', 'nombre': 'José Pérez', 'dni': '30111222'}
+    bundle = record_replica('listbox', tmp_path / 'bundle', identity)
+    manifest = load_manifest(bundle)
+    assert manifest['identity'] == {'email': REPLAY_EMAIL, 'nombre': 'José Pérez', 'dni': REPLAY_DNI}
+    assert manifest['sections'] == ['01_inicial', '02_after_next']
+    with open(os.path.join(bundle, BUNDLE_VARIANT, 'section1.html'), encoding='utf-8') as f:
+        first = f.read()
+    assert 'FB_PUBLIC_LOAD_DATA_' in first  # El motor HTTP sigue pudiendo leer el esquema
+    assert '<style' not in first
+    assert '"section2"' in first  # El shim navega a la sección siguiente
+    with open(os.path.join(bundle, BUNDLE_VARIANT, 'section2.html'), encoding='utf-8') as f:
+        assert "getElementById('names')" not in f.read()  # Sin el JS original de la página
+
+
+def test_load_manifest_rejects_other_folders(tmp_path):
+    with pytest.raises(ValueError):
+        load_manifest(str(tmp_path))
+
+
+@pytest.fixture
+def replay_env(monkeypatch, tmp_path):
+    """Entorno de replay_check; monkeypatch restaura lo que run_case cambia"""
+    for key in CLEARED_ENV:
+        monkeypatch.delenv(key, raising=False)
+    for key, value in REPLAY_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setenv('FORM_TRACE_DIR', str(tmp_path))
+    monkeypatch.setenv('FORM_LOOKUP', 'cascade')
+    return tmp_path
+
+
+@pytest.fixture
+def replay_case(request, tmp_path):
+    kind, name = request.param
+    if kind == 'replica':
+        with ReplicaServer(replica_dir=REPLICA_DIR, handler=BundleHandler) as server:
+            yield ReplayCase(f"replica/{name}", server, name, REPLICA_IDENTITY)
+        return
+    bundle = record_replica(name, tmp_path / 'bundle') if kind == 'recorded' else name
+    manifest = load_manifest(bundle)
+    with ReplicaServer(replica_dir=bundle, handler=BundleHandler) as server:
+        yield ReplayCase(os.path.basename(bundle), server, BUNDLE_VARIANT, manifest['identity'], manifest)
+
+
+CASES = ([('replica', variant) for variant in REPLICA_VARIANTS]
+         + [('recorded', variant) for variant in REPLICA_VARIANTS]
+         + [('bundle', path) for path in RECORDED_BUNDLES])
+CASE_IDS = [f"{kind}-{os.path.basename(name)}" for kind, name in CASES]
+
+
+@requires_chrome
+@pytest.mark.parametrize('lookup', LOOKUPS)
+@pytest.mark.parametrize('replay_case', CASES, ids=CASE_IDS, indirect=True)
+def test_replay_submits(replay_env, replay_case, lookup):
+    result = run_case(replay_case, 'selenium', lookup)
+    assert check_result(replay_case, result) == []
+
+
+@requires_chrome
+@pytest.mark.parametrize('replay_case', CASES, ids=CASE_IDS, indirect=True)
+def test_every_strategy_branch(replay_env, replay_case):
+    rows = run_sweep(replay_case, 'selenium', str(replay_env))
+    assert sweep_problems(rows) == []
+
+
+@requires_chrome
+@pytest.mark.parametrize('engine', ['selenium', 'async'])
+def test_sections_posted_to_form_response(replay_env, engine):
+    """La sección 2 se sirve en /formResponse: el envío espera la respuesta en vez de leer la URL"""
+    with ReplicaServer(replica_dir=REPLICA_DIR, handler=BundleHandler, submit_delay=1) as server:
+        case = ReplayCase('replica/multisection', server, 'multisection', REPLICA_IDENTITY)
+        result = run_case(case, engine, 'cascade')
+        assert check_result(case, result) == []
+        assert len(server.submissions) == 1
@@ -0,0 +1,33 @@
+import pytest
+
+from form_batch import BatchRunner
+from form_resources import ResourceGovernor
+
+FORM = 'http://127.0.0.1/form'
+ROW = {'row': 1, 'email': 'ana@example.com', 'nombre': 'Ana Gómez', 'dni': '1'}
+
+
+def test_admit_is_idempotent_per_session():
+    governor = ResourceGovernor(max_sessions=1)
+    assert governor.admit('worker-1', timeout=0)
+    assert governor.admit('worker-1', timeout=0)
+    assert not governor.admit('worker-2', timeout=0)
+    assert governor.stats['admitted'] == 1
+
+
+def test_http_concurrency_ignores_chrome_memory(monkeypatch):
+    governor = ResourceGovernor(cpu_per_session=1)
+    monkeypatch.setattr(governor, 'headroom_mb', lambda: 0.0)
+    monkeypatch.setattr('os.cpu_count', lambda: 8)
+    assert governor.safe_concurrency() == 1
+    assert governor.safe_concurrency(browser=False) == 8
+
+
+@pytest.mark.parametrize('engine', ['http', 'auto'])
+def test_batch_without_chrome_does_not_reserve_memory(engine):
+    pytest.importorskip('requests')
+    governor = ResourceGovernor()
+    runner = BatchRunner(FORM, [ROW], engine=engine, governor=governor)
+    automator = runner.open_automator(ROW, 'worker-1')
+    assert governor.active == set()
+    runner.close_automator(automator, 'worker-1')
@@ -0,0 +1,45 @@
+# tests/test_roster.py
+import pytest
+
+from form_roster import load_roster, missing_fields, normalize_row
+
+
+def test_load_csv_with_aliases_and_bom(tmp_path):
+    path = tmp_path / 'roster.csv'
+    path.write_text('\ufeffCorreo,Apellido y Nombre,Documento,Turno\n'
+                    'ana@example.com, Ana Gómez ,30111222,mañana\n'
+                    ',,,\n'
+                    'bob@example.com,Bob,,tarde\n', encoding='utf-8')
+    rows = load_roster(str(path))
+    assert [row['row'] for row in rows] == [2, 4]
+    assert rows[0]['email'] == 'ana@example.com'
+    assert rows[0]['nombre'] == 'Ana Gómez'
+    assert rows[0]['dni'] == '30111222'
+    assert rows[0]['turno'] == 'mañana'  # Las columnas extra se conservan
+    assert missing_fields(rows[1]) == ['DNI']
+
+
+def test_load_jsonl_skips_comments(tmp_path):
+    path = tmp_path / 'roster.jsonl'
+    path.write_text('# firma\n{"email": "a@x.com", "name": "Ana", "dni": 1}\n\n{"mail": "b@x.com"}\n', encoding='utf-8')
+    rows = load_roster(str(path))
+    assert [(row['row'], row['nombre'], row['dni']) for row in rows] == [(2, 'Ana', '1'), (4, '', '')]
+
+
+@pytest.mark.parametrize('content, name', [('email,nombre,dni\n', 'roster.csv'), ('{bad\n', 'roster.jsonl')])
+def test_load_roster_errors(tmp_path, content, name):
+    path = tmp_path / name
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_roster(str(path))
+
+
+def test_load_roster_missing_file(tmp_path):
+    with pytest.raises(ValueError):
+        load_roster(str(tmp_path / 'no.csv'))
+
+
+def test_normalize_row():
+    row = normalize_row({'EMAIL ': ' a@x.com ', None: 'extra'}, 7)
+    assert row == {'email': 'a@x.com', 'nombre': '', 'dni': '', 'row': 7}
+    assert missing_fields(row) == ['NOMBRE', 'DNI']
@@ -0,0 +1,80 @@
+# tests/test_shard.py
+import json
+
+import pytest
+
+from form_shard import merge_reports, merge_traces, needs_retry, parse_shard, select_shard, shard_of, shard_path
+
+
+def rows(count):
+    return [{'row': i + 2, 'email': f"p{i}@example.com", 'nombre': f"Persona {i}", 'dni': str(30000000 + i)}
+            for i in range(count)]
+
+
+def report(index, count, statuses, finished_at='2026-01-01T12:00:00', path='report.json'):
+    results = [{'row': row, 'status': status} for row, status in statuses]
+    ok = sum(1 for _, status in statuses if status == 'ok')
+    return {'shard': {'index': index, 'count': count, 'rows': len(results)}, 'form_url': 'https://form',
+            'total': len(results), 'ok': ok, 'failed': len(results) - ok, 'duration_s': 10.0 * index,
+            'finished_at': finished_at, 'results': results, 'path': path}
+
+
+@pytest.mark.parametrize('value, expected', [('1/1', (1, 1)), (' 2 / 4 ', (2, 4)), ('4/4', (4, 4))])
+def test_parse_shard(value, expected):
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize('value', ['0/4', '5/4', '1/0', '2', 'a/b', None])
+def test_parse_shard_invalid(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_shard_of_is_stable_and_in_range():
+    assert shard_of('30111222', 4) == shard_of('30111222', 4)
+    assert all(1 <= shard_of(str(n), 3) <= 3 for n in range(200))
+
+
+def test_shards_partition_the_roster():
+    roster = rows(50)
+    shards = [select_shard(roster, index, 4) for index in range(1, 5)]
+    assert sorted(row['row'] for shard in shards for row in shard) == [row['row'] for row in roster]
+    # No depende del orden del roster
+    assert select_shard(list(reversed(roster)), 2, 4) == list(reversed(shards[1]))
+
+
+def test_shard_path():
+    assert shard_path('/tmp/report.json', 2, 4) == '/tmp/report_shard2of4.json'
+
+
+def test_merge_reports_keeps_latest_and_flags_retries():
+    first = report(1, 3, [(2, 'ok'), (5, 'failed')], finished_at='2026-01-01T12:00:00')
+    retried = report(1, 3, [(2, 'ok'), (5, 'ok')], finished_at='2026-01-01T12:30:00')
+    second = report(2, 3, [(3, 'ok'), (4, 'error')])
+    merged = merge_reports([first, second, retried], count=3)
+    assert merged['missing_shards'] == [3]
+    assert merged['retry_shards'] == [2, 3]
+    assert [(r['row'], r['shard']) for r in merged['results']] == [(2, 1), (3, 2), (4, 2), (5, 1)]
+    assert (merged['ok'], merged['failed']) == (3, 1)
+    assert merged['duration_s'] == 20.0
+
+
+def test_merge_reports_rejects_mixed_counts():
+    with pytest.raises(ValueError):
+        merge_reports([report(1, 2, []), report(2, 3, [])])
+
+
+def test_needs_retry_ignores_invalid_and_review():
+    assert not needs_retry(report(1, 1, [(2, 'ok'), (3, 'invalid'), (4, 'needs_review')]))
+    assert needs_retry(report(1, 1, [(2, 'retry')]))
+
+
+def test_merge_traces_tags_each_event(tmp_path):
+    for index in (1, 2):
+        folder = tmp_path / f"shard-{index}"
+        folder.mkdir()
+        (folder / 'form_trace_a.ndjson').write_text(json.dumps({'kind': 'step', 'name': 'email'}) + '\n')
+    reports = [report(index, 2, [], path=str(tmp_path / f"shard-{index}" / 'report.json')) for index in (1, 2)]
+    output = tmp_path / 'merged.ndjson'
+    assert merge_traces(reports, str(output)) == 2
+    assert [json.loads(line)['shard'] for line in output.read_text().splitlines()] == [1, 2]
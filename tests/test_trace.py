@@ -0,0 +1,31 @@
+# tests/test_trace.py
+import json
+
+from form_trace import RunTrace
+
+
+def test_traces_started_in_the_same_second_use_separate_files(monkeypatch, tmp_path):
+    monkeypatch.setenv('FORM_TRACE_DIR', str(tmp_path))
+    first = RunTrace.start('row0004_')
+    second = RunTrace.start('row0004_')
+    assert first.run_id != second.run_id
+    first.event('step', 'email', outcome='ok')
+    second.event('step', 'email', outcome='failed')
+    assert len(list(tmp_path.iterdir())) == 2
+    with open(second.path, encoding='utf-8') as f:
+        assert [json.loads(line)['outcome'] for line in f] == ['failed']
+
+
+def test_steps_and_summary(monkeypatch):
+    monkeypatch.setenv('FORM_TRACE_DIR', 'off')
+    trace = RunTrace.start()
+    assert trace.path is None
+    seen = []
+    trace.listener = seen.append
+    trace.begin_step('email')
+    trace.event('strategy', 'email', step='email', index=1, outcome='miss', duration_s=0.5)
+    trace.event('strategy', 'email', step='email', index=2, outcome='hit', duration_s=0.1)
+    trace.finish('ok')
+    row = trace.summary_rows()[0]
+    assert (row['step'], row['attempts'], row['misses'], row['miss_time_s']) == ('email', 2, 1, 0.5)
+    assert [record['kind'] for record in seen] == ['strategy', 'strategy', 'step', 'run']
@@ -0,0 +1,66 @@
+# tests/test_verification.py
+from types import SimpleNamespace
+
+import pytest
+
+from form_verification import Verification, classify, verify_response
+
+CONFIRMATION_PAGE = ('<html><div class="freebirdFormviewerViewResponseConfirmationMessage">'
+                     'Tu respuesta se ha registrado.</div></html>')
+
+
+def response(status=200, text='', url='https://docs.google.com/forms/d/x/formResponse'):
+    return SimpleNamespace(status_code=status, text=text, url=url)
+
+
+@pytest.mark.parametrize('evidence, state, reason', [
+    ({'errors': ['Esta pregunta es obligatoria'], 'confirmation': 'ok'}, 'rejected', 'mensaje de validación'),
+    ({'confirmation': 'Tu respuesta se ha registrado.'}, 'confirmed', 'mensaje de confirmación'),
+    ({'confirmation': 'Gracias por firmar'}, 'confirmed', 'nodo de confirmación'),
+    ({'url': 'https://x/formResponse', 'form_present': True, 'page': 'navigated'}, 'rejected',
+     'el formulario volvió a mostrarse'),
+    # Sección de un formulario con secciones: la URL ya es formResponse y el click no tuvo efecto todavía
+    ({'url': 'https://x/formResponse', 'form_present': True, 'page': None}, 'unknown',
+     'sin confirmación ni error visibles'),
+    ({'url': 'https://x/formResponse', 'form_present': False, 'page': 'navigated'}, 'unknown',
+     'sin confirmación ni error visibles'),
+    ({'url': 'https://x/viewform'}, 'unknown', 'sin confirmación ni error visibles'),
+    ({}, 'unknown', 'sin confirmación ni error visibles'),
+])
+def test_classify(evidence, state, reason):
+    verification = classify(evidence)
+    assert (verification.state, verification.reason) == (state, reason)
+
+
+def test_unknown_state_is_rejected():
+    with pytest.raises(ValueError):
+        Verification('maybe', 'x')
+
+
+def test_verify_response_confirmation_page():
+    verification = verify_response(response(text=CONFIRMATION_PAGE))
+    assert verification.confirmed
+    assert verification.evidence['confirmation'] == 'Tu respuesta se ha registrado.'
+
+
+def test_verify_response_form_shown_again_is_rejected():
+    verification = verify_response(response(text='<script>var FB_PUBLIC_LOAD_DATA_ = [];</script>'))
+    assert (verification.state, verification.reason) == ('rejected', 'el formulario volvió a mostrarse')
+
+
+def test_verify_response_alert_is_rejected():
+    verification = verify_response(response(text=CONFIRMATION_PAGE + '<div role="alert">DNI inválido</div>'))
+    assert verification.state == 'rejected'
+    assert verification.evidence['errors'] == ['DNI inválido']
+
+
+@pytest.mark.parametrize('status, state', [(400, 'rejected'), (429, 'rejected'), (500, 'unknown'), (302, 'unknown')])
+def test_verify_response_status(status, state):
+    assert verify_response(response(status=status)).state == state
+
+
+def test_permanent_only_for_validation_rejections():
+    assert classify({'errors': ['DNI inválido']}).permanent
+    assert not classify({'url': 'https://x/formResponse', 'form_present': True, 'page': 'navigated'}).permanent
+    assert not verify_response(response(status=429)).permanent
+    assert not classify({'confirmation': 'ok'}).permanent
@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from form_waits import NETWORK_TRACKER_SCRIPT, ReadinessWaiter  # noqa: E402
+
+
+class SlowPageDriver:
+    """La página termina de cargar a los ready_after segundos y la red nunca queda en reposo"""
+
+    def __init__(self, ready_after):
+        self.ready_at = time.monotonic() + ready_after
+
+    def execute_script(self, script, *args):
+        ready = 'complete' if time.monotonic() >= self.ready_at else 'loading'
+        if script == NETWORK_TRACKER_SCRIPT:
+            return [1, 0, ready]
+        return ready
+
+
+def test_page_loaded_shares_one_timeout_between_its_waits():
+    waiter = ReadinessWaiter(SlowPageDriver(ready_after=0.6), poll=0.05)
+    start = time.monotonic()
+    assert waiter.page_loaded(timeout=1) is None  # La red no se calmó: timeout
+    # Antes cada espera tenía el plazo completo: 0.6s + 1s
+    assert time.monotonic() - start < 1.3
+    assert waiter.timings.steps[0][0] == 'carga inicial'
+
+
+def test_in_sequence_stops_at_the_first_failed_wait():
+    waiter = ReadinessWaiter(SlowPageDriver(ready_after=0), poll=0.05)
+    calls = []
+    assert waiter.in_sequence(1, lambda t: calls.append(t) or False, lambda t: calls.append(t) or True) is False
+    assert len(calls) == 1 and calls[0] <= 1